@@ -0,0 +1,54 @@
+"""
+Compare the available JSON codecs for JsonDocumentType.
+
+    python -m benchmarks.bench_codec [--output results.json]
+"""
+from __future__ import print_function
+
+from benchmarks.harness import main
+
+from mimeprovider.codec import CODECS
+from mimeprovider.codec import get_codec
+
+SIZES = [10, 1000, 50000]
+
+
+def make_data(size):
+    return [
+        {
+            "string": u"item number {0}".format(i),
+            "integer": i,
+            "number": i / 3.0,
+            "flag": i % 2 == 0,
+            "somelist": [i, i + 1, i + 2],
+        }
+        for i in range(size)
+    ]
+
+
+def available_codecs():
+    for name in sorted(CODECS):
+        try:
+            yield get_codec(name)
+        except ImportError:
+            print("skipping codec {0}: not installed".format(name))
+
+
+def run(suite, args):
+    sizes = SIZES[:1] if args.quick else SIZES
+
+    for codec in available_codecs():
+        for size in sizes:
+            data = make_data(size)
+            encoded = codec.dumps(data)
+
+            suite.add("dumps", lambda: codec.dumps(data),
+                      codec=codec.name, size=size)
+            suite.add("loads", lambda: codec.loads(encoded),
+                      codec=codec.name, size=size)
+            suite.record("payload", dict(codec=codec.name, size=size),
+                         bytes=len(encoded))
+
+
+if __name__ == "__main__":
+    main(run, "codec")
@@ -0,0 +1,46 @@
+"""
+Parse and render of the default document types, with and without
+validators.
+
+    python -m benchmarks.bench_documents [--output results.json]
+"""
+from benchmarks.documents import ItemList
+from benchmarks.documents import make_items
+from benchmarks.harness import main
+
+from mimeprovider import MimeProvider
+
+SIZES = [10, 1000, 10000]
+
+
+def run(suite, args):
+    sizes = SIZES[:1] if args.quick else SIZES
+    provider = MimeProvider([ItemList])
+
+    json_type, _, validator = provider.mimetypes["application/itemlist+json"]
+    html_type, _, _ = provider.mimetypes["text/html"]
+    text_type, _, _ = provider.mimetypes["text/plain"]
+
+    for size in sizes:
+        obj = make_items(size)
+        body = json_type.render(None, obj)
+
+        for validated in (False, True):
+            v = validator if validated else None
+
+            suite.add("json.render", lambda: json_type.render(v, obj),
+                      size=size, validated=validated)
+            suite.add("json.render_stream",
+                      lambda: list(json_type.render_stream(v, obj)),
+                      size=size, validated=validated)
+            suite.add("json.parse",
+                      lambda: json_type.parse(v, ItemList, body),
+                      size=size, validated=validated)
+            suite.add("html.render", lambda: html_type.render(v, obj),
+                      size=size, validated=validated)
+            suite.add("text.render", lambda: text_type.render(v, obj),
+                      size=size, validated=validated)
+
+
+if __name__ == "__main__":
+    main(run, "documents")
@@ -0,0 +1,47 @@
+"""
+Compare HtmlDocumentType.render against the previous mXml tree based
+renderer.
+
+    python -m benchmarks.bench_html [--output results.json]
+"""
+from benchmarks.harness import main
+from benchmarks.legacy_html import legacy_render
+
+from mimeprovider.documenttype.html import HtmlDocumentType
+
+SIZES = [10, 1000, 10000]
+
+
+class Document(object):
+    object_type = "document"
+
+    def __init__(self, size):
+        self.data = [
+            {
+                "string": "item <{0}>".format(i),
+                "integer": i,
+                "somelist": [i, [i + 1, {"$ref": "/items/{0}".format(i)}]],
+            }
+            for i in range(size)
+        ]
+
+    def to_data(self):
+        return self.data
+
+
+def run(suite, args):
+    sizes = SIZES[:1] if args.quick else SIZES
+    document_type = HtmlDocumentType()
+
+    for size in sizes:
+        obj = Document(size)
+
+        assert legacy_render(obj) == document_type.render(None, obj)
+
+        suite.add("legacy", lambda: legacy_render(obj), size=size)
+        suite.add("render", lambda: document_type.render(None, obj),
+                  size=size)
+
+
+if __name__ == "__main__":
+    main(run, "html")
@@ -0,0 +1,37 @@
+"""
+Time importing mimeprovider and setting up a provider in a fresh
+interpreter, and count the modules that get loaded.
+
+    python -m benchmarks.bench_import [--output results.json]
+
+The 'interpreter' case is the startup time of an empty interpreter, to
+subtract from the others.
+"""
+import subprocess
+import sys
+
+from benchmarks.harness import main
+
+SCRIPTS = [
+    ("interpreter", "pass"),
+    ("import", "import mimeprovider"),
+    ("provider", "import mimeprovider; mimeprovider.MimeProvider([])"),
+]
+
+COUNT = "; import sys; sys.stdout.write(str(len(sys.modules)))"
+
+
+def run(suite, args):
+    for name, script in SCRIPTS:
+        command = [sys.executable, "-c", script]
+
+        suite.add("startup", lambda: subprocess.check_call(command),
+                  script=name)
+
+        modules = subprocess.check_output([sys.executable, "-c",
+                                           script + COUNT])
+        suite.record("modules", dict(script=name), count=int(modules))
+
+
+if __name__ == "__main__":
+    main(run, "import")
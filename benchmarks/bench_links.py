@@ -0,0 +1,48 @@
+"""
+Generate $ref links with request.route_path, request.json_ref and
+request.json_ref.many.
+
+    python -m benchmarks.bench_links [--output results.json]
+"""
+from pyramid import testing
+from pyramid.request import Request
+
+from benchmarks.harness import main
+
+from mimeprovider.links import JsonRef
+
+SIZES = [10, 10000]
+
+
+def run(suite, args):
+    sizes = SIZES[:1] if args.quick else SIZES
+
+    config = testing.setUp()
+    config.add_route("item", "/items/{id}/{name}")
+
+    request = Request.blank("/")
+    request.registry = config.registry
+    json_ref = JsonRef(request)
+
+    try:
+        for size in sizes:
+            items = [{"id": i, "name": u"item {0}".format(i)}
+                     for i in range(size)]
+            params = dict(size=size)
+
+            suite.add("route_path",
+                      lambda: [{"$ref": request.route_path("item", **kw),
+                                "rel": "item"} for kw in items],
+                      **params)
+            suite.add("json_ref",
+                      lambda: [json_ref("item", **kw) for kw in items],
+                      **params)
+            suite.add("json_ref_many",
+                      lambda: json_ref.many("item", items),
+                      **params)
+    finally:
+        testing.tearDown()
+
+
+if __name__ == "__main__":
+    main(run, "links")
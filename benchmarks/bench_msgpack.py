@@ -0,0 +1,60 @@
+"""
+Compare payload size and encode/decode time of the msgpack document type
+against JSON, for record lists and numeric arrays.
+
+    python -m benchmarks.bench_msgpack [--output results.json]
+"""
+from benchmarks.harness import main
+
+from mimeprovider.documenttype.json import JsonDocumentType
+from mimeprovider.documenttype.msgpack import MsgpackDocumentType
+
+SIZES = [10, 1000, 50000]
+
+
+def make_records(size):
+    return [
+        {
+            "string": u"item number {0}".format(i),
+            "integer": i,
+            "number": i / 3.0,
+            "flag": i % 2 == 0,
+            "somelist": [i, i + 1, i + 2],
+        }
+        for i in range(size)
+    ]
+
+
+def make_numbers(size):
+    return [i * 7 for i in range(size)]
+
+
+DATASETS = [
+    ("records", make_records),
+    ("numbers", make_numbers),
+]
+
+
+def run(suite, args):
+    sizes = SIZES[:1] if args.quick else SIZES
+    types = [("json", JsonDocumentType()), ("msgpack", MsgpackDocumentType())]
+
+    for dataset, make_data in DATASETS:
+        for size in sizes:
+            data = make_data(size)
+
+            for name, document_type in types:
+                body = document_type.serialize(None, data)
+                params = dict(type=name, data=dataset, size=size)
+
+                suite.add("serialize",
+                          lambda: document_type.serialize(None, data),
+                          **params)
+                suite.add("deserialize",
+                          lambda: document_type.deserialize(body),
+                          **params)
+                suite.record("payload", params, bytes=len(body))
+
+
+if __name__ == "__main__":
+    main(run, "msgpack")
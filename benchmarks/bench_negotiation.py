@@ -0,0 +1,48 @@
+"""
+Accept negotiation against registries of different sizes.
+
+    python -m benchmarks.bench_negotiation [--output results.json]
+"""
+import warnings
+
+from webob.acceptparse import create_accept_header
+
+from benchmarks.documents import make_documents
+from benchmarks.harness import main
+
+from mimeprovider import MimeProvider
+from mimeprovider.negotiation import NegotiationIndex
+
+REGISTRY_SIZES = [10, 100, 1000]
+
+HEADERS = [
+    "application/document0+json",
+    "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "application/*;q=0.5, text/plain",
+    "image/png",
+]
+
+
+def run(suite, args):
+    sizes = REGISTRY_SIZES[:1] if args.quick else REGISTRY_SIZES
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    for size in sizes:
+        provider = MimeProvider(list(make_documents(size)))
+        mimetypes = provider.mimetypes
+        index = NegotiationIndex(mimetypes)
+        negotiator = provider.negotiator
+
+        for header in HEADERS:
+            accept = create_accept_header(header)
+
+            suite.add("webob", lambda: accept.best_match(mimetypes),
+                      registry=size, accept=header)
+            suite.add("index", lambda: index.best_match(header),
+                      registry=size, accept=header)
+            suite.add("cached", lambda: negotiator.negotiate(header),
+                      registry=size, accept=header)
+
+
+if __name__ == "__main__":
+    main(run, "negotiation")
@@ -0,0 +1,25 @@
+"""
+MimeProvider construction and registration at scale.
+
+    python -m benchmarks.bench_register [--output results.json]
+"""
+from benchmarks.documents import make_documents
+from benchmarks.harness import main
+
+from mimeprovider import MimeProvider
+
+REGISTRY_SIZES = [10, 100, 1000]
+
+
+def run(suite, args):
+    sizes = REGISTRY_SIZES[:1] if args.quick else REGISTRY_SIZES
+
+    for size in sizes:
+        documents = list(make_documents(size))
+
+        suite.add("register", lambda: MimeProvider(documents),
+                  registry=size)
+
+
+if __name__ == "__main__":
+    main(run, "register")
@@ -0,0 +1,69 @@
+"""
+End-to-end round-trip of RequestsClient against the example application
+served from a local WSGI server.
+
+    python -m benchmarks.bench_roundtrip [--output results.json]
+"""
+import os
+import sys
+import threading
+
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIRequestHandler
+
+from benchmarks.harness import main
+
+from mimeprovider import MimeProvider
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), os.pardir, "examples")
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(app):
+    """
+    Serve app from a background thread on a free local port.
+    """
+    server = make_server("127.0.0.1", 0, app, handler_class=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def run(suite, args):
+    sys.path.insert(0, os.path.abspath(EXAMPLES))
+    import small_application as example
+
+    server = serve(example.make_app())
+
+    try:
+        provider = MimeProvider(example.document_types)
+        client = provider.get_client(
+            "http://127.0.0.1:{0}".format(server.server_port))
+
+        body = example.SomeData(string="Hello", integer=42,
+                                somelist=[1, 2, 3])
+
+        expect = [example.SomeData]
+        headers = {"Accept": "application/somedata+json"}
+
+        def get():
+            client.get("/example/foo", headers=dict(headers), expect=expect)
+
+        def post():
+            client.post("/example/foo", headers=dict(headers),
+                        mime_body=body, expect=expect)
+
+        suite.add("get", get)
+        suite.add("post", post)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main(run, "roundtrip")
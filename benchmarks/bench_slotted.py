@@ -0,0 +1,79 @@
+"""
+Compare generated slotted documents against the hand-written BaseObject
+documents: memory per object, to_data, from_data and rendering.
+
+    python -m benchmarks.bench_slotted [--output results.json]
+"""
+import sys
+
+from benchmarks.documents import ITEM_SCHEMA
+from benchmarks.documents import Item
+from benchmarks.harness import main
+
+from mimeprovider.document import make_document
+from mimeprovider.documenttype.json import JsonDocumentType
+
+SIZES = [10, 10000]
+
+SlottedItem = make_document("SlottedItem", "item", ITEM_SCHEMA)
+
+CLASSES = [
+    ("handwritten", Item),
+    ("slotted", SlottedItem),
+]
+
+
+def make_data(size):
+    return [
+        {
+            "string": u"item number {0}".format(i),
+            "integer": i,
+            "somelist": [i, i + 1, i + 2],
+        }
+        for i in range(size)
+    ]
+
+
+def object_size(obj):
+    """
+    Size of an object and its attribute storage, excluding the values.
+    """
+    size = sys.getsizeof(obj)
+
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+
+    for name in ("__keys__",):
+        if hasattr(obj, name):
+            size += sys.getsizeof(getattr(obj, name))
+
+    return size
+
+
+def run(suite, args):
+    sizes = SIZES[:1] if args.quick else SIZES
+    json_type = JsonDocumentType()
+
+    for size in sizes:
+        data = make_data(size)
+
+        for name, cls in CLASSES:
+            objects = [cls.from_data(item) for item in data]
+            params = dict(cls=name, size=size)
+
+            suite.add("from_data",
+                      lambda: [cls.from_data(item) for item in data],
+                      **params)
+            suite.add("to_data",
+                      lambda: [obj.to_data() for obj in objects],
+                      **params)
+            suite.add("render",
+                      lambda: [json_type.render(None, obj)
+                               for obj in objects],
+                      **params)
+            suite.record("memory", params, bytes_per_object=sum(
+                object_size(obj) for obj in objects) / len(objects))
+
+
+if __name__ == "__main__":
+    main(run, "slotted")
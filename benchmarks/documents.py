@@ -0,0 +1,67 @@
+"""
+Document classes and data shared by the benchmarks, modelled after
+examples/small_application.py.
+"""
+
+
+class BaseObject(object):
+    def __init__(self, **kw):
+        for key, value in kw.items():
+            setattr(self, key, value)
+        self.__keys__ = kw.keys()
+
+    def to_data(self):
+        return dict((k, getattr(self, k, None)) for k in self.__keys__)
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(**data)
+
+
+ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "string": {"type": "string", "required": True},
+        "integer": {"type": "number", "required": True},
+        "somelist": {"type": "array", "required": True},
+    }
+}
+
+
+class Item(BaseObject):
+    schema = ITEM_SCHEMA
+    object_type = "item"
+
+
+class ItemList(object):
+    schema = {"type": "array", "items": ITEM_SCHEMA}
+    object_type = "itemlist"
+
+    def __init__(self, items):
+        self.items = items
+
+    def to_data(self):
+        return [item.to_data() for item in self.items]
+
+    @classmethod
+    def from_data(cls, data):
+        return cls([Item.from_data(item) for item in data])
+
+
+def make_items(size):
+    return ItemList([
+        Item(string=u"item number {0}".format(i), integer=i,
+             somelist=[i, i + 1, i + 2])
+        for i in range(size)
+    ])
+
+
+def make_documents(count):
+    """
+    Generate count distinct document classes with schemas.
+    """
+    for i in range(count):
+        yield type("Document{0}".format(i), (BaseObject,), {
+            "object_type": "document{0}".format(i),
+            "schema": dict(ITEM_SCHEMA, title="document {0}".format(i)),
+        })
@@ -0,0 +1,115 @@
+"""
+Minimal benchmark harness shared by the benchmark scripts.
+
+Every case reports the best time per call out of a number of repeats.
+Results can be written as JSON so that runs can be compared.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+# minimum total time of a single repeat.
+MIN_TIME = 0.05
+
+
+def measure(func, repeat=5):
+    """
+    Time func, calibrating the number of calls per repeat so that a repeat
+    takes at least MIN_TIME seconds.  The calibration runs warm up func and
+    are not part of the timings.
+    """
+    number = 1
+
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+
+        if elapsed >= MIN_TIME:
+            break
+
+        number *= 2
+
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+
+    return {
+        "best": min(timings) / number,
+        "mean": sum(timings) / len(timings) / number,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+class Suite(object):
+    def __init__(self, name, repeat=5):
+        self.name = name
+        self.repeat = repeat
+        self.results = list()
+
+    def add(self, case, func, **params):
+        """
+        Time a case and record the result under the given parameters.
+        """
+        result = measure(func, self.repeat)
+        self.record(case, params, **result)
+        return result
+
+    def record(self, case, params, **values):
+        entry = dict(case=case, params=params)
+        entry.update(values)
+        self.results.append(entry)
+
+    def report(self, out=sys.stdout):
+        for entry in self.results:
+            params = ", ".join(
+                "{0}={1}".format(k, v) for k, v in sorted(
+                    entry["params"].items()))
+
+            values = ", ".join(
+                "{0}={1}".format(k, _format(entry[k])) for k in sorted(entry)
+                if k not in ("case", "params", "number", "repeat"))
+
+            print("{0}.{1} [{2}] {3}".format(
+                self.name, entry["case"], params, values), file=out)
+
+    def to_data(self):
+        return {
+            "suite": self.name,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": self.results,
+        }
+
+
+def _format(value):
+    if isinstance(value, float):
+        return "{0:.3g}".format(value)
+    return str(value)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="write results as JSON to file")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true",
+                        help="only run the smallest sizes")
+    return parser.parse_args(argv)
+
+
+def main(run, name, argv=None):
+    """
+    Entry point for the benchmark scripts, run is called with the suite and
+    the parsed arguments.
+    """
+    args = parse_args(argv)
+    suite = Suite(name, args.repeat)
+    run(suite, args)
+    suite.report()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(suite.to_data(), f, indent=2, sort_keys=True)
+
+    return suite
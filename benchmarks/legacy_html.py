@@ -0,0 +1,78 @@
+"""
+The mXml tree based HTML renderer that HtmlDocumentType replaced, kept as
+the reference for test/test_html.py and benchmarks/bench_html.py.
+"""
+import xml.sax.saxutils as s
+
+from mimeprovider.packages.mxml import mXml
+from mimeprovider.packages.mxml import STRING
+from mimeprovider.packages.mxml import open_tag
+from mimeprovider.packages.mxml import close_tag
+
+
+def legacy_build_string(item):
+    yield open_tag(item)
+
+    for child_type, child in item.children:
+        if child_type == STRING:
+            yield s.escape(child)
+            continue
+
+        yield "".join(legacy_build_string(child))
+
+    yield close_tag(item)
+
+
+def legacy_build_data(first_element, first_data):
+    queue = list([(first_element, first_data)])
+
+    while len(queue) > 0:
+        element, data = queue.pop()
+
+        if isinstance(data, list):
+            table = element.add("table", cellspacing="2", cellpadding="2")
+
+            for i, item in enumerate(data):
+                tr = table.add("tr")
+                sequence = tr.add("th", valign="top", align='left',
+                                  style='background-color: #ff8888;')
+                sequence.adds(i)
+                value = tr.add("td", align="left")
+                queue.insert(0, (value, item))
+
+            continue
+
+        if isinstance(data, dict):
+            ref = data.get("$ref")
+
+            if ref is not None:
+                rel = data.get("rel", ref)
+                link = element.add("a", href=ref)
+                link.adds(rel)
+                continue
+
+            table = element.add("table", cellspacing="2", cellpadding="2")
+
+            for k, v in sorted(data.items()):
+                tr = table.add("tr")
+                title = tr.add("th", valign="top", align="left")
+                title.adds("{0}:".format(k))
+                value = tr.add("td", align="left")
+                queue.insert(0, (value, v))
+
+            continue
+
+        element.adds(u'{0!s}'.format(data))
+
+
+def legacy_render(obj):
+    data = obj.to_data()
+    html = mXml("html")
+    head = html.add("head")
+    title = head.add("title")
+    body = html.add("body")
+    title.adds("Data")
+    heading = body.add("h1")
+    heading.adds("{0} ({1})".format(obj.object_type, type(obj).__name__))
+    legacy_build_data(body, data)
+    return "".join(legacy_build_string(html))
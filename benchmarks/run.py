@@ -0,0 +1,117 @@
+"""
+Run the benchmark suite and optionally compare against a stored baseline.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --threshold 0.2
+
+Results are written as JSON, one entry per suite.  When comparing, every
+case that got slower than the threshold is reported and the exit status
+is non-zero.
+"""
+from __future__ import print_function
+
+import argparse
+import importlib
+import json
+import sys
+
+from benchmarks.harness import Suite
+
+SUITES = [
+    "import",
+    "negotiation",
+    "register",
+    "documents",
+    "codec",
+    "msgpack",
+    "slotted",
+    "links",
+    "html",
+    "roundtrip",
+]
+
+
+def case_key(suite, entry):
+    params = json.dumps(entry["params"], sort_keys=True)
+    return (suite, entry["case"], params)
+
+
+def compare(results, baseline):
+    """
+    Compare the best timings of two runs, returns a list of
+    (key, baseline, current, ratio) for every case present in both.
+    """
+    previous = dict()
+
+    for suite in baseline:
+        for entry in suite["results"]:
+            if "best" in entry:
+                previous[case_key(suite["suite"], entry)] = entry["best"]
+
+    comparison = list()
+
+    for suite in results:
+        for entry in suite["results"]:
+            key = case_key(suite["suite"], entry)
+
+            if "best" not in entry or key not in previous:
+                continue
+
+            ratio = entry["best"] / previous[key]
+            comparison.append((key, previous[key], entry["best"], ratio))
+
+    return comparison
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("suites", nargs="*", default=SUITES)
+    parser.add_argument("--output", help="write results as JSON to file")
+    parser.add_argument("--baseline", help="compare against results file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown before reporting a regression")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true",
+                        help="only run the smallest sizes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = list()
+
+    for name in args.suites:
+        module = importlib.import_module("benchmarks.bench_" + name)
+        suite = Suite(name, args.repeat)
+        module.run(suite, args)
+        suite.report()
+        results.append(suite.to_data())
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = 0
+
+    for (suite, case, params), before, after, ratio in compare(results,
+                                                               baseline):
+        marker = ""
+
+        if ratio > 1 + args.threshold:
+            marker = " REGRESSION"
+            regressions += 1
+
+        print("{0}.{1} {2}: {3:.3g} -> {4:.3g} ({5:+.1%}){6}".format(
+            suite, case, params, before, after, ratio - 1, marker))
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
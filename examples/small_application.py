@@ -1,6 +1,8 @@
 import sys
 import logging
 
+log = logging.getLogger(__name__)
+
 from pyramid.httpexceptions import HTTPError
 
 from mimeprovider import MimeProvider
@@ -59,10 +61,10 @@ class Error(BaseObject):
 def example_endpoint(request):
     if request.mime_body:
         body = request.mime_body
-        print "== got a request body =="
-        print "string:", body.string
-        print "integer:", body.integer
-        print "somelist:", body.somelist
+        log.info("== got a request body ==")
+        log.info("string: %s", body.string)
+        log.info("integer: %s", body.integer)
+        log.info("somelist: %s", body.somelist)
 
     return SomeData(string="Hello World", integer=12, somelist=["Foo", "Bar"])
 
@@ -92,9 +94,12 @@ document_types = [
     SomeData
 ]
 
-if __name__ == '__main__':
-    logging.basicConfig(level=logging.INFO)
 
+def make_app(**kw):
+    """
+    Build the example application, keyword arguments are passed on to the
+    MimeProvider.
+    """
     config = Configurator()
     config.add_route('example', '/example/{name}')
 
@@ -104,9 +109,16 @@ if __name__ == '__main__':
     config.add_view(http_errors, context=HTTPError, renderer='mime')
     config.add_view(other_exceptions, context=Exception, renderer='mime')
 
-    provider = MimeProvider(document_types, error_handler=mime_error_handler)
+    provider = MimeProvider(document_types, error_handler=mime_error_handler,
+                            **kw)
     config.include(provider.add_config)
 
-    app = config.make_wsgi_app()
+    return config.make_wsgi_app()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    app = make_app()
     server = make_server('0.0.0.0', 8080, app)
     server.serve_forever()
@@ -1,39 +1,62 @@
+import functools
+import itertools
 import logging
 
 from mimeprovider.documenttype import get_default_document_types
 from mimeprovider.client import get_default_client
+from mimeprovider.client import get_default_async_client
 
 from mimeprovider.exceptions import MimeException
 from mimeprovider.exceptions import MimeBadRequest
-
+from mimeprovider.exceptions import MimeRequestEntityTooLarge
+
+from mimeprovider.cache import CacheBackend
+from mimeprovider.cache import RenderCache
+from mimeprovider.encoding import DEFAULT_LEVEL
+from mimeprovider.encoding import DEFAULT_THRESHOLD
+from mimeprovider.encoding import decompress_stream
+from mimeprovider.encoding import is_supported
+from mimeprovider.fields import FIELDS_PARAM
+from mimeprovider.fields import Projector
+from mimeprovider.instrumentation import NOOP
+from mimeprovider.instrumentation import clock
+from mimeprovider.mergepatch import MergePatch
 from mimeprovider.mimerenderer import MimeRenderer
-from mimeprovider.validators import get_default_validator
+from mimeprovider.negotiation import DEFAULT_CACHE_SIZE
+from mimeprovider.registry import Registry
+from mimeprovider.registry import SnapshotView
+from mimeprovider.validation import ALWAYS
+from mimeprovider.validation import DEFAULT_SAMPLE_RATE
+from mimeprovider.validation import get_policy
+from mimeprovider.validators import LazyValidator
+from mimeprovider.validators import ValidatorCache
 
 __all__ = ["MimeProvider"]
 __version__ = "0.1.5"
 
 log = logging.getLogger(__name__)
 
+# size of the reads from the request body.
+READ_SIZE = 64 * 1024
 
-def build_json_ref(request):
-    def json_ref(route, document=None, **kw):
-        ref = dict()
-
-        ref["$ref"] = request.route_path(route, **kw)
 
-        rel_default = None
+def build_json_ref(request):
+    # links imports pyramid, which is only needed once there is a request.
+    from mimeprovider.links import JsonRef
+    return JsonRef(request)
 
-        if document:
-            rel_default = getattr(document, "object_type",
-                                  document.__class__.__name__)
-        else:
-            rel_default = route
 
-        ref["rel"] = kw.pop("rel_", rel_default)
+def _non_empty(chunks):
+    """
+    Return the chunks, or None if they are all empty.
+    """
+    chunks = iter(chunks)
 
-        return ref
+    for chunk in chunks:
+        if chunk:
+            return itertools.chain([chunk], chunks)
 
-    return json_ref
+    return None
 
 
 class MimeProvider(object):
@@ -42,11 +65,34 @@ class MimeProvider(object):
         self.attribute_name = kw.get("attribute_name", "mime_body")
         self.error_handler = kw.get("error_handler", None)
         self.set_default_renderer = kw.get("set_default_renderer", False)
-
+        self.stream = kw.get("stream", False)
+        self.max_body_size = kw.get("max_body_size", None)
+        self.compress = kw.get("compress", False)
+        self.compress_threshold = kw.get("compress_threshold",
+                                         DEFAULT_THRESHOLD)
+        self.compress_level = kw.get("compress_level", DEFAULT_LEVEL)
+
+        self.instrumentation = kw.get("instrumentation", NOOP)
+        self.profiler = kw.get("profiler")
+        self.fields_param = kw.get("fields_param", FIELDS_PARAM)
+        # a RenderCache, or a backend for one, like the shared cache.
+        self.render_cache = kw.get("render_cache")
+
+        if isinstance(self.render_cache, CacheBackend):
+            self.render_cache = RenderCache(backend=self.render_cache)
+        elif self.render_cache is None and kw.get("render_cache_size"):
+            self.render_cache = RenderCache(kw["render_cache_size"])
+
+        # validators are compiled on first use, the default validator is
+        # used if this is None.
         self.validator = kw.get("validator")
+        self.validators = ValidatorCache(
+            functools.partial(LazyValidator, self.validator))
+        self.projector = Projector(self.validators)
 
-        if self.validator is None:
-            self.validator = get_default_validator()
+        self.validation_policy = get_policy(
+            kw.get("validation_policy", ALWAYS),
+            kw.get("validation_sample_rate", DEFAULT_SAMPLE_RATE))
 
         types = kw.get("types")
 
@@ -56,14 +102,14 @@ class MimeProvider(object):
         if not types:
             raise ValueError("No document types specified")
 
+        # the default client is imported on first use.
         self.client = kw.get("client")
 
-        if self.client is None:
-            self.client = get_default_client()
-
-        self.type_instances = [t() for t in types]
-        self.mimeobjects = dict()
-        self.mimetypes = dict(self._generate_base_mimetypes())
+        self.type_options = dict(codec=kw.get("codec"))
+        self.type_instances = [self._create_type(t) for t in types]
+        self.registry = Registry(
+            self._generate_base_mimetypes(),
+            kw.get("negotiation_cache_size", DEFAULT_CACHE_SIZE))
 
         self.error_document_type = kw.get(
             "error_document_type",
@@ -71,6 +117,11 @@ class MimeProvider(object):
 
         self.register(*documents)
 
+    def _create_type(self, t):
+        options = getattr(t, "options", ())
+        return t(**dict((k, v) for k, v in self.type_options.items()
+                        if k in options))
+
     def _validate(self, document):
         if not hasattr(document, "object_type"):
             raise ValueError(
@@ -89,6 +140,10 @@ class MimeProvider(object):
             yield t.mime, (t, None, None)
 
     def _generate_document_mimetypes(self, documents):
+        """
+        Generate the mimetypes for every custom document type and document,
+        validators are compiled once per distinct schema.
+        """
         for t in self.type_instances:
             if not t.custom_mime:
                 continue
@@ -99,43 +154,78 @@ class MimeProvider(object):
                 validator = None
 
                 if hasattr(o, "schema"):
-                    validator = self.validator(o.schema)
+                    validator = self.validators.get(o.schema)
 
                 m_value = (mimetype, (t, o, validator))
                 o_value = (o, (t, mimetype, validator))
 
                 yield m_value, o_value
 
+    @property
+    def mimetypes(self):
+        return self.registry.snapshot.mimetypes
+
+    @property
+    def mimeobjects(self):
+        return self.registry.snapshot.mimeobjects
+
+    @property
+    def negotiator(self):
+        return self.registry
+
     def register(self, *documents):
+        """
+        Register documents, publishing a new registry snapshot.
+        """
         documents = list(documents)
 
         for document in documents:
             self._validate(document)
 
-        generator = self._generate_document_mimetypes(documents)
+        self.registry.register(self._generate_document_mimetypes(documents))
+
+    def get_client(self, *args, **kw):
+        if self.client is None:
+            self.client = get_default_client()
+
+        return self.client(SnapshotView(self.registry, "mimetypes"),
+                           SnapshotView(self.registry, "mimeobjects"),
+                           *args, **kw)
 
-        for (m, m_value), (o, o_value) in generator:
-            self.mimeobjects.setdefault(o, []).append(o_value)
+    def get_async_client(self, *args, **kw):
+        client = get_default_async_client()
+        return client(SnapshotView(self.registry, "mimetypes"),
+                      SnapshotView(self.registry, "mimeobjects"),
+                      *args, **kw)
 
-            if m not in self.mimetypes:
-                self.mimetypes[m] = m_value
-                continue
+    def _read_body(self, request):
+        """
+        Read the request body in chunks, enforcing max_body_size also for
+        bodies without a Content-Length.
+        """
+        body_file = request.body_file
+        size = 0
 
-            _, cls, validator = self.mimetypes[m]
-            _, new_cls, validator = m_value
+        while True:
+            chunk = body_file.read(READ_SIZE)
 
-            raise ValueError(
-                "Conflicting handler for {0}, {1} and {2}".format(
-                    m, cls, new_cls))
+            if not chunk:
+                break
 
-    def get_client(self, *args, **kw):
-        return self.client(self.mimetypes, self.mimeobjects, *args, **kw)
+            size += len(chunk)
+
+            if self.max_body_size is not None and size > self.max_body_size:
+                raise MimeRequestEntityTooLarge(
+                    "Request body larger than {0} bytes".format(
+                        self.max_body_size))
+
+            yield chunk
 
     def get_mime_body(self, request):
-        if not request.body or not request.content_type:
+        if not request.content_type or not request.is_body_readable:
             return None
 
-        result = self.mimetypes.get(request.content_type)
+        result = self.registry.lookup(request.content_type)
 
         if result is None:
             raise MimeBadRequest(
@@ -149,7 +239,94 @@ class MimeProvider(object):
                 "Unsupported Content-Type: " +
                 request.content_type)
 
-        return document_type.parse(validator, cls, request.body)
+        validator = self.validation_policy.inbound(validator, cls)
+
+        length = request.content_length
+
+        if (self.max_body_size is not None and length is not None and
+                length > self.max_body_size):
+            raise MimeRequestEntityTooLarge(
+                "Request body larger than {0} bytes".format(
+                    self.max_body_size))
+
+        chunks = self._read_body(request)
+        encoding = request.headers.get("Content-Encoding", "").strip().lower()
+
+        if encoding and encoding != "identity":
+            if not is_supported(encoding):
+                raise MimeBadRequest(
+                    "Unsupported Content-Encoding: " + encoding)
+
+            chunks = decompress_stream(chunks, encoding, self.max_body_size)
+
+        # an empty body is no document, whatever the Content-Type says.
+        chunks = _non_empty(chunks)
+
+        if chunks is None:
+            return None
+
+        instrumentation = self.instrumentation
+
+        # merge patches are validated against projections of the schema when
+        # they are applied.
+        if getattr(document_type, "merge_patch", False):
+            body = "".join(chunks)
+            projector = self.projector if validator is not None else None
+            return MergePatch(cls, document_type.deserialize(body), projector)
+
+        # streaming document types produce a lazy iterator of documents,
+        # which can only be consumed once.
+        if getattr(document_type, "streaming", False):
+            return document_type.parse_stream(validator, cls, chunks)
+
+        # the document can be built while the body is being decoded.
+        if hasattr(cls, "from_data_iter") and \
+                hasattr(document_type, "parse_stream"):
+            if not instrumentation.enabled:
+                return document_type.parse_stream(validator, cls, chunks)
+
+            start = clock()
+            obj = document_type.parse_stream(validator, cls, chunks)
+            instrumentation.record("parse", clock() - start,
+                                   document=cls.__name__,
+                                   mimetype=request.content_type)
+            return obj
+
+        if not instrumentation.enabled:
+            return document_type.parse(validator, cls, "".join(chunks))
+
+        return self._parse_instrumented(request, document_type, cls,
+                                        validator, chunks)
+
+    def _parse_instrumented(self, request, document_type, cls, validator,
+                            chunks):
+        instrumentation = self.instrumentation
+        labels = dict(document=cls.__name__, mimetype=request.content_type)
+
+        start = clock()
+        body = "".join(chunks)
+        instrumentation.record("read", clock() - start, size=len(body),
+                               **labels)
+
+        if not hasattr(document_type, "deserialize"):
+            start = clock()
+            obj = document_type.parse(validator, cls, body)
+            instrumentation.record("parse", clock() - start, **labels)
+            return obj
+
+        start = clock()
+        data = document_type.deserialize(body)
+        instrumentation.record("decode", clock() - start, **labels)
+
+        if validator:
+            start = clock()
+            validator.validate(data)
+            instrumentation.record("validate", clock() - start, **labels)
+
+        start = clock()
+        obj = cls.from_data(data)
+        instrumentation.record("from_data", clock() - start, **labels)
+        return obj
 
     @property
     def renderer(self):
@@ -158,7 +335,17 @@ class MimeProvider(object):
 
         def setup_renderer(helper):
             return MimeRenderer(self.mimetypes, self.error_document_type,
-                                self.error_handler, validator=self.validator)
+                                self.error_handler, validator=self.validator,
+                                negotiator=self.registry,
+                                stream=self.stream,
+                                render_cache=self.render_cache,
+                                instrumentation=self.instrumentation,
+                                compress=self.compress,
+                                compress_threshold=self.compress_threshold,
+                                compress_level=self.compress_level,
+                                validation_policy=self.validation_policy,
+                                projector=self.projector,
+                                fields_param=self.fields_param)
 
         return setup_renderer
 
@@ -166,9 +353,20 @@ class MimeProvider(object):
         config.add_renderer(self.renderer_name, self.renderer)
         if self.set_default_renderer:
             config.add_renderer(None, self.renderer)
-        config.set_request_property(self.get_mime_body, self.attribute_name,
-                                    reify=True)
-        config.set_request_property(build_json_ref, "json_ref", reify=True)
+        config.add_request_method(self.get_mime_body, self.attribute_name,
+                                  reify=True)
+        config.add_request_method(build_json_ref, "json_ref", reify=True)
+
+        from mimeprovider.viewderiver import NegotiationDeriver
+
+        config.add_view_deriver(NegotiationDeriver(self),
+                                name="mime_negotiation")
+
+        if self.profiler is not None:
+            from mimeprovider.profiling import REGISTRY_KEY
+
+            setattr(config.registry, REGISTRY_KEY, self.profiler)
+            config.add_tween("mimeprovider.profiling.profiler_tween_factory")
 
         config.add_view(self.error_handler, context=MimeException,
                         renderer=self.renderer_name)
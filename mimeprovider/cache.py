@@ -0,0 +1,151 @@
+"""
+Small caching primitives shared by the renderer and the negotiator.
+"""
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+
+def document_name(cls):
+    """
+    The module and qualified name of a document class.
+    """
+    name = getattr(cls, "__qualname__", cls.__name__)
+    return "{0}.{1}".format(cls.__module__, name)
+
+
+class CacheBackend(object):
+    """
+    Interface of the storage behind a RenderCache.
+
+    Backends map keys to rendered bodies and decide themselves what to
+    evict, LRUCache keeps them in the process and
+    mimeprovider.sharedcache.SharedCache shares them between processes.
+    """
+
+    def get(self, key, default=None):
+        raise RuntimeError("get not implemented")
+
+    def set(self, key, body):
+        raise RuntimeError("set not implemented")
+
+    def clear(self):
+        raise RuntimeError("clear not implemented")
+
+    def stats(self):
+        """
+        A dict with at least 'size', 'max_size', 'hits', 'misses' and
+        'evictions'.
+        """
+        raise RuntimeError("stats not implemented")
+
+
+class LRUCache(CacheBackend):
+    """
+    A bounded, thread safe least-recently-used mapping.
+
+    Keeps counters for hits, misses and evictions so that callers can expose
+    them without wrapping every lookup.
+    """
+
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError("Cache size must be positive: {0!r}".format(size))
+
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "max_size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RenderCache(object):
+    """
+    Bounded cache of rendered bodies.
+
+    Entries are keyed by the negotiated mimetype, the document class and the
+    fingerprint that a document exposes through 'cache_key()', which has to
+    change whenever the rendered representation changes.  The class is part
+    of the key since mimetypes like text/html are shared by all documents.
+
+    Bodies are kept in an in-process LRUCache of the given size unless
+    another backend is given.
+    """
+
+    def __init__(self, size=None, backend=None):
+        if backend is None:
+            if size is None:
+                raise ValueError("Either a size or a backend is required")
+
+            backend = LRUCache(size)
+
+        self.cache = backend
+
+    def key(self, mimetype, obj):
+        return (mimetype, document_name(obj.__class__), obj.cache_key())
+
+    def etag(self, key):
+        """
+        Strong entity tag for a key, which includes the document class,
+        computed without rendering the document.
+        """
+        return hashlib.sha1(repr(key)).hexdigest()
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, body):
+        self.cache.set(key, body)
+
+    def stats(self):
+        stats = self.cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+
+        if lookups:
+            stats["hit_rate"] = float(stats["hits"]) / lookups
+        else:
+            stats["hit_rate"] = 0.0
+
+        return stats
@@ -1,3 +1,25 @@
+import sys
+import logging
+
+from mimeprovider.encoding import compress
+from mimeprovider.encoding import decompress_stream
+from mimeprovider.encoding import is_supported
+from mimeprovider.exceptions import MimeException
+from mimeprovider.exceptions import MimeValidationError
+from mimeprovider.mergepatch import SUFFIX
+from mimeprovider.mergepatch import MergePatch
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "Accept": "*/*"
+}
+
+
+class ClientException(Exception):
+    pass
+
+
 class Client(object):
     def get(self, uri, **kw):
         return self.request('GET', uri, **kw)
@@ -11,7 +33,203 @@ class Client(object):
     def put(self, uri, **kw):
         return self.request('PUT', uri, **kw)
 
+    def patch(self, uri, original=None, modified=None, document=None,
+              **kw):
+        """
+        PATCH uri, with a merge patch of the changes from original to
+        modified if given, both documents or to_data() snapshots.  Patches
+        between two snapshots need the document class.
+        """
+        if modified is not None:
+            kw["mime_body"] = MergePatch.diff(original, modified, document)
+
+        return self.request('PATCH', uri, **kw)
+
+    def _render_body(self, mime_body, content_type=None):
+        """
+        Render a mime body, returns the data and its mimetype.
+
+        The first document type registered for the object is used, unless a
+        specific content_type is requested.
+        """
+        if isinstance(mime_body, MergePatch):
+            return self._render_patch(mime_body, content_type)
+
+        mimevalues = self.mimeobjects.get(mime_body.__class__)
+
+        if not mimevalues:
+            raise ClientException(
+                ("Cannot handle object of type "
+                 "{0!r}").format(mime_body.__class__))
+
+        if content_type is not None:
+            mimevalues = [m for m in mimevalues if m[1] == content_type]
+
+            if not mimevalues:
+                raise ClientException(
+                    "Cannot render object of type {0!r} as {1}".format(
+                        mime_body.__class__, content_type))
+
+        mapping = mimevalues[0]
+
+        document_type, mimetype, validator = mapping
+
+        return document_type.render(validator, mime_body), mimetype
+
+    def _render_patch(self, patch, content_type=None):
+        """
+        Render a merge patch with the merge patch type of its document.
+        """
+        mimevalues = [m for m in self.mimeobjects.get(patch.cls) or ()
+                      if m[1].endswith(SUFFIX)]
+
+        if content_type is not None:
+            mimevalues = [m for m in mimevalues if m[1] == content_type]
+
+        if not mimevalues:
+            raise ClientException(
+                "Cannot render merge patch of type {0!r}".format(patch.cls))
+
+        document_type, mimetype, _ = mimevalues[0]
+
+        return document_type.serialize(patch, patch.to_data()), mimetype
+
+    def _encode_body(self, data, encoding):
+        """
+        Compress a rendered body with the Content-Encoding encoding.
+        """
+        if not is_supported(encoding):
+            raise ClientException(
+                "Unsupported Content-Encoding: {0}".format(encoding))
+
+        if isinstance(data, unicode):
+            data = data.encode("utf-8")
+
+        return compress(data, encoding)
+
+    def _decode_content(self, encoding, content):
+        """
+        Decompress response content according to its Content-Encoding.
+        """
+        encoding = (encoding or "").strip().lower()
+
+        if not encoding or encoding == "identity":
+            return content
+
+        if not is_supported(encoding):
+            raise ClientException(
+                "Unsupported Content-Encoding: {0}".format(encoding))
+
+        try:
+            return b"".join(decompress_stream([content], encoding))
+        except MimeException as e:
+            raise ClientException(str(e))
+
+    def _response_handler(self, mimetype, expect, fields=None):
+        """
+        Look up the (document_type, document_class, validator) handling a
+        response mimetype, validating only fields if given.
+        """
+        handler = self._lookup(mimetype)
+
+        if handler is None:
+            raise ClientException(
+                "Cannot handle response type: {0}".format(mimetype))
+
+        document_type, document_class, validator = handler
+
+        if expect and document_class not in expect:
+            raise ClientException(
+                "Unexpected response type: {0}".format(mimetype))
+
+        if fields and validator is not None:
+            return self._project_handler(handler, fields)
+
+        return document_type, document_class, validator
+
+    def _parse(self, mimetype, handler, content):
+        document_type, document_class, validator = handler
+
+        try:
+            return document_type.parse(validator,
+                                       document_class,
+                                       content)
+        except MimeValidationError as e:
+            raise ClientException(
+                "Response format invalid: {0}".format(str(e)))
+        except:
+            log.error(
+                "Failed to parse content of type: {0}".format(mimetype),
+                exc_info=sys.exc_info())
+            raise ClientException(
+                "Failed to parse content of type: {0}".format(mimetype))
+
+    def _project_handler(self, handler, fields):
+        """
+        Validate responses to a request for fields against the projected
+        schema of the document.
+        """
+        from mimeprovider.fields import Projector
+
+        projector = getattr(self, "_projector", None)
+
+        if projector is None:
+            projector = self._projector = Projector()
+
+        document_type, document_class, _ = handler
+        validator = projector.validator(document_class, fields)
+        return document_type, document_class, validator
+
+    def _lookup(self, mimetype):
+        """
+        Look up the handler of a mimetype, normalizing it if the mimetypes
+        support it.
+        """
+        lookup = getattr(self.mimetypes, "lookup", None)
+
+        if lookup is not None:
+            return lookup(mimetype)
+
+        return self.mimetypes.get(mimetype)
+
+    def _streaming(self, mimetype):
+        """
+        Check if responses of mimetype can be parsed as a stream.
+        """
+        handler = self._lookup(mimetype)
+
+        if handler is None:
+            return False
+
+        return getattr(handler[0], "streaming", False)
+
+    def _parse_stream(self, mimetype, handler, chunks):
+        """
+        Lazily parse the documents of a streaming document type.
+        """
+        document_type, document_class, validator = handler
+
+        try:
+            for obj in document_type.parse_stream(validator,
+                                                  document_class,
+                                                  chunks):
+                yield obj
+        except MimeValidationError as e:
+            raise ClientException(
+                "Response format invalid: {0}".format(str(e)))
+        except:
+            log.error(
+                "Failed to parse content of type: {0}".format(mimetype),
+                exc_info=sys.exc_info())
+            raise ClientException(
+                "Failed to parse content of type: {0}".format(mimetype))
+
 
 def get_default_client():
     from mimeprovider.client.requests import RequestsClient
     return RequestsClient
+
+
+def get_default_async_client():
+    from mimeprovider.client.asyncio import AsyncioClient
+    return AsyncioClient
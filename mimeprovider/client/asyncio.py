@@ -0,0 +1,811 @@
+"""
+A mimeprovider client based on asyncio.
+
+Requests return futures, so the client can be used from coroutines through
+'await' (or 'yield From' with trollius) as well as through callbacks.  The
+client keeps its own pool of keep-alive HTTP/1.1 connections, which also
+bounds the number of concurrent requests.
+
+Connecting and reading time out, and idempotent requests that find their
+keep-alive connection closed by the server are sent again once on a new
+connection.  Cancelling the future of a request closes its connection.
+"""
+from __future__ import absolute_import
+
+import collections
+import functools
+import logging
+import re
+
+log = logging.getLogger(__name__)
+
+try:
+    import asyncio
+except ImportError:
+    import trollius as asyncio
+
+try:
+    from urllib.parse import quote
+    from urllib.parse import urlparse
+    from urllib.parse import urlencode
+except ImportError:
+    from urlparse import urlparse
+    from urllib import quote
+    from urllib import urlencode
+
+from mimeprovider.client import Client
+from mimeprovider.client import ClientException
+from mimeprovider.client import DEFAULT_HEADERS
+
+from mimeprovider.negotiation import parse_content_type
+
+# maximum number of open connections, and by that concurrent requests.
+DEFAULT_LIMIT = 10
+
+# responses larger than this are parsed in an executor.
+DEFAULT_PARSE_THRESHOLD = 64 * 1024
+
+# seconds to wait for a connection, None to wait forever.
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+# seconds to wait for the next part of a response, None to wait forever.
+DEFAULT_READ_TIMEOUT = 60.0
+
+NO_BODY_STATUS = frozenset([204, 304])
+
+# requests that can be sent again if their connection was closed.
+IDEMPOTENT_METHODS = frozenset([
+    "GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE",
+])
+
+
+# header names and methods, RFC 7230 3.2.6.
+_TOKEN = re.compile(r"^[!#$%&'*+\-.^_`|~0-9A-Za-z]+\Z")
+
+# characters that would end a header value.
+_INVALID_VALUE = re.compile(r"[\r\n\0]")
+
+# characters left alone when quoting request URIs, like requests does.
+_URI_SAFE = "!#$%&'()*+,/:;=?@[]~"
+
+
+def quote_uri(uri):
+    """
+    Quote the characters of uri that cannot appear in a request line,
+    leaving existing escapes alone.
+    """
+    if isinstance(uri, type(u"")):
+        uri = uri.encode("utf-8")
+
+    return quote(uri, safe=_URI_SAFE)
+
+
+class ConnectionClosed(ClientException):
+    """
+    The connection was closed before any part of the response arrived.
+    """
+
+
+def _copy(source, result):
+    """
+    Copy the outcome of the source future to result, unless result is
+    already done.
+    """
+    if result.done():
+        return
+
+    if source.cancelled():
+        result.cancel()
+    elif source.exception() is not None:
+        result.set_exception(source.exception())
+    else:
+        result.set_result(source.result())
+
+
+def _then(loop, future, callback):
+    """
+    Chain callback to the result of future, returns a future for the value
+    returned by callback, which might itself be a future.
+    """
+    result = asyncio.Future(loop=loop)
+    copy = functools.partial(_copy, result=result)
+
+    def done(source):
+        if result.cancelled():
+            return
+
+        if source.cancelled() or source.exception() is not None:
+            copy(source)
+            return
+
+        try:
+            value = callback(source.result())
+        except Exception as e:
+            result.set_exception(e)
+            return
+
+        if isinstance(value, asyncio.Future):
+            value.add_done_callback(copy)
+        else:
+            result.set_result(value)
+
+    future.add_done_callback(done)
+    return result
+
+
+class AsyncResponse(object):
+    """
+    A complete HTTP response.
+    """
+
+    def __init__(self, status_code, reason, headers, content):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+
+    def __repr__(self):
+        return "<AsyncResponse [{0}]>".format(self.status_code)
+
+
+class ResponseParser(object):
+    """
+    Incremental parser for a single HTTP/1.1 response.
+
+    Received data is buffered in a bytearray, of which everything before
+    pos has been parsed.  Bodies are moved to the body list as they
+    arrive, so the buffer only holds what is not parsed yet.
+    """
+
+    def __init__(self, method):
+        self.method = method
+        self.buf = bytearray()
+        self.pos = 0
+        self.state = "head"
+        self.status_code = None
+        self.reason = None
+        self.headers = dict()
+        self.body = list()
+        self.remaining = None
+        self.keep_alive = True
+
+    def feed(self, data):
+        """
+        Feed data, returns True once the response is complete.
+        """
+        if self.pos:
+            del self.buf[:self.pos]
+            self.pos = 0
+
+        self.buf.extend(data)
+
+        while True:
+            if self.state == "head":
+                if not self._parse_head():
+                    return False
+            elif self.state == "length":
+                if not self._parse_length():
+                    return False
+            elif self.state == "chunk-size":
+                if not self._parse_chunk_size():
+                    return False
+            elif self.state == "chunk":
+                if not self._parse_chunk():
+                    return False
+            elif self.state == "chunk-end":
+                if not self._parse_chunk_end():
+                    return False
+            elif self.state == "trailer":
+                if not self._parse_trailer():
+                    return False
+            elif self.state == "close":
+                self._take(len(self.buf) - self.pos)
+                return False
+            else:
+                return True
+
+    def eof(self):
+        """
+        The connection was closed, returns True if that completes the
+        response.
+        """
+        if self.state == "close":
+            self.state = "done"
+            self.keep_alive = False
+            return True
+
+        return self.state == "done"
+
+    def _take(self, size):
+        """
+        Move size bytes of the buffer to the body.
+        """
+        if size:
+            self.body.append(bytes(self.buf[self.pos:self.pos + size]))
+            self.pos += size
+
+    def _line(self):
+        index = self.buf.find(b"\r\n", self.pos)
+
+        if index < 0:
+            return None
+
+        line = bytes(self.buf[self.pos:index])
+        self.pos = index + 2
+        return line
+
+    def _add_header(self, key, value):
+        # repeated headers are combined into a single list, RFC 7230 3.2.2.
+        if key in self.headers:
+            value = self.headers[key] + ", " + value
+
+        self.headers[key] = value
+
+    def _parse_head(self):
+        index = self.buf.find(b"\r\n\r\n", self.pos)
+
+        if index < 0:
+            return False
+
+        head = bytes(self.buf[self.pos:index]).decode("iso-8859-1")
+        self.pos = index + 4
+
+        lines = head.split("\r\n")
+        version, status, reason = (lines[0].split(" ", 2) + [""])[:3]
+        self.status_code = int(status)
+        self.reason = reason
+
+        for line in lines[1:]:
+            key, _, value = line.partition(":")
+            self._add_header(key.strip().lower(), value.strip())
+
+        connection = self.headers.get("connection", "").lower()
+
+        if connection == "close" or \
+                (version == "HTTP/1.0" and connection != "keep-alive"):
+            self.keep_alive = False
+
+        if self.method == "HEAD" or self.status_code in NO_BODY_STATUS or \
+                100 <= self.status_code < 200:
+            self.state = "done"
+        elif "chunked" in self.headers.get("transfer-encoding", "").lower():
+            self.state = "chunk-size"
+        elif "content-length" in self.headers:
+            self.remaining = int(self.headers["content-length"])
+            self.state = "length"
+        else:
+            self.keep_alive = False
+            self.state = "close"
+
+        return True
+
+    def _parse_body(self):
+        """
+        Take what is available of the remaining body, returns True once all
+        of it was taken.
+        """
+        size = min(self.remaining, len(self.buf) - self.pos)
+        self._take(size)
+        self.remaining -= size
+        return self.remaining == 0
+
+    def _parse_length(self):
+        if not self._parse_body():
+            return False
+
+        self.state = "done"
+        return True
+
+    def _parse_chunk_size(self):
+        line = self._line()
+
+        if line is None:
+            return False
+
+        self.remaining = int(line.split(b";", 1)[0].strip(), 16)
+        self.state = "chunk" if self.remaining else "trailer"
+        return True
+
+    def _parse_chunk(self):
+        if not self._parse_body():
+            return False
+
+        self.state = "chunk-end"
+        return True
+
+    def _parse_chunk_end(self):
+        line = self._line()
+
+        if line is None:
+            return False
+
+        if line:
+            raise ValueError("Invalid chunked encoding")
+
+        self.state = "chunk-size"
+        return True
+
+    def _parse_trailer(self):
+        line = self._line()
+
+        if line is None:
+            return False
+
+        if not line:
+            self.state = "done"
+
+        return True
+
+    def response(self):
+        headers = dict((k.title(), v) for k, v in self.headers.items())
+        return AsyncResponse(self.status_code, self.reason, headers,
+                             b"".join(self.body))
+
+
+class HttpProtocol(asyncio.Protocol):
+    """
+    A connection that runs one request at a time.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.transport = None
+        self.parser = None
+        self.waiter = None
+        self.closed = False
+        self.requests = 0
+        self.received = False
+        self.timeout = None
+        self.timer = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        if self.parser is None:
+            return
+
+        self.received = True
+        self._schedule()
+
+        try:
+            complete = self.parser.feed(data)
+        except Exception as e:
+            self._fail(e)
+            return
+
+        if complete:
+            self._complete()
+
+    def connection_lost(self, exc):
+        self.closed = True
+
+        if self.parser is None:
+            return
+
+        if self.parser.eof():
+            self._complete()
+        elif not self.received:
+            self._fail(ConnectionClosed(
+                "Connection closed before response was received"))
+        else:
+            self._fail(ClientException(
+                "Connection closed before response was complete"))
+
+    def _schedule(self):
+        """
+        Restart the read timeout.
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if self.timeout is not None and self.parser is not None:
+            self.timer = self.loop.call_later(self.timeout, self._timed_out)
+
+    def _timed_out(self):
+        self.timer = None
+
+        if self.parser is not None:
+            self._fail(ClientException("Read timed out"))
+
+    def _complete(self):
+        parser, waiter = self.parser, self.waiter
+        self.parser = self.waiter = None
+        self._schedule()
+
+        if not waiter.done():
+            waiter.set_result((parser.response(), parser.keep_alive))
+
+    def _fail(self, exc):
+        waiter = self.waiter
+        self.parser = self.waiter = None
+        self.close()
+
+        if waiter is not None and not waiter.done():
+            waiter.set_exception(exc)
+
+    def exchange(self, method, data, timeout=None):
+        """
+        Send a serialized request, returns a future for a
+        (response, keep_alive) tuple.
+
+        Fails if no part of the response arrives for timeout seconds.
+        """
+        self.requests += 1
+        self.received = False
+        self.timeout = timeout
+        self.parser = ResponseParser(method)
+        self.waiter = asyncio.Future(loop=self.loop)
+        self._schedule()
+        self.transport.write(data)
+        return self.waiter
+
+    def close(self):
+        self.closed = True
+        self.parser = None
+        self._schedule()
+
+        if self.transport is not None:
+            self.transport.close()
+
+
+class ConnectionPool(object):
+    """
+    Keep-alive connections to a single host, at most 'limit' of them are
+    open at the same time.
+    """
+
+    def __init__(self, hostname, port, ssl, limit, connect_timeout=None):
+        self.hostname = hostname
+        self.port = port
+        self.ssl = ssl
+        self.limit = limit
+        self.connect_timeout = connect_timeout
+        self.size = 0
+        self.idle = list()
+        self.waiters = collections.deque()
+
+    def _connect(self, loop):
+        """
+        Open a connection counted in size, connections for futures that
+        were cancelled meanwhile are released to the pool.
+        """
+        connection = asyncio.ensure_future(loop.create_connection(
+            lambda: HttpProtocol(loop), self.hostname, self.port,
+            ssl=self.ssl), loop=loop)
+
+        future = asyncio.Future(loop=loop)
+        timer = None
+
+        if self.connect_timeout is not None:
+            timer = loop.call_later(self.connect_timeout, connection.cancel)
+
+        def connected(source):
+            if timer is not None:
+                timer.cancel()
+
+            if source.cancelled():
+                error = ClientException("Connect timed out")
+            else:
+                error = source.exception()
+
+            if error is not None:
+                self.size -= 1
+
+                if not future.done():
+                    future.set_exception(error)
+
+                self._wake(loop)
+                return
+
+            _, protocol = source.result()
+
+            if future.done():
+                self.release(loop, protocol, True)
+            else:
+                future.set_result(protocol)
+
+        connection.add_done_callback(connected)
+        return future
+
+    def acquire(self, loop, fresh=False):
+        """
+        Get a future for a connection, waiting for one to be released if
+        the pool is at its limit.  Idle connections are not reused if fresh
+        is set.
+        """
+        while self.idle and not fresh:
+            protocol = self.idle.pop()
+
+            if protocol.closed:
+                self.size -= 1
+                continue
+
+            future = asyncio.Future(loop=loop)
+            future.set_result(protocol)
+            return future
+
+        if self.size < self.limit:
+            self.size += 1
+            return self._connect(loop)
+
+        future = asyncio.Future(loop=loop)
+        self.waiters.append(future)
+        return future
+
+    def release(self, loop, protocol, reuse):
+        if not reuse or protocol.closed:
+            protocol.close()
+            self.size -= 1
+            self._wake(loop)
+            return
+
+        while self.waiters:
+            waiter = self.waiters.popleft()
+
+            if not waiter.done():
+                waiter.set_result(protocol)
+                return
+
+        self.idle.append(protocol)
+
+    def _wake(self, loop):
+        """
+        Open a new connection for the next waiter, if any.
+        """
+        while self.waiters and self.size < self.limit:
+            waiter = self.waiters.popleft()
+
+            if waiter.done():
+                continue
+
+            self.size += 1
+
+            self._connect(loop).add_done_callback(
+                functools.partial(self._connected, loop, waiter))
+
+    def _connected(self, loop, waiter, source):
+        if source.exception() is not None:
+            if not waiter.done():
+                waiter.set_exception(source.exception())
+        elif waiter.done():
+            self.release(loop, source.result(), True)
+        else:
+            waiter.set_result(source.result())
+
+    def close(self):
+        for protocol in self.idle:
+            protocol.close()
+
+        self.size -= len(self.idle)
+        self.idle = list()
+
+
+class AsyncioClient(Client):
+    def __init__(self, mimetypes, mimeobjects, url, **kw):
+        # mimetype do document type mappings.
+        self.mimetypes = mimetypes
+
+        # object to document type mappings.
+        self.mimeobjects = mimeobjects
+
+        self.loop = kw.pop("loop", None)
+        self.executor = kw.pop("executor", None)
+        self.parse_threshold = kw.pop("parse_threshold",
+                                      DEFAULT_PARSE_THRESHOLD)
+
+        url = urlparse(url)
+
+        if not url.scheme:
+            self.scheme = "https"
+        else:
+            self.scheme = url.scheme
+
+        port = url.port
+
+        if port is None:
+            port = 443 if self.scheme == "https" else 80
+
+        if url.port:
+            self.host = "{0}:{1}".format(url.hostname, url.port)
+        else:
+            self.host = url.hostname
+
+        self.headers = dict(DEFAULT_HEADERS)
+        self.headers["Accept-Encoding"] = "gzip, deflate"
+        self.headers.update(kw.pop("headers", {}))
+
+        # compress mime_body uploads.
+        self.content_encoding = kw.pop("content_encoding", None)
+
+        self.read_timeout = kw.pop("read_timeout", DEFAULT_READ_TIMEOUT)
+
+        self.pool = ConnectionPool(url.hostname, port,
+                                   self.scheme == "https" or None,
+                                   kw.pop("limit", DEFAULT_LIMIT),
+                                   kw.pop("connect_timeout",
+                                          DEFAULT_CONNECT_TIMEOUT))
+
+        if kw:
+            raise TypeError("Unexpected arguments: {0}".format(
+                ", ".join(sorted(kw))))
+
+    def _get_loop(self):
+        if self.loop is not None:
+            return self.loop
+        return asyncio.get_event_loop()
+
+    def _serialize(self, method, uri, headers, data):
+        if isinstance(data, type(u"")):
+            data = data.encode("utf-8")
+
+        headers = dict(headers)
+        headers["Host"] = self.host
+
+        if data is not None:
+            headers["Content-Length"] = str(len(data))
+
+        if not _TOKEN.match(method):
+            raise ValueError("Invalid method: {0!r}".format(method))
+
+        lines = ["{0} {1} HTTP/1.1".format(method, quote_uri(uri))]
+
+        for k, v in headers.items():
+            v = str(v)
+
+            if not _TOKEN.match(k) or _INVALID_VALUE.search(v):
+                raise ValueError("Invalid header: {0!r}: {1!r}".format(k, v))
+
+            lines.append("{0}: {1}".format(k, v))
+
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("iso-8859-1")
+
+        if data is None:
+            return head
+
+        return head + data
+
+    def request(self, method, uri, **kw):
+        """
+        Send a request, returns a future for a (response, obj) tuple.
+
+        Accepts the same 'mime_body', 'content_type', 'content_encoding',
+        'expect', 'headers' and 'data' arguments as RequestsClient, as well
+        as 'params' for the query string.
+        """
+        loop = self._get_loop()
+
+        expect = kw.pop("expect", [])
+        mime_body = kw.pop("mime_body", None)
+        content_type = kw.pop("content_type", None)
+        content_encoding = kw.pop("content_encoding", self.content_encoding)
+        params = kw.pop("params", None)
+
+        headers = dict(self.headers)
+        headers.update(kw.pop("headers", {}))
+        data = kw.pop("data", None)
+
+        if kw:
+            raise TypeError("Unexpected arguments: {0}".format(
+                ", ".join(sorted(kw))))
+
+        if mime_body:
+            data, headers["Content-Type"] = self._render_body(
+                mime_body, content_type)
+
+            if content_encoding:
+                data = self._encode_body(data, content_encoding)
+                headers["Content-Encoding"] = content_encoding
+
+        if uri[0] != '/':
+            uri = '/' + uri
+
+        if params:
+            uri = "{0}?{1}".format(uri, urlencode(params))
+
+        request = self._serialize(method, uri, headers, data)
+        result = asyncio.Future(loop=loop)
+
+        # the acquisition, exchange or parse the request is waiting for.
+        pending = [None]
+
+        def attempt(fresh):
+            acquiring = pending[0] = self.pool.acquire(loop, fresh)
+            acquiring.add_done_callback(functools.partial(acquired, fresh))
+
+        def acquired(fresh, source):
+            if source.cancelled():
+                return
+
+            if source.exception() is not None:
+                if not result.done():
+                    result.set_exception(source.exception())
+                return
+
+            protocol = source.result()
+
+            if result.done():
+                self.pool.release(loop, protocol, True)
+                return
+
+            try:
+                exchange = protocol.exchange(method, request,
+                                             self.read_timeout)
+            except Exception as e:
+                self.pool.release(loop, protocol, False)
+                result.set_exception(e)
+                return
+
+            pending[0] = exchange
+            exchange.add_done_callback(functools.partial(
+                exchanged, protocol, fresh or protocol.requests == 1))
+
+        def exchanged(protocol, fresh, source):
+            if source.cancelled() or source.exception() is not None:
+                self.pool.release(loop, protocol, False)
+
+                if source.cancelled() or result.done():
+                    return
+
+                error = source.exception()
+
+                # the server closed the keep-alive connection meanwhile.
+                if isinstance(error, ConnectionClosed) and not fresh and \
+                        method in IDEMPOTENT_METHODS:
+                    attempt(True)
+                    return
+
+                result.set_exception(error)
+                return
+
+            response, keep_alive = source.result()
+            self.pool.release(loop, protocol, keep_alive)
+
+            if result.done():
+                return
+
+            try:
+                value = self._handle_response(loop, response, expect)
+            except Exception as e:
+                result.set_exception(e)
+                return
+
+            if isinstance(value, asyncio.Future):
+                pending[0] = value
+                value.add_done_callback(functools.partial(
+                    _copy, result=result))
+            else:
+                result.set_result(value)
+
+        def done(source):
+            if source.cancelled() and pending[0] is not None:
+                pending[0].cancel()
+
+        result.add_done_callback(done)
+        attempt(False)
+        return result
+
+    def _handle_response(self, loop, response, expect):
+        response.content = self._decode_content(
+            response.headers.get("Content-Encoding"), response.content)
+
+        content_type = response.headers.get("Content-Type")
+
+        if content_type is None or not response.content:
+            return response, None
+
+        mimetype, _ = parse_content_type(content_type)
+
+        handler = self._response_handler(mimetype, expect)
+
+        if len(response.content) < self.parse_threshold:
+            return response, self._parse(mimetype, handler, response.content)
+
+        parsed = loop.run_in_executor(self.executor, self._parse, mimetype,
+                                      handler, response.content)
+
+        return _then(loop, parsed, lambda obj: (response, obj))
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,128 @@
+"""
+Concurrent fan-out of requests for blocking clients.
+"""
+import threading
+
+try:
+    from Queue import Queue
+    from Queue import Empty
+except ImportError:
+    from queue import Queue
+    from queue import Empty
+
+DEFAULT_WORKERS = 8
+
+
+class BatchResult(object):
+    """
+    Outcome of a single request in a batch, 'error' is set instead of
+    'response' and 'obj' if the request failed.
+    """
+    __slots__ = ("index", "method", "uri", "response", "obj", "error")
+
+    def __init__(self, index, method, uri, response=None, obj=None,
+                 error=None):
+        self.index = index
+        self.method = method
+        self.uri = uri
+        self.response = response
+        self.obj = obj
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return "<BatchResult {0} {1} {2}>".format(
+            self.method, self.uri, "ok" if self.ok else repr(self.error))
+
+
+def _normalize(calls):
+    for item in calls:
+        if len(item) == 2:
+            method, uri = item
+            kw = {}
+        else:
+            method, uri, kw = item
+
+        yield method, uri, dict(kw or {})
+
+
+def run_batch(request, calls, workers=DEFAULT_WORKERS, ordered=True):
+    """
+    Run (method, uri[, kwargs]) requests through the request function on a
+    pool of worker threads.
+
+    Yields a BatchResult per request, in the order of calls if ordered,
+    otherwise as they complete.
+    """
+    calls = list(_normalize(calls))
+
+    if not calls:
+        return
+
+    tasks = Queue()
+    results = Queue()
+
+    for index, item in enumerate(calls):
+        tasks.put((index, item))
+
+    def worker():
+        while True:
+            try:
+                index, (method, uri, kw) = tasks.get_nowait()
+            except Empty:
+                return
+
+            try:
+                response, obj = request(method, uri, **kw)
+            except Exception as e:
+                results.put(BatchResult(index, method, uri, error=e))
+            else:
+                results.put(BatchResult(index, method, uri, response, obj))
+
+    for _ in range(min(workers, len(calls))):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+
+    pending = dict()
+    next_index = 0
+
+    for _ in range(len(calls)):
+        result = results.get()
+
+        if not ordered:
+            yield result
+            continue
+
+        pending[result.index] = result
+
+        while next_index in pending:
+            yield pending.pop(next_index)
+            next_index += 1
+
+
+def find_refs(data, rels=None):
+    """
+    Find the $ref links in data, optionally only those with a rel in rels.
+    """
+    stack = [data]
+
+    while stack:
+        data = stack.pop()
+
+        if isinstance(data, dict):
+            ref = data.get("$ref")
+
+            if ref is not None:
+                if rels is None or data.get("rel") in rels:
+                    yield ref
+                continue
+
+            stack.extend(reversed(list(data.values())))
+            continue
+
+        if isinstance(data, (list, tuple)):
+            stack.extend(reversed(data))
@@ -3,7 +3,6 @@ A mimeprovider client based on requests.
 """
 from __future__ import absolute_import
 
-import sys
 import logging
 
 log = logging.getLogger(__name__)
@@ -11,19 +10,25 @@ log = logging.getLogger(__name__)
 import urlparse
 
 import requests
-import werkzeug.http
-
-from mimeprovider.exceptions import MimeValidationError
+import requests.adapters
 
 from mimeprovider.client import Client
+from mimeprovider.client import ClientException
+from mimeprovider.client import DEFAULT_HEADERS
+
+from mimeprovider.client.batch import DEFAULT_WORKERS
+from mimeprovider.client.batch import find_refs
+from mimeprovider.client.batch import run_batch
 
-DEFAULT_HEADERS = {
-    "Accept": "*/*"
-}
+from mimeprovider.collection import iter_pages
+from mimeprovider.fields import FIELDS_PARAM
+from mimeprovider.fields import parse_fields
+from mimeprovider.negotiation import parse_content_type
 
+__all__ = ["RequestsClient", "ClientException"]
 
-class ClientException(Exception):
-    pass
+# size of the reads from streamed responses.
+STREAM_CHUNK_SIZE = 16 * 1024
 
 
 class RequestsClient(Client):
@@ -49,9 +54,16 @@ class RequestsClient(Client):
         headers = dict(DEFAULT_HEADERS)
         headers.update(kw.pop("headers", {}))
 
-        self.session = requests.session(
-            headers=headers,
-            **kw)
+        # compress mime_body uploads, responses are decompressed by requests.
+        self.content_encoding = kw.pop("content_encoding", None)
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        self.pool_size = requests.adapters.DEFAULT_POOLSIZE
+
+        # remaining options are session attributes, like auth or verify.
+        for key, value in kw.items():
+            setattr(self.session, key, value)
 
     def request(self, method, uri, **kw):
         """
@@ -59,24 +71,35 @@ class RequestsClient(Client):
         """
         expect = kw.pop("expect", [])
         mime_body = kw.pop("mime_body", None)
+        content_type = kw.pop("content_type", None)
+        content_encoding = kw.pop("content_encoding", self.content_encoding)
+        fields = kw.pop("fields", None)
 
         headers = kw.pop("headers", {})
         data = kw.pop("data", None)
 
         if mime_body:
-            mimevalues = self.mimeobjects.get(mime_body.__class__)
+            data, headers["Content-Type"] = self._render_body(
+                mime_body, content_type)
+
+            if content_encoding:
+                data = self._encode_body(data, content_encoding)
+                headers["Content-Encoding"] = content_encoding
 
-            if not mimevalues:
-                raise ClientException(
-                    ("Cannot handle object of type "
-                     "{0!r}").format(mime_body.__class__))
+        # only fields of the response document are requested and validated.
+        if fields:
+            if isinstance(fields, basestring):
+                fields = parse_fields(fields)
+            else:
+                fields = frozenset(fields)
 
-            mapping = mimevalues[0]
+            params = kw.pop("params", None) or {}
 
-            document_type, mimetype, validator = mapping
+            if isinstance(params, dict):
+                params = params.items()
 
-            data = document_type.render(validator, mime_body)
-            headers["Content-Type"] = mimetype
+            kw["params"] = list(params) + [
+                (FIELDS_PARAM, ",".join(sorted(fields)))]
 
         if uri[0] != '/':
             uri = '/' + uri
@@ -91,33 +114,99 @@ class RequestsClient(Client):
 
         content_type = response.headers.get("Content-Type")
 
-        if content_type is None or not response.content:
+        if content_type is None:
             return response, None
 
-        mimetype, opts = werkzeug.http.parse_options_header(content_type)
+        mimetype, opts = parse_content_type(content_type)
 
-        if mimetype not in self.mimetypes:
-            raise ClientException(
-                "Cannot handle response type: {0}".format(mimetype))
+        # streamed documents are parsed while iterating over the response.
+        if kw.get("stream") and self._streaming(mimetype):
+            handler = self._response_handler(mimetype, expect, fields)
+            chunks = response.iter_content(STREAM_CHUNK_SIZE)
+            return response, self._parse_stream(mimetype, handler, chunks)
 
-        document_type, document_class, validator = self.mimetypes.get(mimetype)
-
-        if expect and document_class not in expect:
-            raise ClientException(
-                "Unexpected response type: {0}".format(mimetype))
+        if not response.content:
+            return response, None
 
-        try:
-            obj = document_type.parse(validator,
-                                      document_class,
-                                      response.content)
-        except MimeValidationError as e:
-            raise ClientException(
-                "Response format invalid: {0}".format(str(e)))
-        except:
-            log.error(
-                "Failed to parse content of type: {0}".format(mimetype),
-                exc_info=sys.exc_info())
-            raise ClientException(
-                "Failed to parse content of type: {0}".format(mimetype))
+        handler = self._response_handler(mimetype, expect, fields)
+        obj = self._parse(mimetype, handler, response.content)
 
         return response, obj
+
+    def _size_pool(self, workers):
+        """
+        Make sure the connection pool can hold a connection per worker.
+        """
+        if workers <= self.pool_size:
+            return
+
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                pool_maxsize=workers)
+        self.session.mount("{0}://".format(self.scheme), adapter)
+        self.pool_size = workers
+
+    def request_many(self, calls, workers=DEFAULT_WORKERS, ordered=True):
+        """
+        Run many (method, uri[, kwargs]) requests on a bounded pool of
+        workers sharing the session's connection pool.
+
+        Yields a BatchResult for every request, in order or as they
+        complete.  Failing requests are reported through BatchResult.error
+        and do not abort the batch.
+        """
+        self._size_pool(workers)
+        return run_batch(self.request, calls, workers, ordered)
+
+    def follow(self, uris, depth=1, rels=None, workers=DEFAULT_WORKERS,
+               **kw):
+        """
+        GET uris and follow the $ref links in their documents, one level at
+        a time up to depth, optionally only links with a rel in rels.
+
+        Every uri is only fetched once, results are yielded level by level.
+        """
+        if isinstance(uris, basestring):
+            uris = [uris]
+
+        seen = set(uris)
+        level = [("GET", uri, kw) for uri in uris]
+
+        for current in range(depth + 1):
+            next_level = list()
+
+            for result in self.request_many(level, workers):
+                yield result
+
+                if current == depth or not hasattr(result.obj, "to_data"):
+                    continue
+
+                for ref in find_refs(result.obj.to_data(), rels):
+                    if ref in seen or not ref.startswith("/"):
+                        continue
+
+                    seen.add(ref)
+                    next_level.append(("GET", ref, kw))
+
+            if not next_level:
+                break
+
+            level = next_level
+
+    def pages(self, uri, prefetch=True, **kw):
+        """
+        GET the pages of a collection starting at uri, yielding (response,
+        collection) pairs.
+
+        The next page is fetched in the background while the current one
+        is processed, unless prefetch is False.
+        """
+        return iter_pages(self.request, uri, prefetch, **kw)
+
+    def iterate(self, uri, prefetch=True, **kw):
+        """
+        Iterate over the items of a paginated collection, across all of its
+        pages.
+        """
+        for _, page in self.pages(uri, prefetch, **kw):
+            for item in page:
+                yield item
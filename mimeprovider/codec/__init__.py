@@ -0,0 +1,54 @@
+"""
+JSON codec backends for JsonDocumentType.
+
+A codec provides 'dumps' to encode data and 'loads' to decode str, bytes or
+memoryview input.
+
+Codecs encode and decode whole bodies, streamed JSON bodies are encoded and
+decoded with the json module of the standard library.
+"""
+import importlib
+
+DEFAULT_CODEC = "stdlib"
+
+CODECS = {
+    "stdlib": "mimeprovider.codec.stdlib",
+    "simplejson": "mimeprovider.codec.simplejson",
+    "ujson": "mimeprovider.codec.ujson",
+}
+
+
+class Codec(object):
+    """
+    Base class for codecs.
+    """
+    # name the codec is registered under.
+    name = None
+
+    def dumps(self, data):
+        raise RuntimeError("dumps not implemented")
+
+    def loads(self, data):
+        raise RuntimeError("loads not implemented")
+
+
+def get_codec(codec=None):
+    """
+    Get a codec instance by name, the default codec if None, or the codec
+    itself if it already is an instance.
+
+    Raises ImportError if the backing package is not available.
+    """
+    if codec is None:
+        codec = DEFAULT_CODEC
+
+    if not isinstance(codec, basestring):
+        return codec
+
+    module = CODECS.get(codec)
+
+    if module is None:
+        raise ValueError("Unknown codec: {0}".format(codec))
+
+    m = importlib.import_module(module)
+    return m.__codec__()
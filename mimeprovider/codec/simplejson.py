@@ -0,0 +1,20 @@
+from __future__ import absolute_import
+
+import simplejson
+
+from mimeprovider.codec import Codec
+
+
+class SimplejsonCodec(Codec):
+    name = "simplejson"
+
+    def dumps(self, data):
+        return simplejson.dumps(data)
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return simplejson.loads(data)
+
+
+__codec__ = SimplejsonCodec
@@ -0,0 +1,23 @@
+from __future__ import absolute_import
+
+import json
+
+from mimeprovider.codec import Codec
+
+
+class StdlibCodec(Codec):
+    """
+    Fallback codec using the json module of the standard library.
+    """
+    name = "stdlib"
+
+    def dumps(self, data):
+        return json.dumps(data)
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+__codec__ = StdlibCodec
@@ -0,0 +1,20 @@
+from __future__ import absolute_import
+
+import ujson
+
+from mimeprovider.codec import Codec
+
+
+class UjsonCodec(Codec):
+    name = "ujson"
+
+    def dumps(self, data):
+        return ujson.dumps(data)
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return ujson.loads(data)
+
+
+__codec__ = UjsonCodec
@@ -0,0 +1,248 @@
+"""
+Paginated collections of documents.
+
+A Collection renders a single page taken from an iterable of items, and
+links to the next page through request.json_ref.  Only the items of the
+page, and one more to know if there is a next page, are taken from the
+iterable.
+
+Pages are addressed by offset by default.  Queries that support slicing,
+like lists or ORM queries turning slices into OFFSET and LIMIT, are sliced
+to the page.  Plain iterators have the items before the page read and
+skipped, which gets slower with every page, so they should be paginated
+with a cursor function and start after the cursor themselves.
+
+    ItemCollection = make_collection(Item)
+
+    def list_items(request):
+        return paginate(request, "items", query_items(), ItemCollection)
+
+Clients walk the pages with RequestsClient.iterate, which fetches the next
+page in the background while the current one is processed.
+"""
+import itertools
+import threading
+
+__all__ = ["Collection", "make_collection", "page_ref", "paginate",
+           "iter_pages"]
+
+DEFAULT_PAGE_SIZE = 50
+
+# query parameter carrying the cursor of a page.
+CURSOR = "cursor"
+
+
+def _to_data(item):
+    if hasattr(item, "to_data"):
+        return item.to_data()
+
+    return item
+
+
+class Collection(object):
+    """
+    A page of a collection.
+
+    Pages are addressed by offset unless a cursor function is given, which
+    computes the cursor of the next page from the last item of this one.
+    next_ref builds the link to the next page from its cursor, see page_ref.
+
+    Parsed pages have their items in 'items' and the link to the next page,
+    if any, in 'next'.
+    """
+    object_type = "collection"
+
+    # document class of the items, parsed items are left as data if None.
+    item = None
+
+    page_size = DEFAULT_PAGE_SIZE
+
+    def __init__(self, items, next_ref=None, page_size=None, start=0,
+                 cursor=None):
+        self.items = items
+        self.next_ref = next_ref
+        self.start = start
+        self.cursor = cursor
+        self.next = None
+        self._page = None
+
+        if page_size is not None:
+            self.page_size = page_size
+
+    def page(self):
+        """
+        The items of this page, and whether there are more after it.
+        """
+        if self._page is None:
+            items = list(itertools.islice(self.items, self.page_size + 1))
+            more = len(items) > self.page_size
+            self._page = (items[:self.page_size], more)
+
+        return self._page
+
+    def next_cursor(self, items):
+        if self.cursor is not None:
+            return self.cursor(items[-1])
+
+        return self.start + len(items)
+
+    def to_data(self):
+        items, more = self.page()
+
+        data = {"items": [_to_data(item) for item in items]}
+
+        if more and self.next_ref is not None:
+            data["next"] = self.next_ref(self.next_cursor(items))
+        elif self.next is not None:
+            data["next"] = self.next
+
+        return data
+
+    @classmethod
+    def from_data(cls, data):
+        items = data.get("items") or []
+
+        if cls.item is not None:
+            items = [cls.item.from_data(item) for item in items]
+
+        collection = cls(items)
+        collection._page = (items, False)
+        collection.next = data.get("next")
+        return collection
+
+    def __iter__(self):
+        return iter(self.page()[0])
+
+    def __len__(self):
+        return len(self.page()[0])
+
+
+def make_collection(item, object_type=None, page_size=None, bases=None):
+    """
+    Build a collection of item documents.
+
+    The collection is named after the item, and gets a schema if the item
+    has one.
+    """
+    if object_type is None:
+        object_type = "{0}-collection".format(item.object_type)
+
+    attrs = dict(object_type=object_type, item=item)
+
+    if page_size is not None:
+        attrs["page_size"] = page_size
+
+    if hasattr(item, "schema"):
+        attrs["schema"] = {
+            "type": "object",
+            "properties": {
+                "items": {"type": "array", "items": item.schema},
+                "next": {"type": "object"},
+            },
+        }
+
+    name = "{0}Collection".format(item.__name__)
+    return type(name, bases or (Collection,), attrs)
+
+
+def page_ref(request, route, param=CURSOR, **kw):
+    """
+    Build a next_ref linking to the pages of route, keeping the other query
+    parameters of the request.
+    """
+    def next_ref(cursor):
+        query = [(k, v) for k, v in request.GET.items() if k != param]
+        query.append((param, cursor))
+        return request.json_ref(route, rel_="next", _query=query, **kw)
+
+    return next_ref
+
+
+def paginate(request, route, items, cls=Collection, param=CURSOR,
+             page_size=None, cursor=None, **kw):
+    """
+    The page of items requested for route.
+
+    Without a cursor function the cursor is an offset, items that support
+    slicing are sliced to the page and the items of others before it are
+    skipped.  With one, items must already start after the cursor in the
+    request, which the view reads from request.GET[param].
+    """
+    start = 0
+
+    if cursor is None:
+        try:
+            start = max(0, int(request.GET.get(param, 0)))
+        except ValueError:
+            start = 0
+
+        if hasattr(items, "__getitem__") and not isinstance(items, dict):
+            size = page_size or cls.page_size
+            items = items[start:start + size + 1]
+        else:
+            items = itertools.islice(iter(items), start, None)
+
+    items = iter(items)
+
+    return cls(items, next_ref=page_ref(request, route, param, **kw),
+               page_size=page_size, start=start, cursor=cursor)
+
+
+class _Prefetch(threading.Thread):
+    """
+    Fetch a page in the background.
+    """
+
+    def __init__(self, request, uri, kw):
+        super(_Prefetch, self).__init__()
+        self.daemon = True
+        self.request = request
+        self.uri = uri
+        self.kw = kw
+        self.value = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.value = self.request("GET", self.uri, **self.kw)
+        except Exception as e:
+            self.error = e
+
+    def result(self):
+        self.join()
+
+        if self.error is not None:
+            raise self.error
+
+        return self.value
+
+
+def iter_pages(request, uri, prefetch=True, **kw):
+    """
+    Yield the (response, collection) pages starting at uri, following the
+    'next' links through the request function.
+
+    With prefetch the next page is requested as soon as a page arrives,
+    while the caller works on it.
+    """
+    pending = None
+
+    while uri is not None:
+        if pending is not None:
+            response, page = pending.result()
+        else:
+            response, page = request("GET", uri, **kw)
+
+        pending = None
+        uri = None
+
+        next_ref = getattr(page, "next", None)
+
+        if isinstance(next_ref, dict):
+            uri = next_ref.get("$ref")
+
+        if uri is not None and prefetch:
+            pending = _Prefetch(request, uri, kw)
+            pending.start()
+
+        yield response, page
@@ -0,0 +1,256 @@
+"""
+Document classes generated from their schema.
+
+Subclasses of Document, or classes built with make_document, get
+__slots__ for the properties in their schema and generated to_data,
+from_data and to_json methods.  to_json encodes straight to JSON without
+building the intermediate dict, JsonDocumentType uses it when the document
+does not have to be validated.  to_data takes the sparse fieldset of a
+request, if any, and only reads the selected attributes.
+
+    class Item(Document):
+        object_type = "item"
+        schema = {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "required": True},
+                "count": {"type": "integer"},
+            },
+        }
+
+Methods defined on the class itself are kept.  Classes that define their
+own to_data do not get a to_json, and JsonDocumentType only uses to_json
+while it belongs to the to_data it was generated with, see has_json.
+"""
+import functools
+import json
+import keyword
+import re
+
+__all__ = ["Document", "DocumentMeta", "make_document", "has_json"]
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_encode = json.JSONEncoder().encode
+
+# key orders cached per document class for the combinations of optional
+# fields that are present.
+MAX_LAYOUTS = 256
+
+
+def schema_fields(schema):
+    """
+    Get the property names of an object schema, in sorted order, and the
+    set of required ones.
+
+    Both the draft 3 'required' property flag and the draft 4 'required'
+    list are understood.
+    """
+    properties = schema.get("properties") or dict()
+    required = schema.get("required")
+
+    if not isinstance(required, (list, tuple)):
+        required = ()
+
+    fields = list()
+    required_fields = set(str(name) for name in required)
+
+    for name in sorted(properties):
+        if not _IDENTIFIER.match(name) or keyword.iskeyword(name):
+            raise ValueError(
+                "Property {0!r} is not a valid attribute name".format(name))
+
+        fields.append(str(name))
+
+        if properties[name].get("required") is True:
+            required_fields.add(str(name))
+
+    return fields, required_fields
+
+
+def _compile(source, name, namespace):
+    code = compile(source, "<generated {0}>".format(name), "exec")
+    exec(code, namespace)
+    return namespace[name]
+
+
+def _select(fields, required, obj, selected):
+    """
+    The data of obj for the selected fields only.
+    """
+    data = dict()
+
+    for f in fields:
+        if f not in selected:
+            continue
+
+        value = getattr(obj, f)
+
+        if value is not None or f in required:
+            data[f] = value
+
+    return data
+
+
+def _function(method):
+    return getattr(method, "__func__", method)
+
+
+def _tuple(items):
+    items = list(items)
+
+    if not items:
+        return "()"
+
+    return "({0},)".format(", ".join(items))
+
+
+def _generate(fields, required):
+    """
+    Generate the methods for a document with the given fields.
+
+    Optional fields that are None are left out of the data, so that they
+    are absent rather than null.
+    """
+    namespace = dict(_encode=_encode,
+                     _select=functools.partial(_select, fields, required))
+    methods = dict()
+
+    if fields:
+        lines = ["def __init__(self, {0}):".format(
+            ", ".join("{0}=None".format(f) for f in fields))]
+        lines.extend("    self.{0} = {0}".format(f) for f in fields)
+    else:
+        lines = ["def __init__(self):", "    pass"]
+
+    methods["__init__"] = _compile("\n".join(lines), "__init__", namespace)
+
+    lines = ["def to_data(self, fields=None):",
+             "    if fields is not None:",
+             "        return _select(self, fields)",
+             "    data = {{{0}}}".format(", ".join(
+                 "{0!r}: self.{1}".format(f, f)
+                 for f in fields if f in required))]
+
+    for f in fields:
+        if f not in required:
+            lines.append("    value = self.{0}".format(f))
+            lines.append("    if value is not None:")
+            lines.append("        data[{0!r}] = value".format(f))
+
+    lines.append("    return data")
+    methods["to_data"] = _compile("\n".join(lines), "to_data", namespace)
+
+    lines = ["def from_data(cls, data):",
+             "    get = data.get",
+             "    obj = cls.__new__(cls)"]
+    lines.extend("    obj.{0} = get({1!r})".format(f, f) for f in fields)
+    lines.append("    return obj")
+    methods["from_data"] = classmethod(
+        _compile("\n".join(lines), "from_data", namespace))
+
+    # to_json emits the keys in the order json.dumps gives the data of
+    # to_data, which depends on the fields that are present.
+    optional = [f for f in fields if f not in required]
+
+    lines = ["def _layout(present):",
+             "    data = {{{0}}}".format(", ".join(
+                 "{0!r}: {1}".format(f, i)
+                 for i, f in enumerate(fields) if f in required))]
+
+    for j, f in enumerate(optional):
+        lines.append("    if present[{0}]:".format(j))
+        lines.append("        data[{0!r}] = {1}".format(f, fields.index(f)))
+
+    lines.append("    return tuple(data.values())")
+    namespace["_layout"] = _compile("\n".join(lines), "_layout", namespace)
+    namespace["_layouts"] = dict()
+    namespace["_keys"] = tuple(_encode(f) + ": " for f in fields)
+
+    lines = ["def to_json(self):",
+             "    values = {0}".format(_tuple(
+                 "self.{0}".format(f) for f in fields)),
+             "    present = {0}".format(_tuple(
+                 "values[{0}] is not None".format(fields.index(f))
+                 for f in optional)),
+             "    layout = _layouts.get(present)",
+             "    if layout is None:",
+             "        layout = _layout(present)",
+             "        if len(_layouts) < {0}:".format(MAX_LAYOUTS),
+             "            _layouts[present] = layout",
+             "    return \"{\" + \", \".join(",
+             "        [_keys[i] + _encode(values[i]) for i in layout]) + \"}\""]
+
+    to_json = _compile("\n".join(lines), "to_json", namespace)
+    to_json.to_data = methods["to_data"]
+    methods["to_json"] = to_json
+    return methods
+
+
+class DocumentMeta(type):
+    """
+    Generates __slots__ and methods for classes with a schema.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        schema = namespace.get("schema")
+
+        if schema is None:
+            namespace.setdefault("__slots__", ())
+            return type.__new__(mcs, name, bases, namespace)
+
+        fields, required = schema_fields(schema)
+
+        inherited = set()
+
+        for base in bases:
+            for klass in getattr(base, "__mro__", ()):
+                inherited.update(getattr(klass, "__slots__", ()))
+
+        namespace.setdefault(
+            "__slots__", tuple(f for f in fields if f not in inherited))
+        namespace.setdefault("__fields__", tuple(fields))
+
+        methods = _generate(fields, required)
+
+        # to_json only encodes what the generated to_data returns.
+        if "to_data" in namespace:
+            del methods["to_json"]
+
+        for method, function in methods.items():
+            namespace.setdefault(method, function)
+
+        return type.__new__(mcs, name, bases, namespace)
+
+
+class Document(object):
+    """
+    Base class for documents generated from their schema.
+    """
+    __metaclass__ = DocumentMeta
+    __fields__ = ()
+
+    def __repr__(self):
+        return "<{0} {1}>".format(type(self).__name__, " ".join(
+            "{0}={1!r}".format(f, getattr(self, f, None))
+            for f in self.__fields__))
+
+
+def has_json(obj):
+    """
+    Whether obj has a generated to_json that encodes the same document as
+    its to_data, which subclasses may have overridden.
+    """
+    cls = type(obj)
+    to_json = _function(getattr(cls, "to_json", None))
+    to_data = _function(getattr(cls, "to_data", None))
+    return to_data is not None and \
+        getattr(to_json, "to_data", None) is to_data
+
+
+def make_document(name, object_type, schema, bases=(Document,), **attrs):
+    """
+    Build a document class for object_type from schema.
+    """
+    attrs.update(object_type=object_type, schema=schema)
+    return DocumentMeta(name, bases, attrs)
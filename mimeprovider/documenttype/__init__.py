@@ -11,24 +11,234 @@ class DocumentType(object):
     # a template or the mime type.
     mime = None
 
+    # provider options passed on to the constructor.
+    options = ()
+
+    # is every body rendered and parsed as a stream of documents?
+    streaming = False
+
     def get_mimetype(self, obj):
         if not self.custom_mime:
             return self.mime
         return self.mime.format(o=obj)
 
+    def parse(self, validator, cls, string):
+        data = self.deserialize(string)
+        if validator:
+            validator.validate(data)
+        return cls.from_data(data)
+
+    def render(self, validator, obj):
+        data = obj.to_data()
+        if validator:
+            validator.validate(data)
+        return self.serialize(obj, data)
+
+    def deserialize(self, string):
+        """
+        Decode a body into data, through parse for document types that only
+        implement parse.
+        """
+        if _overrides(self, "parse"):
+            return self.parse(None, _Data, string)
+
+        raise RuntimeError("parse not implemented")
+
+    def serialize(self, obj, data):
+        """
+        Encode the data of obj into a body, through render for document
+        types that only implement render.
+        """
+        if _overrides(self, "render"):
+            return self.render(None, _Prepared(obj, data))
+
+        raise RuntimeError("render not implemented")
+
+
+def _overrides(document_type, name):
+    """
+    Check if the class of document_type overrides method name.
+    """
+    method = getattr(type(document_type), name)
+    base = getattr(DocumentType, name)
+    return getattr(method, "__func__", method) is not \
+        getattr(base, "__func__", base)
+
+
+class _Data(object):
+    """
+    Stands in for a document class, parsing to the data itself.
+    """
+
+    @classmethod
+    def from_data(cls, data):
+        return data
+
+
+class _Prepared(object):
+    """
+    Stands in for a document whose data is already prepared.
+    """
+
+    def __init__(self, obj, data):
+        self._obj = obj
+        self._data = data
+
+    def to_data(self):
+        return self._data
+
+    def __getattr__(self, name):
+        return getattr(self._obj, name)
+
+
+def chunked(fragments, chunk_size):
+    """
+    Join string fragments into utf-8 encoded chunks of about chunk_size.
+
+    Unicode fragments are encoded, str fragments are taken to be utf-8
+    already.
+    """
+    buf = list()
+    size = 0
+
+    for fragment in fragments:
+        if isinstance(fragment, unicode):
+            fragment = fragment.encode("utf-8")
+
+        buf.append(fragment)
+        size += len(fragment)
+
+        if size >= chunk_size:
+            yield "".join(buf)
+            buf = list()
+            size = 0
+
+    if buf:
+        yield "".join(buf)
+
+
+class LazyDocumentType(DocumentType):
+    """
+    Stands in for the document type in module until it is first used.
+
+    Registration only needs the mime, custom_mime, streaming and options
+    attributes, which are declared up front.  Anything else loads the module
+    and is looked up on the real document type.
+    """
+
+    def __init__(self, module, mime, custom_mime=False, streaming=False,
+                 options=(), kw=None):
+        self.module = module
+        self.mime = mime
+        self.custom_mime = custom_mime
+        self.streaming = streaming
+        self.options = options
+        self.kw = kw or dict()
+        self.instance = None
+
+    def __call__(self, **kw):
+        """
+        Bind constructor options, like instantiating a document type.
+
+        Explicitly configured options give the real document type right
+        away, so that configuration errors are not deferred to the first
+        request.
+        """
+        lazy = LazyDocumentType(self.module, self.mime, self.custom_mime,
+                                self.streaming, self.options, kw)
+
+        if any(v is not None for v in kw.values()):
+            return lazy.load()
+
+        return lazy
+
+    def load(self):
+        if self.instance is None:
+            m = importlib.import_module(self.module)
+            self.instance = m.__document_type__(**self.kw)
+
+        return self.instance
+
+    def parse(self, validator, cls, string):
+        return self.load().parse(validator, cls, string)
+
+    def render(self, validator, obj):
+        return self.load().render(validator, obj)
+
+    def deserialize(self, string):
+        return self.load().deserialize(string)
+
+    def serialize(self, obj, data):
+        return self.load().serialize(obj, data)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        return "<LazyDocumentType {0}>".format(self.module)
+
 
 DEFAULT_DOCUMENT_TYPES = [
     "mimeprovider.documenttype.json",
+    "mimeprovider.documenttype.msgpack",
+    "mimeprovider.documenttype.mergepatch",
     "mimeprovider.documenttype.html",
     "mimeprovider.documenttype.text",
 ]
 
+# registration attributes of the built-in document types, so that their
+# modules are only imported when first used.  The document types take them
+# from here, see builtin.
+DOCUMENT_TYPES = {
+    "mimeprovider.documenttype.json": dict(
+        mime="application/{o.object_type}+json",
+        custom_mime=True, options=("codec",)),
+    "mimeprovider.documenttype.ndjson": dict(
+        mime="application/{o.object_type}+x-ndjson",
+        custom_mime=True, streaming=True, options=("codec",)),
+    "mimeprovider.documenttype.msgpack": dict(
+        mime="application/{o.object_type}+msgpack",
+        custom_mime=True),
+    "mimeprovider.documenttype.mergepatch": dict(
+        mime="application/{o.object_type}+merge-patch+json",
+        custom_mime=True, options=("codec",)),
+    "mimeprovider.documenttype.html": dict(mime="text/html"),
+    "mimeprovider.documenttype.text": dict(mime="text/plain"),
+}
 
-def get_default_document_types():
-    result = list()
 
-    for module in DEFAULT_DOCUMENT_TYPES:
-        m = importlib.import_module(module)
-        result.append(m.__document_type__)
+def builtin(module):
+    """
+    Class decorator giving a built-in document type its registration
+    attributes from DOCUMENT_TYPES.
+    """
+    info = DOCUMENT_TYPES[module]
+
+    def decorate(cls):
+        cls.mime = info["mime"]
+        cls.custom_mime = info.get("custom_mime", False)
+        cls.streaming = info.get("streaming", False)
+        cls.options = info.get("options", ())
+        return cls
+
+    return decorate
 
-    return result
+
+def get_document_type(module):
+    """
+    Get the document type of module, lazily if it is a known module.
+    """
+    info = DOCUMENT_TYPES.get(module)
+
+    if info is not None:
+        return LazyDocumentType(module, **info)
+
+    m = importlib.import_module(module)
+    return m.__document_type__
+
+
+def get_default_document_types():
+    return [get_document_type(module) for module in DEFAULT_DOCUMENT_TYPES]
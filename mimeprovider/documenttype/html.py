@@ -1,82 +1,134 @@
 from __future__ import absolute_import
 
+import xml.sax.saxutils as s
+
 from mimeprovider.documenttype import DocumentType
+from mimeprovider.documenttype import builtin
+from mimeprovider.documenttype import chunked
 
 from mimeprovider.packages.mxml import mXml
+from mimeprovider.packages.mxml import open_tag
+
+# opening tags are built through mXml.add once, so that attributes come out
+# in exactly the same order as they would for a full tree.
+_root = mXml("html")
+
+TABLE = open_tag(_root.add("table", cellspacing="2", cellpadding="2"))
+SEQUENCE = open_tag(_root.add("th", valign="top", align='left',
+                              style='background-color: #ff8888;'))
+TITLE = open_tag(_root.add("th", valign="top", align="left"))
+VALUE = open_tag(_root.add("td", align="left"))
+
+del _root
+
+
+class _Node(object):
+    """
+    A pending value that is expanded when the writer gets to it.
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+
+def _text(value):
+    if isinstance(value, unicode):
+        value = value.encode("utf-8")
+
+    return s.escape(str(value))
+
+
+def _list_parts(data):
+    yield TABLE
+
+    for i, item in enumerate(data):
+        yield "<tr>" + SEQUENCE + _text(i) + "</th>" + VALUE
+        yield _Node(item)
+        yield "</td></tr>"
 
+    yield "</table>"
 
-def _build_data(first_element, first_data):
-    queue = list([(first_element, first_data)])
 
-    while len(queue) > 0:
-        element, data = queue.pop()
+def _dict_parts(data):
+    yield TABLE
 
-        if isinstance(data, list):
-            table = element.add("table", cellspacing="2", cellpadding="2")
+    for k, v in sorted(data.items()):
+        yield "<tr>" + TITLE + _text("{0}:".format(k)) + "</th>" + VALUE
+        yield _Node(v)
+        yield "</td></tr>"
 
-            for i, item in enumerate(data):
-                tr = table.add("tr")
-                sequence = tr.add("th", valign="top", align='left',
-                                  style='background-color: #ff8888;')
-                sequence.adds(i)
-                value = tr.add("td", align="left")
-                queue.insert(0, (value, item))
+    yield "</table>"
 
-            continue
 
-        if isinstance(data, dict):
-            ref = data.get("$ref")
+def _parts(data):
+    if isinstance(data, list):
+        return _list_parts(data)
 
-            if ref is not None:
-                rel = data.get("rel", ref)
-                link = element.add("a", href=ref)
-                link.adds(rel)
-                continue
+    if isinstance(data, dict):
+        ref = data.get("$ref")
 
-            table = element.add("table", cellspacing="2", cellpadding="2")
+        if ref is None:
+            return _dict_parts(data)
 
-            for k, v in sorted(data.items()):
-                tr = table.add("tr")
-                title = tr.add("th", valign="top", align="left")
-                title.adds("{0}:".format(k))
-                value = tr.add("td", align="left")
-                queue.insert(0, (value, v))
+        rel = data.get("rel", ref)
+        return iter([open_tag(mXml("a", href=ref)) + _text(rel) + "</a>"])
 
-            continue
+    return iter([_text(u'{0!s}'.format(data))])
 
-        element.adds(u'{0!s}'.format(data))
 
+def _build_data(data):
+    """
+    Generate the html fragments for data in a single pass.
+
+    Uses an explicit stack of part generators, so time is linear in the size
+    of data and memory only grows with the nesting depth.
+    """
+    stack = [_parts(data)]
+
+    while stack:
+        for part in stack[-1]:
+            if isinstance(part, _Node):
+                stack.append(_parts(part.data))
+                break
+
+            yield part
+        else:
+            stack.pop()
+
+
+def _build_document(obj, data):
+    yield "<html><head><title>Data</title></head><body><h1>"
+    yield _text("{0} ({1})".format(obj.object_type, type(obj).__name__))
+    yield "</h1>"
+
+    for part in _build_data(data):
+        yield part
 
+    yield "</body></html>"
+
+
+@builtin(__name__)
 class HtmlDocumentType(DocumentType):
     """
     Sneaky document type that attempt to build your sorry attempt of data into
     a html viewable structure.
     """
-    custom_mime = False
-    mime = "text/html"
 
-    def parse(self, validator, cls, string):
-        raise RuntimeError("parse not implemented")
+    # approximate size of the chunks produced by render_stream.
+    chunk_size = 16 * 1024
 
-    def render(self, validator, obj):
-        data = obj.to_data()
+    def serialize(self, obj, data):
+        return str("".join(_build_document(obj, data)))
 
+    def render_stream(self, validator, obj):
+        return self.serialize_stream(validator, obj, obj.to_data())
+
+    def serialize_stream(self, validator, obj, data):
         if validator:
             validator.validate(data)
 
-        html = mXml("html")
-        head = html.add("head")
-        title = head.add("title")
-        body = html.add("body")
-
-        title.adds("Data")
-
-        heading = body.add("h1")
-        heading.adds("{0} ({1})".format(obj.object_type, type(obj).__name__))
-
-        _build_data(body, data)
-
-        return str(html)
+        return chunked(_build_document(obj, data), self.chunk_size)
 
 
 __document_type__ = HtmlDocumentType
@@ -1,29 +1,288 @@
 from __future__ import absolute_import
 
 from mimeprovider.documenttype import DocumentType
+from mimeprovider.documenttype import builtin
+from mimeprovider.documenttype import chunked
 
+from mimeprovider.codec import DEFAULT_CODEC
+from mimeprovider.codec import get_codec
+from mimeprovider.document import has_json
+from mimeprovider.exceptions import MimeBadRequest
+
+import codecs
 import json
 
+# encoder used for scalar values while streaming, matches json.dumps.
+_encoder = json.JSONEncoder()
+
+# decoder used for the elements of incrementally decoded arrays.
+_decoder = json.JSONDecoder()
+
+# characters that can follow a complete value inside an array.
+_DELIMITERS = frozenset(u",]} \t\r\n")
+
+
+def _is_lazy(data):
+    """
+    Check if data is an iterable that is not already materialized, like a
+    generator returned from to_data().
+    """
+    if isinstance(data, (basestring, dict, list, tuple)):
+        return False
+    return hasattr(data, "__iter__")
+
+
+def _sequence(values):
+    prefix = ""
+
+    for value in values:
+        yield prefix, value
+        prefix = ", "
+
+
+def _mapping(data):
+    prefix = ""
+
+    for key, value in data.items():
+        if not isinstance(key, basestring):
+            key = _encoder.encode(key)
+
+        yield prefix + _encoder.encode(key) + ": ", value
+        prefix = ", "
+
+
+def iterencode(data):
+    """
+    Iteratively encode data into JSON fragments.
+
+    Produces the same output as json.dumps, but without recursion and with
+    support for generators and other iterators, which are encoded as arrays
+    while being consumed.
+    """
+    stack = [(_sequence([data]), None)]
+
+    while stack:
+        items, closing = stack[-1]
+
+        for prefix, value in items:
+            if isinstance(value, dict):
+                yield prefix + "{"
+                stack.append((_mapping(value), "}"))
+                break
+
+            if isinstance(value, (list, tuple)) or _is_lazy(value):
+                yield prefix + "["
+                stack.append((_sequence(value), "]"))
+                break
+
+            yield prefix + _encoder.encode(value)
+        else:
+            stack.pop()
+
+            if closing is not None:
+                yield closing
+
+
+def _decoded(items):
+    try:
+        for item in items:
+            yield item
+    except ValueError as e:
+        raise MimeBadRequest("Invalid JSON body: {0}".format(e))
+
+
+def _validated(validator, items):
+    for item in items:
+        validator.validate(item)
+        yield item
+
+
+class _ChunkReader(object):
+    """
+    Decodes JSON values one at a time from an iterable of encoded chunks.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decode = codecs.getincrementaldecoder("utf-8")().decode
+        self.buf = u""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, minimum=1):
+        data = list()
+        size = 0
+
+        while size < minimum:
+            try:
+                chunk = next(self.chunks)
+            except StopIteration:
+                data.append(self.decode("", True))
+                self.eof = True
+                break
+
+            chunk = self.decode(chunk)
+            data.append(chunk)
+            size += len(chunk)
+
+        self.buf = self.buf[self.pos:] + u"".join(data)
+        self.pos = 0
+
+    def peek(self):
+        """
+        Skip whitespace and return the next character, or an empty string at
+        the end of input.
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
 
+            self.fill()
+
+    def expect(self, characters):
+        c = self.peek()
+
+        if not c or c not in characters:
+            raise ValueError(
+                "Expected one of {0!r} but got {1!r}".format(characters, c))
+
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self.eof:
+                    raise
+
+                # grow the buffer geometrically to keep large values linear.
+                self.fill(max(1, len(self.buf) - self.pos))
+                continue
+
+            # numbers might continue in the next chunk, so a value is only
+            # complete when followed by a delimiter.
+            if not self.eof and self.buf[end:end + 1] not in _DELIMITERS:
+                self.fill()
+                continue
+
+            self.pos = end
+            return value
+
+
+def iterdecode(chunks):
+    """
+    Incrementally decode the elements of a top-level JSON array from an
+    iterable of utf-8 encoded chunks.
+    """
+    reader = _ChunkReader(chunks)
+    reader.expect("[")
+
+    if reader.peek() == "]":
+        reader.pos += 1
+    else:
+        while True:
+            yield reader.value()
+
+            if reader.expect(",]") == "]":
+                break
+
+    if reader.peek():
+        raise ValueError("Extra data after JSON array")
+
+
+@builtin(__name__)
 class JsonDocumentType(DocumentType):
     """
     A clever document type that sets up specific MIME depending on the
     available documents.
+
+    Whole bodies are encoded and decoded with the configured codec.  Streamed
+    bodies, see render_stream and parse_stream, always go through iterencode
+    and iterdecode, which use the json module of the standard library.
     """
-    custom_mime = True
-    mime = "application/{o.object_type}+json"
 
-    def parse(self, validator, cls, string):
-        data = json.loads(string)
-        if validator:
-            validator.validate(data)
-        return cls.from_data(data)
+    # approximate size of the chunks produced by render_stream.
+    chunk_size = 16 * 1024
+
+    def __init__(self, codec=None):
+        self.codec = get_codec(codec)
+
+    def deserialize(self, string):
+        return self.codec.loads(string)
 
     def render(self, validator, obj):
-        data = obj.to_data()
+        # generated documents encode themselves exactly like json.dumps,
+        # skipping the intermediate data as long as it is not validated.
+        if validator is None and has_json(obj) and \
+                self.codec.name == DEFAULT_CODEC:
+            return obj.to_json()
+
+        return super(JsonDocumentType, self).render(validator, obj)
+
+    def parse_stream(self, validator, cls, chunks):
+        """
+        Parse a top-level array from an iterable of chunks and hand the
+        elements to cls.from_data_iter while they are being decoded.
+
+        If the schema cannot be checked one element at a time, the array is
+        collected and validated as a whole before it is handed over.  Bodies
+        that are not a JSON array raise MimeBadRequest.
+        """
+        items = _decoded(iterdecode(chunks))
+
         if validator:
-            validator.validate(obj.__class__, data)
-        return json.dumps(data)
+            item_validator = None
+
+            if hasattr(validator, "item_validator"):
+                item_validator = validator.item_validator()
+
+            if item_validator is not None:
+                items = _validated(item_validator, items)
+            else:
+                items = list(items)
+                validator.validate(items)
+
+        return cls.from_data_iter(items)
+
+    def serialize(self, obj, data):
+        if _is_lazy(data):
+            data = list(data)
+
+        return self.codec.dumps(data)
+
+    def render_stream(self, validator, obj):
+        return self.serialize_stream(validator, obj, obj.to_data())
+
+    def serialize_stream(self, validator, obj, data):
+        """
+        Encode data as an iterable of encoded chunks.
+
+        Lazy iterables returned from to_data() are consumed while encoding
+        and, if the schema allows it, validated one element at a time.
+        Anything else is validated before the first chunk is produced.
+        """
+        if validator:
+            item_validator = None
+
+            if _is_lazy(data) and hasattr(validator, "item_validator"):
+                item_validator = validator.item_validator()
+
+            if item_validator is not None:
+                data = _validated(item_validator, data)
+            else:
+                if _is_lazy(data):
+                    data = list(data)
+
+                validator.validate(data)
+
+        return chunked(iterencode(data), self.chunk_size)
 
 
 __document_type__ = JsonDocumentType
@@ -0,0 +1,37 @@
+from __future__ import absolute_import
+
+from mimeprovider.documenttype import DocumentType
+from mimeprovider.documenttype import builtin
+
+from mimeprovider.codec import get_codec
+from mimeprovider.mergepatch import MergePatch
+
+
+@builtin(__name__)
+class MergePatchDocumentType(DocumentType):
+    """
+    JSON merge patches of documents.
+
+    Parsing gives a MergePatch to apply to the target document, rendering
+    a document gives a patch replacing all of its members.  Patches parsed
+    by a provider are validated when they are applied, those parsed
+    here are not.
+    """
+
+    # bodies are parsed into patches instead of documents.
+    merge_patch = True
+
+    def __init__(self, codec=None):
+        self.codec = get_codec(codec)
+
+    def parse(self, validator, cls, string):
+        return MergePatch(cls, self.deserialize(string))
+
+    def deserialize(self, string):
+        return self.codec.loads(string)
+
+    def serialize(self, obj, data):
+        return self.codec.dumps(data)
+
+
+__document_type__ = MergePatchDocumentType
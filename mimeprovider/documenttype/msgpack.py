@@ -0,0 +1,23 @@
+from __future__ import absolute_import
+
+from mimeprovider.documenttype import DocumentType
+from mimeprovider.documenttype import builtin
+
+from mimeprovider.packages import msgpack
+
+
+@builtin(__name__)
+class MsgpackDocumentType(DocumentType):
+    """
+    Compact binary MessagePack documents, using the in-tree encoder and
+    decoder.
+    """
+
+    def deserialize(self, string):
+        return msgpack.unpackb(string)
+
+    def serialize(self, obj, data):
+        return msgpack.packb(data)
+
+
+__document_type__ = MsgpackDocumentType
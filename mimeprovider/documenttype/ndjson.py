@@ -0,0 +1,181 @@
+"""
+Newline delimited JSON, every line is a single document.
+
+The type is not one of the default document types, providers opt in with
+
+    MimeProvider(documents, types=get_default_document_types() + [
+        get_document_type("mimeprovider.documenttype.ndjson")])
+"""
+from __future__ import absolute_import
+
+from mimeprovider.documenttype import DocumentType
+from mimeprovider.documenttype import builtin
+
+from mimeprovider.codec import get_codec
+from mimeprovider.exceptions import MimeBadRequest
+
+__all__ = ["NdjsonDocumentType", "Stream"]
+
+
+class Stream(object):
+    """
+    Wraps an iterable of documents of cls to be rendered one line at a time,
+    objects are only pulled from the iterable while the response is written.
+    """
+
+    def __init__(self, cls, objects):
+        self.cls = cls
+        self.objects = objects
+        self.object_type = cls.object_type
+
+    def to_data(self):
+        return (obj.to_data() for obj in self.objects)
+
+
+def iterlines(chunks):
+    """
+    Split an iterable of chunks into lines, without the line endings.
+    """
+    buf = list()
+
+    for chunk in chunks:
+        start = 0
+
+        while True:
+            end = chunk.find(b"\n", start)
+
+            if end == -1:
+                break
+
+            buf.append(chunk[start:end])
+            yield b"".join(buf)
+            buf = list()
+            start = end + 1
+
+        if start < len(chunk):
+            buf.append(chunk[start:])
+
+    if buf:
+        yield b"".join(buf)
+
+
+def line_validator(validator):
+    """
+    The validator for a single line.
+
+    Lines of array schemas are validated against the schema of the
+    elements.  Keywords about the array as a whole, like maxItems, cannot
+    be checked one line at a time and are ignored.  Lines of any other
+    schema are the document itself.
+    """
+    if not validator:
+        return None
+
+    schema = getattr(validator, "schema", None)
+
+    if not isinstance(schema, dict) or schema.get("type") != "array":
+        return validator
+
+    item_validator = None
+
+    if hasattr(validator, "item_validator"):
+        item_validator = validator.item_validator(partial=True)
+
+    if item_validator is None:
+        raise ValueError(
+            "Lines of array schemas without a single items schema cannot be "
+            "validated")
+
+    return item_validator
+
+
+@builtin(__name__)
+class NdjsonDocumentType(DocumentType):
+    """
+    Renders the elements of a collection, or a single document, as one JSON
+    document per line.  Validation happens one line at a time, see
+    line_validator.
+    """
+
+    # approximate size of the chunks produced by render_stream.
+    chunk_size = 16 * 1024
+
+    def __init__(self, codec=None):
+        self.codec = get_codec(codec)
+
+    def _encode(self, data):
+        line = self.codec.dumps(data)
+
+        if isinstance(line, unicode):
+            line = line.encode("utf-8")
+
+        return line + b"\n"
+
+    def _items(self, data):
+        if isinstance(data, dict):
+            return [data]
+        return data
+
+    def render(self, validator, obj):
+        return b"".join(self.render_stream(validator, obj))
+
+    def parse(self, validator, cls, string):
+        return list(self.parse_stream(validator, cls, [string]))
+
+    def deserialize(self, string):
+        return [self.codec.loads(line) for line in iterlines([string])
+                if line.strip()]
+
+    def parse_stream(self, validator, cls, chunks):
+        """
+        Lazily parse every non-empty line into an instance of cls.
+        """
+        validator = line_validator(validator)
+
+        for number, line in enumerate(iterlines(chunks), 1):
+            if not line.strip():
+                continue
+
+            try:
+                data = self.codec.loads(line)
+            except ValueError as e:
+                raise MimeBadRequest("Line {0}: {1}".format(number, e))
+
+            if validator:
+                validator.validate(data)
+
+            yield cls.from_data(data)
+
+    def serialize(self, obj, data):
+        return b"".join(self._encode(item) for item in self._items(data))
+
+    def render_stream(self, validator, obj):
+        return self.serialize_stream(validator, obj, obj.to_data())
+
+    def serialize_stream(self, validator, obj, data):
+        """
+        Encode data as an iterable of encoded chunks, validating and
+        encoding one element at a time.
+        """
+        validator = line_validator(validator)
+        buf = list()
+        size = 0
+
+        for item in self._items(data):
+            if validator:
+                validator.validate(item)
+
+            line = self._encode(item)
+            buf.append(line)
+            size += len(line)
+
+            if size >= self.chunk_size:
+                yield b"".join(buf)
+                buf = list()
+                size = 0
+
+        if buf:
+            yield b"".join(buf)
+
+
+__document_type__ = NdjsonDocumentType
@@ -0,0 +1,147 @@
+"""
+Content-Encoding support, gzip and deflate compression of bodies and
+Accept-Encoding negotiation.
+
+Compression and decompression work on iterables of chunks so large bodies
+are never held twice in memory.
+"""
+import zlib
+
+from mimeprovider.exceptions import MimeBadRequest
+from mimeprovider.exceptions import MimeRequestEntityTooLarge
+
+# supported encodings, in order of preference for equal qualities.
+ENCODINGS = ("gzip", "deflate")
+
+DEFAULT_LEVEL = 6
+
+# bodies smaller than this are not worth compressing.
+DEFAULT_THRESHOLD = 1024
+
+# size of the decompressed pieces produced while inflating.
+INFLATE_SIZE = 64 * 1024
+
+_ALIASES = {
+    "x-gzip": "gzip",
+}
+
+_WBITS = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+
+
+def negotiate_encoding(header, encodings=ENCODINGS):
+    """
+    Pick the best of encodings for an Accept-Encoding header, or None if
+    the body should not be encoded.
+    """
+    if not header:
+        return None
+
+    qualities = dict()
+
+    for item in header.split(","):
+        parts = item.split(";")
+        coding = parts[0].strip().lower()
+
+        if not coding:
+            continue
+
+        quality = 1.0
+
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+
+            if key.strip().lower() != "q":
+                continue
+
+            try:
+                quality = float(value.strip())
+            except ValueError:
+                quality = 0.0
+
+        qualities[_ALIASES.get(coding, coding)] = quality
+
+    best = None
+    best_quality = 0.0
+
+    for encoding in encodings:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+
+        if quality > best_quality:
+            best = encoding
+            best_quality = quality
+
+    return best
+
+
+def is_supported(encoding):
+    return _ALIASES.get(encoding, encoding) in _WBITS
+
+
+def compress(body, encoding, level=DEFAULT_LEVEL):
+    """
+    Compress a complete body.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_stream(chunks, encoding, level=DEFAULT_LEVEL):
+    """
+    Compress an iterable of chunks.
+
+    Every chunk is flushed so that the receiving end can decode the stream
+    incrementally.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield compressor.flush()
+
+
+def decompress_stream(chunks, encoding, max_size=None):
+    """
+    Decompress an iterable of chunks.
+
+    Raises MimeRequestEntityTooLarge as soon as the decompressed size exceeds
+    max_size and MimeBadRequest if the data is corrupt.
+    """
+    encoding = _ALIASES.get(encoding, encoding)
+    decompressor = zlib.decompressobj(_WBITS[encoding])
+    size = 0
+
+    try:
+        for chunk in chunks:
+            while chunk:
+                data = decompressor.decompress(chunk, INFLATE_SIZE)
+                chunk = decompressor.unconsumed_tail
+                size += len(data)
+
+                if max_size is not None and size > max_size:
+                    raise MimeRequestEntityTooLarge(
+                        "Decompressed body larger than {0} bytes".format(
+                            max_size))
+
+                if data:
+                    yield data
+
+        data = decompressor.flush()
+    except zlib.error as e:
+        raise MimeBadRequest(
+            "Invalid {0} encoded body: {1}".format(encoding, e))
+
+    size += len(data)
+
+    if max_size is not None and size > max_size:
+        raise MimeRequestEntityTooLarge(
+            "Decompressed body larger than {0} bytes".format(max_size))
+
+    if data:
+        yield data
@@ -15,3 +15,18 @@ class MimeValidationError(MimeException):
 
 class MimeInternalServerError(MimeException):
     pass
+
+
+class MimeRequestEntityTooLarge(MimeException):
+    status_code = 413
+    title = "Request Entity Too Large"
+
+
+class MimeNotAcceptable(MimeBadRequest):
+    status_code = 406
+    title = "Not Acceptable"
+
+
+class MimeUnsupportedMediaType(MimeBadRequest):
+    status_code = 415
+    title = "Unsupported Media Type"
@@ -0,0 +1,213 @@
+"""
+Sparse fieldsets, rendering only the fields a client asked for.
+
+Fields are requested with a comma separated 'fields' query parameter,
+
+    GET /items/1?fields=name,count
+
+or with a 'fields' parameter on the Accept media range, separated by
+spaces since commas separate the media ranges,
+
+    Accept: application/item+json; fields="name count"
+
+Documents whose to_data takes a 'fields' argument get the requested fields
+and can skip computing the others.  The data is projected to the fields in
+any case, before it is validated against a schema projected the same way
+and serialized.  Objects are projected to their top-level fields, arrays
+and streams of objects element by element.
+"""
+import functools
+import inspect
+import re
+import threading
+
+from mimeprovider.cache import LRUCache
+from mimeprovider.validators import LazyValidator
+from mimeprovider.validators import ValidatorCache
+
+FIELDS_PARAM = "fields"
+
+DEFAULT_CACHE_SIZE = 256
+
+_SEPARATORS = re.compile(r"[,\s]+")
+
+_accepts = dict()
+_lock = threading.Lock()
+
+
+def parse_fields(value):
+    """
+    Parse a list of fields, or None if there are none.
+    """
+    fields = frozenset(f for f in _SEPARATORS.split(value) if f)
+    return fields or None
+
+
+def _accept_param(header, param):
+    for item in header.split(","):
+        for part in item.split(";")[1:]:
+            key, _, value = part.partition("=")
+
+            if key.strip().lower() != param:
+                continue
+
+            value = value.strip()
+
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+
+            return value
+
+    return None
+
+
+def requested_fields(request, param=FIELDS_PARAM):
+    """
+    The fields requested through the query string or the Accept header, or
+    None for all fields.
+    """
+    value = request.GET.get(param)
+
+    if value is None:
+        header = request.headers.get("Accept")
+
+        if not header or param not in header:
+            return None
+
+        value = _accept_param(header, param)
+
+        if value is None:
+            return None
+
+    return parse_fields(value)
+
+
+def accepts_fields(cls):
+    """
+    Check if the to_data of documents of cls takes a 'fields' argument.
+    """
+    result = _accepts.get(cls)
+
+    if result is not None:
+        return result
+
+    try:
+        spec = inspect.getargspec(cls.to_data)
+        result = "fields" in spec.args or spec.keywords is not None
+    except TypeError:
+        result = False
+
+    with _lock:
+        _accepts[cls] = result
+
+    return result
+
+
+def to_data(obj, fields):
+    if accepts_fields(type(obj)):
+        return obj.to_data(fields=fields)
+
+    return obj.to_data()
+
+
+def _project_items(items, fields):
+    for item in items:
+        yield project(item, fields)
+
+
+def project(data, fields):
+    """
+    Project data to fields, lazy iterables are projected while they are
+    consumed.
+    """
+    if isinstance(data, dict):
+        return dict((k, v) for k, v in data.items() if k in fields)
+
+    if isinstance(data, list):
+        return [project(item, fields) for item in data]
+
+    if isinstance(data, tuple):
+        return tuple(project(item, fields) for item in data)
+
+    if hasattr(data, "__iter__") and not isinstance(data, basestring):
+        return _project_items(data, fields)
+
+    return data
+
+
+def project_schema(schema, fields):
+    """
+    Project an object schema, or an array schema of objects, to fields.
+    """
+    if not isinstance(schema, dict):
+        return schema
+
+    projected = dict(schema)
+
+    if "properties" in schema:
+        projected["properties"] = dict(
+            (k, v) for k, v in schema["properties"].items() if k in fields)
+
+        required = schema.get("required")
+
+        if isinstance(required, (list, tuple)):
+            projected["required"] = [f for f in required if f in fields]
+
+            # draft 4 does not allow an empty list.
+            if not projected["required"]:
+                del projected["required"]
+
+    if isinstance(schema.get("items"), dict):
+        projected["items"] = project_schema(schema["items"], fields)
+
+    return projected
+
+
+def schema_properties(schema):
+    """
+    The property names project_schema can select from schema.
+    """
+    if not isinstance(schema, dict):
+        return frozenset()
+
+    properties = frozenset(schema.get("properties") or ())
+    return properties | schema_properties(schema.get("items"))
+
+
+class Projector(object):
+    """
+    Compiles and caches the validators of projected schemas.
+
+    Fields are chosen by clients, so the projected validators are compiled
+    with the factory of validators and only kept in the bounded cache,
+    never in the shared ValidatorCache.  Fields that are not properties of
+    the schema do not make a new projection.
+    """
+
+    def __init__(self, validators=None, cache_size=DEFAULT_CACHE_SIZE):
+        if validators is None:
+            validators = ValidatorCache(
+                functools.partial(LazyValidator, None))
+
+        self.validators = validators
+        self.cache = LRUCache(cache_size)
+
+    def validator(self, document, fields):
+        """
+        The validator for the fields of document, or None if it has no
+        schema.
+        """
+        schema = getattr(document, "schema", None)
+
+        if schema is None:
+            return None
+
+        fields = frozenset(fields) & schema_properties(schema)
+        key = (document, fields)
+        validator = self.cache.get(key)
+
+        if validator is None:
+            validator = self.validators.factory(project_schema(schema, fields))
+            self.cache.set(key, validator)
+
+        return validator
@@ -0,0 +1,145 @@
+"""
+Per-phase timing of rendering and parsing.
+
+The renderer and MimeProvider.get_mime_body report the duration of every
+phase ('negotiate', 'to_data', 'validate', 'serialize', 'error_handler',
+'read', 'decode', 'from_data' and 'parse') to an instrumentation object,
+labeled with the document class and mimetype.  The default does nothing and
+is checked once per phase through 'enabled', so it costs next to nothing.
+"""
+import logging
+import sys
+import threading
+
+from timeit import default_timer as clock
+
+log = logging.getLogger(__name__)
+
+# upper bounds in seconds of the histogram buckets.
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+
+class Instrumentation(object):
+    """
+    Base class and no-op default for instrumentation.
+    """
+    # should phases be timed at all?
+    enabled = False
+
+    def record(self, phase, duration, size=None, document=None,
+               mimetype=None):
+        pass
+
+
+class Histogram(object):
+    __slots__ = ("buckets", "counts", "count", "total", "min", "max", "size")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.size = 0
+
+    def add(self, duration, size):
+        for i, bound in enumerate(self.buckets):
+            if duration <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+
+        self.count += 1
+        self.total += duration
+
+        if self.min is None or duration < self.min:
+            self.min = duration
+
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+        if size is not None:
+            self.size += size
+
+    def to_data(self):
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "size": self.size,
+        }
+
+
+class HistogramInstrumentation(Instrumentation):
+    """
+    Aggregates durations and output sizes in process, per phase, document
+    class and mimetype.
+    """
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms = dict()
+        self._lock = threading.Lock()
+
+    def record(self, phase, duration, size=None, document=None,
+               mimetype=None):
+        key = (phase, document, mimetype)
+
+        with self._lock:
+            histogram = self.histograms.get(key)
+
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+
+            histogram.add(duration, size)
+
+    def snapshot(self):
+        with self._lock:
+            result = list()
+
+            for (phase, document, mimetype), histogram in sorted(
+                    self.histograms.items()):
+                entry = histogram.to_data()
+                entry.update(phase=phase, document=document,
+                             mimetype=mimetype)
+                result.append(entry)
+
+            return result
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+
+class CallbackInstrumentation(Instrumentation):
+    """
+    Hands every measurement to a callback, for example to feed a metrics
+    pipeline.
+
+    The callback is called as callback(phase, duration, size=..., document=...,
+    mimetype=...), errors are logged and never fail the request.
+    """
+    enabled = True
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def record(self, phase, duration, size=None, document=None,
+               mimetype=None):
+        try:
+            self.callback(phase, duration, size=size, document=document,
+                          mimetype=mimetype)
+        except Exception:
+            log.error("instrumentation callback failed",
+                      exc_info=sys.exc_info())
+
+
+NOOP = Instrumentation()
@@ -0,0 +1,141 @@
+"""
+JSON merge patches (RFC 7396) of document data.
+
+A merge patch holds only the changed members of an object, null removes a
+member and nested objects are merged recursively, anything else replaces
+the value.  Patches are sent with the merge-patch document type,
+
+    response, obj = client.get("/items/1")
+    original = copy.deepcopy(obj.to_data())
+    obj.name = "renamed"
+    client.patch("/items/1", original, obj)
+
+Patches between two to_data() snapshots need the document class,
+
+    client.patch("/items/1", original, modified, document=Item)
+
+and applied by the view to the document they change,
+
+    def update_item(request):
+        item = request.mime_body.apply(load_item(request))
+
+Members cannot be set to null with a merge patch, a null in the modified
+data removes the member.
+"""
+from mimeprovider.exceptions import MimeBadRequest
+
+# structured syntax suffix of merge patch mimetypes.
+SUFFIX = "+merge-patch+json"
+
+
+def apply_patch(target, patch):
+    """
+    Apply a merge patch to target data, returning the new data without
+    modifying target.
+    """
+    if not isinstance(patch, dict):
+        return patch
+
+    if isinstance(target, dict):
+        result = dict(target)
+    else:
+        result = dict()
+
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_patch(result.get(key), value)
+
+    return result
+
+
+def make_patch(original, modified):
+    """
+    The minimal merge patch turning original data into modified data.
+    """
+    if not isinstance(original, dict) or not isinstance(modified, dict):
+        return modified
+
+    patch = dict()
+
+    for key in original:
+        if key not in modified:
+            patch[key] = None
+
+    for key, value in modified.items():
+        if key not in original:
+            patch[key] = value
+        elif original[key] != value:
+            patch[key] = make_patch(original[key], value)
+
+    return patch
+
+
+def _data(document):
+    if hasattr(document, "to_data"):
+        return document.to_data()
+
+    return document
+
+
+class MergePatch(object):
+    """
+    A merge patch for documents of cls.
+
+    Applying a patch validates the changed members of the result against
+    the schema of cls projected to them, with the validators of projector,
+    a mimeprovider.fields.Projector.  Patches without a projector are not
+    validated.
+    """
+
+    def __init__(self, cls, patch, projector=None):
+        if not isinstance(patch, dict):
+            raise MimeBadRequest("A merge patch must be an object")
+
+        self.cls = cls
+        self.patch = patch
+        self.projector = projector
+
+    @classmethod
+    def diff(cls, original, modified, document=None):
+        """
+        The patch between two documents or to_data() snapshots.
+
+        The patch is for documents of the class of modified, snapshots are
+        plain data and need the document class.
+        """
+        if document is None:
+            if isinstance(modified, dict):
+                raise ValueError(
+                    "The document class of a patch between snapshots is "
+                    "required")
+
+            document = type(modified)
+
+        return cls(document, make_patch(_data(original), _data(modified)))
+
+    @property
+    def object_type(self):
+        return self.cls.object_type
+
+    def to_data(self):
+        return self.patch
+
+    def apply(self, target):
+        """
+        Apply the patch to a document, or its data, returning a new
+        document.
+        """
+        data = apply_patch(_data(target), self.patch)
+
+        if self.projector is not None:
+            changed = dict((k, v) for k, v in data.items()
+                           if k in self.patch)
+            validator = self.projector.validator(self.cls,
+                                                 frozenset(self.patch))
+
+            if validator is not None:
+                validator.validate(changed)
+
+        return self.cls.from_data(data)
@@ -2,26 +2,88 @@ import sys
 import logging
 
 from mimeprovider.exceptions import MimeBadRequest
+from mimeprovider.exceptions import MimeException
 from mimeprovider.exceptions import MimeInternalServerError
 
+from mimeprovider.encoding import DEFAULT_LEVEL
+from mimeprovider.encoding import DEFAULT_THRESHOLD
+from mimeprovider.encoding import ENCODINGS
+from mimeprovider.encoding import compress
+from mimeprovider.encoding import compress_stream
+from mimeprovider.encoding import negotiate_encoding
+from mimeprovider.fields import FIELDS_PARAM
+from mimeprovider.fields import Projector
+from mimeprovider.fields import project
+from mimeprovider.fields import requested_fields
+from mimeprovider.fields import to_data
+from mimeprovider.instrumentation import NOOP
+from mimeprovider.instrumentation import clock
+from mimeprovider.negotiation import Negotiator
+from mimeprovider.validation import ValidationPolicy
+
 log = logging.getLogger(__name__)
 
+# environ key recording the rendered document class and mimetype.
+RENDERED_KEY = "mimeprovider.rendered"
+
 
 class MimeRenderer(object):
     def __init__(self, mimetypes, error_document_type, error_handler, **kw):
         self.mimetypes = mimetypes
         self.error_document_type = error_document_type
         self.error_handler = error_handler
+        self.negotiator = kw.get("negotiator")
+        self.stream = kw.get("stream", False)
+        self.render_cache = kw.get("render_cache")
+        self.instrumentation = kw.get("instrumentation", NOOP)
+        self.compress = kw.get("compress", False)
+        self.compress_threshold = kw.get("compress_threshold",
+                                         DEFAULT_THRESHOLD)
+        self.compress_level = kw.get("compress_level", DEFAULT_LEVEL)
+        self.validation_policy = kw.get("validation_policy")
+
+        # query and Accept parameter selecting sparse fieldsets, None to
+        # always render every field.
+        self.fields_param = kw.get("fields_param", FIELDS_PARAM)
+        self.projector = kw.get("projector") or \
+            Projector(kw.get("validators"))
+
+        if self.validation_policy is None:
+            self.validation_policy = ValidationPolicy()
+
+        if self.negotiator is None:
+            self.negotiator = Negotiator(mimetypes)
 
-    def _render(self, obj, request):
-        mime = request.accept.best_match(self.mimetypes)
+    def _render(self, obj, request, error=False):
+        instrumentation = self.instrumentation
 
-        if mime is None:
+        if instrumentation.enabled:
+            start = clock()
+
+        match = self.negotiator.negotiate(request.headers.get("Accept"))
+
+        if match is None:
             raise MimeBadRequest(
                 "Unable to provide response for Accept: " +
                 str(request.accept))
 
-        document_type, _, validator = self.mimetypes[mime]
+        mime, (document_type, document, validator) = match
+        fields = None
+
+        # error documents are always rendered whole.
+        if self.fields_param is not None and not error:
+            fields = requested_fields(request, self.fields_param)
+
+        if fields is not None:
+            validator = self.projector.validator(document, fields)
+
+        validator = self.validation_policy.outbound(validator, document)
+        request.environ[RENDERED_KEY] = (type(obj).__name__, mime)
+
+        if instrumentation.enabled:
+            instrumentation.record("negotiate", clock() - start,
+                                   document=type(obj).__name__,
+                                   mimetype=mime)
 
         if not hasattr(obj, "to_data"):
             log.error("Object missing 'to_data' attribute {0!r}".format(obj))
@@ -29,13 +91,160 @@ class MimeRenderer(object):
                 "Cannot render requested resource: {0!r}".format(obj))
 
         request.response.content_type = document_type.get_mimetype(obj)
-        return document_type.render(validator, obj)
+
+        # streaming document types and sparse fieldsets are never cached.
+        if self.render_cache is not None and hasattr(obj, "cache_key") and \
+                request.response.status_int == 200 and fields is None and \
+                not getattr(document_type, "streaming", False):
+            return self._render_cached(mime, document_type, validator, obj,
+                                       request)
+
+        if getattr(document_type, "streaming", False) or \
+                (self.stream and hasattr(document_type, "render_stream")):
+            request.response.app_iter = self._serialize_stream(
+                mime, document_type, validator, obj, fields)
+            return None
+
+        return self._serialize(mime, document_type, validator, obj, fields)
+
+    def _to_data(self, obj, fields):
+        if fields is None:
+            return obj.to_data()
+
+        return project(to_data(obj, fields), fields)
+
+    def _serialize(self, mime, document_type, validator, obj, fields=None):
+        """
+        Render obj into a body, timing every phase if instrumented.
+        """
+        instrumentation = self.instrumentation
+
+        if not instrumentation.enabled or \
+                not hasattr(document_type, "serialize"):
+            if fields is None:
+                return document_type.render(validator, obj)
+
+            data = self._to_data(obj, fields)
+
+            if validator:
+                validator.validate(data)
+
+            return document_type.serialize(obj, data)
+
+        labels = dict(document=type(obj).__name__, mimetype=mime)
+
+        start = clock()
+        data = self._to_data(obj, fields)
+        instrumentation.record("to_data", clock() - start, **labels)
+
+        if validator:
+            start = clock()
+            validator.validate(data)
+            instrumentation.record("validate", clock() - start, **labels)
+
+        start = clock()
+        body = document_type.serialize(obj, data)
+        instrumentation.record("serialize", clock() - start, size=len(body),
+                               **labels)
+
+        return body
+
+    def _serialize_stream(self, mime, document_type, validator, obj,
+                          fields=None):
+        """
+        Render obj into chunks, timing every phase if instrumented.
+
+        Validation that happens one element at a time is part of the
+        'serialize' phase, which is recorded once all chunks are consumed.
+        """
+        instrumentation = self.instrumentation
+
+        if not instrumentation.enabled or \
+                not hasattr(document_type, "serialize_stream"):
+            if fields is None:
+                return document_type.render_stream(validator, obj)
+
+            return document_type.serialize_stream(
+                validator, obj, self._to_data(obj, fields))
+
+        labels = dict(document=type(obj).__name__, mimetype=mime)
+
+        start = clock()
+        data = self._to_data(obj, fields)
+        instrumentation.record("to_data", clock() - start, **labels)
+
+        start = clock()
+        chunks = document_type.serialize_stream(validator, obj, data)
+
+        if validator:
+            instrumentation.record("validate", clock() - start, **labels)
+
+        return self._measured(chunks, labels)
+
+    def _measured(self, chunks, labels):
+        chunks = iter(chunks)
+        duration = 0.0
+        size = 0
+
+        while True:
+            start = clock()
+
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                duration += clock() - start
+
+            size += len(chunk)
+            yield chunk
+
+        self.instrumentation.record("serialize", duration, size=size,
+                                    **labels)
+
+    def _render_cached(self, mime, document_type, validator, obj, request):
+        """
+        Render through the render cache, answering conditional requests
+        without rendering at all.
+        """
+        key = self.render_cache.key(mime, obj)
+        etag = self.render_cache.etag(key)
+
+        response = request.response
+        response.etag = etag
+
+        # compressed responses carry the encoding in their etag.
+        etags = [etag] + ["{0}-{1}".format(etag, e) for e in ENCODINGS]
+
+        if request.method in ("GET", "HEAD") and \
+                any(e in request.if_none_match for e in etags):
+            response.status_int = 304
+            return ""
+
+        body = self.render_cache.get(key)
+
+        if body is None:
+            body = self._serialize(mime, document_type, validator, obj)
+            self.render_cache.set(key, body)
+
+        return body
 
     def _render_error(self, exc, request):
+        instrumentation = self.instrumentation
+
+        if instrumentation.enabled:
+            start = clock()
+
         error = self.error_handler(exc, request)
-        request.response.content_type = \
-            self.error_document_type.get_mimetype(error)
-        return self.error_document_type.render(None, error)
+        mime = self.error_document_type.get_mimetype(error)
+
+        if instrumentation.enabled:
+            instrumentation.record("error_handler", clock() - start,
+                                   document=type(error).__name__,
+                                   mimetype=mime)
+
+        request.response.content_type = mime
+        return self._serialize(mime, self.error_document_type, None, error)
 
     def __call__(self, obj, system):
         request = system.get("request")
@@ -43,8 +252,55 @@ class MimeRenderer(object):
         if request is None:
             return ""
 
+        error = isinstance(system.get("context"), MimeException)
+
         try:
-            return self._render(obj, request)
+            body = self._render(obj, request, error)
         except MimeBadRequest as exc:
             log.error("error during render", exc_info=sys.exc_info())
-            return self._render_error(exc, request)
+            body = self._render_error(exc, request)
+
+        if not self.compress:
+            return body
+
+        return self._compress(body, request)
+
+    def _compress(self, body, request):
+        """
+        Apply the Content-Encoding negotiated from Accept-Encoding.
+
+        Streamed responses are compressed chunk by chunk, other bodies only
+        if they are at least compress_threshold bytes.
+        """
+        response = request.response
+        vary = tuple(response.vary or ())
+
+        if "Accept-Encoding" not in vary:
+            response.vary = vary + ("Accept-Encoding",)
+
+        if response.content_encoding or response.status_int == 304:
+            return body
+
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+
+        if encoding is None:
+            return body
+
+        if body is None:
+            response.app_iter = compress_stream(response.app_iter, encoding,
+                                                self.compress_level)
+        else:
+            if isinstance(body, unicode):
+                body = body.encode(response.charset or "utf-8")
+
+            if len(body) < self.compress_threshold:
+                return body
+
+            body = compress(body, encoding, self.compress_level)
+
+        response.content_encoding = encoding
+
+        if response.etag:
+            response.etag = "{0}-{1}".format(response.etag, encoding)
+
+        return body
@@ -0,0 +1,185 @@
+"""
+Accept header negotiation against the registered mimetypes.
+
+Negotiation follows the same rules as webob's ``MIMEAccept.best_match``: the
+highest quality wins, ties go to the most specific media range and then to
+the first registered mimetype.  Instead of scanning every registered mimetype
+for every media range, the candidates are looked up in an index grouped by
+type, subtype and wildcard, and resolved headers are kept in a bounded LRU
+cache keyed by the raw header value.
+"""
+from mimeprovider.cache import LRUCache
+
+DEFAULT_CACHE_SIZE = 256
+
+_MISSING = object()
+
+
+def parse_accept(header):
+    """
+    Parse an Accept header into a list of (mask, quality) tuples.
+
+    Media ranges with a quality of zero or an invalid quality are skipped.
+    """
+    result = list()
+
+    for item in header.split(","):
+        parts = item.split(";")
+        mask = parts[0].strip().lower()
+
+        if not mask:
+            continue
+
+        quality = 1.0
+
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+
+            if key.strip().lower() != "q":
+                continue
+
+            try:
+                quality = float(value.strip())
+            except ValueError:
+                quality = 0.0
+
+        if quality <= 0:
+            continue
+
+        result.append((mask, quality))
+
+    return result
+
+
+def parse_content_type(header):
+    """
+    Parse a Content-Type header into its mimetype and a dict of its
+    parameters, parameter names are lowercased.
+    """
+    parts = header.split(";")
+    mimetype = parts[0].strip()
+    params = dict()
+
+    for param in parts[1:]:
+        key, _, value = param.partition("=")
+        key = key.strip().lower()
+
+        if not key:
+            continue
+
+        value = value.strip()
+
+        if len(value) >= 2 and value[0] == value[-1] == '"':
+            value = value[1:-1].replace('\\"', '"')
+
+        params[key] = value
+
+    return mimetype, params
+
+
+class NegotiationIndex(object):
+    """
+    Precomputed lookup tables from media ranges to the first matching
+    mimetype in registration order.
+    """
+
+    def __init__(self, mimetypes):
+        self.offers = list(mimetypes)
+        self.exact = dict()
+        self.by_type = dict()
+        self.by_subtype = dict()
+
+        for position, mime in enumerate(self.offers):
+            mime = mime.lower()
+            type_, _, subtype = mime.partition("/")
+            self.exact.setdefault(mime, position)
+            self.by_type.setdefault(type_, position)
+            self.by_subtype.setdefault(subtype, position)
+
+    def _lookup(self, mask):
+        if mask == "*/*":
+            return 0 if self.offers else None
+
+        type_, _, subtype = mask.partition("/")
+
+        if not subtype or subtype == "*":
+            return self.by_type.get(type_)
+
+        if type_ == "*":
+            return self.by_subtype.get(subtype)
+
+        return self.exact.get(mask)
+
+    def best_match(self, header):
+        """
+        Find the best matching mimetype for the raw Accept header, or None.
+
+        A missing header accepts anything, so the first mimetype is returned.
+        """
+        if header is None:
+            return self.offers[0] if self.offers else None
+
+        best = None
+
+        for mask, quality in parse_accept(header):
+            position = self._lookup(mask)
+
+            if position is None:
+                continue
+
+            rank = (quality, -mask.count("*"), -position)
+
+            if best is None or rank > best:
+                best = rank
+
+        if best is None:
+            return None
+
+        return self.offers[-best[2]]
+
+
+class Negotiator(object):
+    """
+    Resolves Accept headers to registered (mimetype, handler) pairs.
+
+    Must be invalidated whenever the underlying mimetypes change.
+    """
+
+    def __init__(self, mimetypes, cache_size=DEFAULT_CACHE_SIZE):
+        self.mimetypes = mimetypes
+        self.cache = LRUCache(cache_size)
+        self.invalidate()
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+    def invalidate(self):
+        self.index = NegotiationIndex(self.mimetypes)
+        self.cache.clear()
+
+    def negotiate(self, header):
+        """
+        Resolve a raw Accept header value.
+
+        Returns a (mimetype, (document_type, cls, validator)) tuple, or None if
+        no registered mimetype is acceptable.
+        """
+        result = self.cache.get(header, _MISSING)
+
+        if result is not _MISSING:
+            return result
+
+        mime = self.index.best_match(header)
+
+        if mime is not None:
+            result = (mime, self.mimetypes[mime])
+        else:
+            result = None
+
+        self.cache.set(header, result)
+        return result
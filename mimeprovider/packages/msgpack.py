@@ -0,0 +1,318 @@
+"""
+A small pure-python MessagePack encoder and decoder.
+
+Supports the types that documents produce, nil, booleans, integers up to 64
+bits, floats, strings, binary data, arrays and maps.  Extension types are not
+supported.  Both directions are iterative so deeply nested data does not hit
+the recursion limit.
+"""
+import itertools
+import struct
+import sys
+
+if sys.version_info[0] >= 3:
+    text_type = str
+    binary_types = (bytes, bytearray, memoryview)
+    integer_types = (int,)
+else:
+    text_type = unicode
+    binary_types = (bytearray, memoryview)
+    integer_types = (int, long)
+
+_UINT8 = struct.Struct(">BB")
+_UINT16 = struct.Struct(">BH")
+_UINT32 = struct.Struct(">BI")
+_UINT64 = struct.Struct(">BQ")
+_INT8 = struct.Struct(">Bb")
+_INT16 = struct.Struct(">Bh")
+_INT32 = struct.Struct(">Bi")
+_INT64 = struct.Struct(">Bq")
+_DOUBLE = struct.Struct(">Bd")
+
+_NIL = b"\xc0"
+_FALSE = b"\xc2"
+_TRUE = b"\xc3"
+
+# single byte encodings of the fixints.
+_FIXINTS = dict((i, struct.pack(">B", i & 0xff)) for i in range(-32, 128))
+
+# code -> (struct, size) of the fixed size values.
+_FIXED = {
+    0xca: (struct.Struct(">f"), 4),
+    0xcb: (struct.Struct(">d"), 8),
+    0xcc: (struct.Struct(">B"), 1),
+    0xcd: (struct.Struct(">H"), 2),
+    0xce: (struct.Struct(">I"), 4),
+    0xcf: (struct.Struct(">Q"), 8),
+    0xd0: (struct.Struct(">b"), 1),
+    0xd1: (struct.Struct(">h"), 2),
+    0xd2: (struct.Struct(">i"), 4),
+    0xd3: (struct.Struct(">q"), 8),
+}
+
+# code -> (struct, size) of the length prefix of strings, binary, arrays and
+# maps.
+_LENGTHS = {
+    0xc4: (_FIXED[0xcc][0], 1),
+    0xc5: (_FIXED[0xcd][0], 2),
+    0xc6: (_FIXED[0xce][0], 4),
+    0xd9: (_FIXED[0xcc][0], 1),
+    0xda: (_FIXED[0xcd][0], 2),
+    0xdb: (_FIXED[0xce][0], 4),
+    0xdc: (_FIXED[0xcd][0], 2),
+    0xdd: (_FIXED[0xce][0], 4),
+    0xde: (_FIXED[0xcd][0], 2),
+    0xdf: (_FIXED[0xce][0], 4),
+}
+
+_MISSING = object()
+
+
+def _pack_int(value):
+    packed = _FIXINTS.get(value)
+
+    if packed is not None:
+        return packed
+
+    if value > 0:
+        if value <= 0xff:
+            return _UINT8.pack(0xcc, value)
+        if value <= 0xffff:
+            return _UINT16.pack(0xcd, value)
+        if value <= 0xffffffff:
+            return _UINT32.pack(0xce, value)
+        if value <= 0xffffffffffffffff:
+            return _UINT64.pack(0xcf, value)
+    else:
+        if value >= -0x80:
+            return _INT8.pack(0xd0, value)
+        if value >= -0x8000:
+            return _INT16.pack(0xd1, value)
+        if value >= -0x80000000:
+            return _INT32.pack(0xd2, value)
+        if value >= -0x8000000000000000:
+            return _INT64.pack(0xd3, value)
+
+    raise ValueError("Integer out of range: {0}".format(value))
+
+
+def _header(size, fix, fix_size, small, large):
+    """
+    Encode the header of a container or string of size.
+    """
+    if size < fix_size:
+        return struct.pack(">B", fix | size)
+    if small is not None and size <= 0xff:
+        return _UINT8.pack(small, size)
+    if size <= 0xffff:
+        return _UINT16.pack(large, size)
+    if size <= 0xffffffff:
+        return _UINT32.pack(large + 1, size)
+
+    raise ValueError("Object too large: {0}".format(size))
+
+
+def _pack_string(value):
+    if isinstance(value, text_type):
+        value = value.encode("utf-8")
+
+    return _header(len(value), 0xa0, 32, 0xd9, 0xda) + value
+
+
+def _pack_binary(value):
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    else:
+        value = bytes(value)
+
+    size = len(value)
+
+    if size <= 0xff:
+        return _UINT8.pack(0xc4, size) + value
+    if size <= 0xffff:
+        return _UINT16.pack(0xc5, size) + value
+    if size <= 0xffffffff:
+        return _UINT32.pack(0xc6, size) + value
+
+    raise ValueError("Object too large: {0}".format(size))
+
+
+def _pack_float(value):
+    return _DOUBLE.pack(0xcb, value)
+
+
+# packers of exact scalar types, subclasses go through isinstance checks.
+_PACKERS = dict((t, _pack_int) for t in integer_types)
+_PACKERS[float] = _pack_float
+_PACKERS[text_type] = _pack_string
+_PACKERS[str] = _pack_string
+
+
+def packb(data):
+    """
+    Encode data into MessagePack bytes.
+
+    Tuples and other iterables, like generators, are encoded as arrays.
+    """
+    out = list()
+    append = out.append
+    stack = [iter((data,))]
+
+    while stack:
+        for value in stack[-1]:
+            packer = _PACKERS.get(type(value))
+
+            if packer is not None:
+                append(packer(value))
+            elif value is None:
+                append(_NIL)
+            elif value is True:
+                append(_TRUE)
+            elif value is False:
+                append(_FALSE)
+            elif isinstance(value, integer_types):
+                append(_pack_int(value))
+            elif isinstance(value, float):
+                append(_pack_float(value))
+            elif isinstance(value, binary_types):
+                append(_pack_binary(value))
+            elif isinstance(value, (text_type, str)):
+                append(_pack_string(value))
+            elif isinstance(value, dict):
+                append(_header(len(value), 0x80, 16, None, 0xde))
+                stack.append(itertools.chain.from_iterable(value.items()))
+                break
+            elif isinstance(value, (list, tuple)) or \
+                    hasattr(value, "__iter__"):
+                if not isinstance(value, (list, tuple)):
+                    value = list(value)
+
+                append(_header(len(value), 0x90, 16, None, 0xdc))
+                stack.append(iter(value))
+                break
+            else:
+                raise TypeError(
+                    "Cannot encode value of type {0!r}".format(type(value)))
+        else:
+            stack.pop()
+
+    return b"".join(out)
+
+
+def unpackb(data):
+    """
+    Decode a single value from MessagePack encoded data.
+
+    Strings are decoded to unicode, binary data to bytes.  Raises ValueError
+    on truncated, trailing or unsupported data.
+    """
+    buf = bytearray(data)
+    end = len(buf)
+    pos = 0
+
+    # frames of [container, remaining values, pending map key].
+    stack = list()
+
+    while True:
+        if pos >= end:
+            raise ValueError("Truncated MessagePack data")
+
+        code = buf[pos]
+        pos += 1
+
+        size = None
+
+        if code <= 0x7f:
+            value = code
+        elif code >= 0xe0:
+            value = code - 0x100
+        elif code <= 0x8f:
+            value, size = dict(), code & 0x0f
+        elif code <= 0x9f:
+            value, size = list(), code & 0x0f
+        elif code <= 0xbf:
+            size = code & 0x1f
+
+            if pos + size > end:
+                raise ValueError("Truncated MessagePack data")
+
+            value = buf[pos:pos + size].decode("utf-8")
+            pos += size
+            size = None
+        elif code == 0xc0:
+            value = None
+        elif code == 0xc2:
+            value = False
+        elif code == 0xc3:
+            value = True
+        elif code in _FIXED:
+            fixed, width = _FIXED[code]
+
+            if pos + width > end:
+                raise ValueError("Truncated MessagePack data")
+
+            value, = fixed.unpack_from(buf, pos)
+            pos += width
+        elif code in _LENGTHS:
+            prefix, width = _LENGTHS[code]
+
+            if pos + width > end:
+                raise ValueError("Truncated MessagePack data")
+
+            length, = prefix.unpack_from(buf, pos)
+            pos += width
+
+            if code >= 0xde:
+                value, size = dict(), length
+            elif code >= 0xdc:
+                value, size = list(), length
+            else:
+                if pos + length > end:
+                    raise ValueError("Truncated MessagePack data")
+
+                value = buf[pos:pos + length]
+                pos += length
+
+                if code >= 0xd9:
+                    value = value.decode("utf-8")
+                else:
+                    value = bytes(value)
+        else:
+            raise ValueError(
+                "Unsupported MessagePack type: 0x{0:02x}".format(code))
+
+        if size:
+            stack.append([value, size, _MISSING])
+            continue
+
+        # attach the completed value to its containers.
+        while stack:
+            frame = stack[-1]
+            container = frame[0]
+
+            if isinstance(container, list):
+                container.append(value)
+            elif frame[2] is _MISSING:
+                frame[2] = value
+                break
+            else:
+                try:
+                    container[frame[2]] = value
+                except TypeError:
+                    raise ValueError(
+                        "Unhashable map key: {0!r}".format(frame[2]))
+
+                frame[2] = _MISSING
+
+            frame[1] -= 1
+
+            if frame[1]:
+                break
+
+            stack.pop()
+            value = container
+        else:
+            if pos != end:
+                raise ValueError("Extra data after MessagePack value")
+
+            return value
@@ -4,7 +4,7 @@ STRING = "string"
 ELEMENT = "element"
 
 
-def _open_tag(item):
+def open_tag(item):
     buf = list()
     buf.append("<{0}".format(item.tag))
 
@@ -16,11 +16,13 @@ def _open_tag(item):
     return "".join(buf)
 
 
-def _close_tag(item):
+def close_tag(item):
     return "</{0}>".format(item.tag)
 
 
 class mXml(object):
+    __slots__ = ("tag", "attributes", "children")
+
     def __init__(self, tag, **kw):
         self.tag = tag
         self.attributes = dict((k.strip("_"), v) for k, v in kw.items())
@@ -47,18 +49,24 @@ class mXml(object):
         return self.attributes[key]
 
     def _build_string(self):
-        item = self
+        stack = [(self, iter(self.children))]
 
-        yield _open_tag(item)
+        yield open_tag(self)
 
-        for child_type, child in item.children:
-            if child_type == STRING:
-                yield s.escape(child)
-                continue
+        while stack:
+            item, children = stack[-1]
 
-            yield "".join(child._build_string())
+            for child_type, child in children:
+                if child_type == STRING:
+                    yield s.escape(child)
+                    continue
 
-        yield _close_tag(item)
+                yield open_tag(child)
+                stack.append((child, iter(child.children)))
+                break
+            else:
+                stack.pop()
+                yield close_tag(item)
 
     def __str__(self):
         return "".join(self._build_string())
@@ -0,0 +1,199 @@
+"""
+A profiling tween for finding out why single requests are slow.
+
+The tween profiles a sample of the requests with cProfile, or every request
+while keeping only the profiles of those slower than a threshold, and writes
+them to a directory as pstats dumps.  Each dump has a JSON file next to it
+with the request, its duration, and the document class and mimetype that
+were rendered.  Only the newest max_files dumps are kept.
+
+    provider = MimeProvider(documents, profiler=Profiler(
+        "/var/tmp/profiles", sample_rate=0.001, threshold=0.5))
+
+Profiling every request is expensive, so a threshold without a sample rate
+is meant for short investigations.  Bodies of streamed responses are
+rendered after the tween returns and are not part of the profile.
+
+With memory=True the allocations during the request are traced with
+tracemalloc as well, where it is available.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+from mimeprovider.instrumentation import clock
+from mimeprovider.mimerenderer import RENDERED_KEY
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_FILES = 100
+
+# number of allocation sites written for memory profiles.
+DEFAULT_MEMORY_TOP = 25
+
+# registry attribute holding the profiler of the tween.
+REGISTRY_KEY = "mimeprovider_profiler"
+
+
+class Profiler(object):
+    """
+    Decides which requests to profile and writes their profiles.
+
+    A request is profiled if it is sampled, with a probability of
+    sample_rate, or if threshold is set and it took longer than threshold
+    seconds.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, threshold=None,
+                 max_files=DEFAULT_MAX_FILES, memory=False,
+                 memory_top=DEFAULT_MEMORY_TOP):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(
+                "Sample rate must be between 0 and 1: {0!r}".format(
+                    sample_rate))
+
+        if max_files < 1:
+            raise ValueError(
+                "max_files must be positive: {0!r}".format(max_files))
+
+        if memory and tracemalloc is None:
+            raise ValueError("Memory profiling requires tracemalloc")
+
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.max_files = max_files
+        self.memory = memory
+        self.memory_top = memory_top
+        self.written = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def sampled(self):
+        return self.sample_rate > 0.0 and random.random() < self.sample_rate
+
+    def profile(self, handler, request):
+        """
+        Handle request, profiling it if it is sampled or could end up above
+        the threshold.
+        """
+        sampled = self.sampled()
+
+        if not sampled and self.threshold is None:
+            return handler(request)
+
+        profile = cProfile.Profile()
+        tracing = self.memory and not tracemalloc.is_tracing()
+
+        if tracing:
+            tracemalloc.start()
+
+        start = clock()
+
+        try:
+            response = profile.runcall(handler, request)
+        finally:
+            duration = clock() - start
+            memory = None
+
+            if tracing:
+                memory = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+
+        if sampled or duration >= self.threshold:
+            try:
+                self.write(profile, request, response, duration, memory)
+            except Exception:
+                log.error("Failed to write profile",
+                          exc_info=sys.exc_info())
+
+        return response
+
+    def _name(self):
+        with self._lock:
+            self._counter += 1
+            counter = self._counter
+
+        return "{0:.6f}-{1}-{2}".format(time.time(), os.getpid(), counter)
+
+    def write(self, profile, request, response, duration, memory=None):
+        document, mimetype = request.environ.get(RENDERED_KEY, (None, None))
+        base = os.path.join(self.directory, self._name())
+
+        profile.dump_stats(base + ".prof")
+
+        info = {
+            "method": request.method,
+            "path": request.path_qs,
+            "status": response.status_int,
+            "duration": duration,
+            "document": document,
+            "mimetype": mimetype,
+        }
+
+        if memory is not None:
+            info["memory"] = [
+                {"site": str(stat.traceback), "size": stat.size,
+                 "count": stat.count}
+                for stat in memory.statistics("lineno")[:self.memory_top]]
+
+        with open(base + ".json", "w") as f:
+            json.dump(info, f, indent=2, sort_keys=True)
+
+        with self._lock:
+            self.written += 1
+
+        self.rotate()
+
+    def dumps(self):
+        """
+        The base paths of the dumps in the directory, oldest first.
+        """
+        names = [name[:-len(".prof")]
+                 for name in os.listdir(self.directory)
+                 if name.endswith(".prof")]
+
+        names.sort(key=lambda name: float(name.split("-", 1)[0]))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def rotate(self):
+        """
+        Remove the oldest dumps beyond max_files, including those written by
+        other processes.
+        """
+        dumps = self.dumps()
+
+        for base in dumps[:max(0, len(dumps) - self.max_files)]:
+            for extension in (".prof", ".json"):
+                try:
+                    os.remove(base + extension)
+                except OSError:
+                    pass
+
+
+def profiler_tween_factory(handler, registry):
+    """
+    Pyramid tween profiling requests with the registered Profiler.
+    """
+    profiler = getattr(registry, REGISTRY_KEY, None)
+
+    if profiler is None:
+        return handler
+
+    def profiler_tween(request):
+        return profiler.profile(handler, request)
+
+    return profiler_tween
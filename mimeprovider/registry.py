@@ -0,0 +1,158 @@
+"""
+The registry of mimetypes and documents, published as immutable snapshots.
+
+Registering documents builds a new snapshot next to the current one and
+then replaces it with a single attribute assignment, so renderers, request
+parsing and clients read a consistent registry without taking locks.  Each
+snapshot carries its own negotiation index and cache, and a table from
+normalized mimetypes to handlers.
+"""
+import threading
+
+from collections import Mapping
+from collections import OrderedDict
+
+from mimeprovider.negotiation import DEFAULT_CACHE_SIZE
+from mimeprovider.negotiation import Negotiator
+
+# alternative spellings of structured syntax suffixes, mapped to the ones
+# used by the document types.
+SUFFIX_ALIASES = {
+    "ndjson": "x-ndjson",
+    "x-msgpack": "msgpack",
+}
+
+
+def normalize_mimetype(value):
+    """
+    Normalize a mimetype or Content-Type header value for lookups.
+
+    Parameters are dropped, the mimetype is lowercased and its structured
+    syntax suffix is replaced by its canonical spelling.
+    """
+    mimetype = value.split(";", 1)[0].strip().lower()
+    type_, _, subtype = mimetype.partition("/")
+    name, plus, suffix = subtype.rpartition("+")
+
+    if plus:
+        subtype = name + plus + SUFFIX_ALIASES.get(suffix, suffix)
+
+    return type_ + "/" + subtype
+
+
+class Snapshot(object):
+    """
+    An immutable view of the registered mimetypes and documents.
+    """
+
+    def __init__(self, mimetypes, mimeobjects, cache_size):
+        self.mimetypes = mimetypes
+        self.mimeobjects = mimeobjects
+        self.negotiator = Negotiator(mimetypes, cache_size)
+        self.normalized = dict()
+
+        for mime, handler in mimetypes.items():
+            self.normalized.setdefault(normalize_mimetype(mime), handler)
+
+    def lookup(self, content_type):
+        """
+        Get the (document_type, cls, validator) handler for a mimetype or
+        Content-Type header value, or None.
+        """
+        handler = self.mimetypes.get(content_type)
+
+        if handler is None:
+            handler = self.normalized.get(normalize_mimetype(content_type))
+
+        return handler
+
+
+class Registry(object):
+    """
+    Holds the current snapshot and replaces it on registration.
+
+    Also serves as the negotiator for renderers, always negotiating against
+    the current snapshot.
+    """
+
+    def __init__(self, mimetypes=(), cache_size=DEFAULT_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.snapshot = Snapshot(OrderedDict(mimetypes), dict(), cache_size)
+
+    @property
+    def hits(self):
+        return self.snapshot.negotiator.hits
+
+    @property
+    def misses(self):
+        return self.snapshot.negotiator.misses
+
+    def negotiate(self, header):
+        return self.snapshot.negotiator.negotiate(header)
+
+    def lookup(self, content_type):
+        return self.snapshot.lookup(content_type)
+
+    def register(self, entries):
+        """
+        Publish a snapshot with the given ((mimetype, handler), (document,
+        mapping)) entries added.
+
+        Raises ValueError on conflicting mimetypes, in which case nothing is
+        registered.
+        """
+        with self.lock:
+            current = self.snapshot
+            mimetypes = OrderedDict(current.mimetypes)
+            mimeobjects = dict(
+                (o, list(values)) for o, values in current.mimeobjects.items())
+
+            for (m, m_value), (o, o_value) in entries:
+                if m in mimetypes:
+                    _, cls, _ = mimetypes[m]
+                    _, new_cls, _ = m_value
+
+                    raise ValueError(
+                        "Conflicting handler for {0}, {1} and {2}".format(
+                            m, cls, new_cls))
+
+                mimetypes[m] = m_value
+                mimeobjects.setdefault(o, []).append(o_value)
+
+            mimeobjects = dict(
+                (o, tuple(values)) for o, values in mimeobjects.items())
+
+            self.snapshot = Snapshot(mimetypes, mimeobjects, self.cache_size)
+
+
+class SnapshotView(Mapping):
+    """
+    A read-only mapping over an attribute of the current snapshot, for
+    clients that should see later registrations.
+    """
+
+    def __init__(self, registry, attribute):
+        self.registry = registry
+        self.attribute = attribute
+
+    def _current(self):
+        return getattr(self.registry.snapshot, self.attribute)
+
+    def __getitem__(self, key):
+        return self._current()[key]
+
+    def __iter__(self):
+        return iter(self._current())
+
+    def __len__(self):
+        return len(self._current())
+
+    def __contains__(self, key):
+        return key in self._current()
+
+    def get(self, key, default=None):
+        return self._current().get(key, default)
+
+    def lookup(self, content_type):
+        return self.registry.lookup(content_type)
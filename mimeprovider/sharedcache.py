@@ -0,0 +1,270 @@
+"""
+A render cache backend shared by the processes on one host.
+
+Bodies are stored in a memory-mapped file, so every worker of a prefork
+server sees the bodies rendered by the others.  The file is split into
+sets of a fixed number of slots, a key is hashed to one set and replaces the
+least recently used slot in it, which bounds both the memory used and the
+work per lookup.  Sets are locked with fcntl byte-range locks, so only the
+processes touching the same set wait for each other.
+
+    provider = MimeProvider(documents, render_cache=SharedCache(
+        "/dev/shm/myapp.cache", size=4096, namespace=release))
+
+The file outlives restarts and deploys, so the namespace, like the release
+of the application, is part of every key.  Bodies rendered by older code are
+then never served for an unchanged cache_key(), they age out of the sets
+instead.
+
+Bodies larger than the slot size are not cached.
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from mimeprovider.cache import CacheBackend
+
+MAGIC = b"MIMECCH2"
+
+DEFAULT_WAYS = 8
+DEFAULT_SLOT_SIZE = 16 * 1024
+
+# magic, sets, ways, slot size.
+_HEADER = struct.Struct("<8sIII")
+
+# digest, last use, body length, flags.
+_SLOT = struct.Struct("<20sdIB")
+
+_EMPTY = b"\0" * 20
+
+# the body was unicode and is stored utf-8 encoded.
+_TEXT = 1
+
+
+def digest(key, namespace=""):
+    """
+    A stable digest of a cache key in a namespace, the same in every
+    process.
+    """
+    value = u"{0}\0{1!r}".format(namespace, key).encode("utf-8")
+    return hashlib.sha1(value).digest()
+
+
+class SharedCache(CacheBackend):
+    """
+    A bounded, set-associative LRU cache of bodies in a shared memory-mapped
+    file.
+
+    Processes opening the same path with the same geometry share the
+    entries, those of the same namespace.  Counters are kept per process.
+    """
+
+    def __init__(self, path, size, ways=DEFAULT_WAYS,
+                 slot_size=DEFAULT_SLOT_SIZE, namespace=""):
+        if size < 1:
+            raise ValueError("Cache size must be positive: {0!r}".format(size))
+
+        self.path = path
+        self.namespace = namespace
+        self.ways = min(ways, size)
+        self.sets = (size + self.ways - 1) // self.ways
+        self.size = self.sets * self.ways
+        self.slot_size = slot_size
+        self.stride = _SLOT.size + slot_size
+        self.length = _HEADER.size + self.size * self.stride
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.oversized = 0
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._initialize()
+        self._map = mmap.mmap(self._fd, self.length)
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _initialize(self):
+        """
+        Size and stamp a new file, or check the geometry of an existing
+        one.
+        """
+        header = _HEADER.pack(MAGIC, self.sets, self.ways, self.slot_size)
+
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, _HEADER.size, 0)
+
+        try:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            existing = os.read(self._fd, _HEADER.size)
+
+            if existing[:len(MAGIC)] == MAGIC:
+                if existing != header:
+                    raise ValueError(
+                        "{0} holds a cache with a different geometry".format(
+                            self.path))
+                return
+
+            os.ftruncate(self._fd, 0)
+            os.ftruncate(self._fd, self.length)
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, header)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, _HEADER.size, 0)
+
+    def _locked(self, index):
+        """
+        Lock set index against other threads and processes.
+        """
+        # thread locks held while forking stay held in the child.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+
+        return _SetLock(self._lock, self._fd, _HEADER.size + index)
+
+    def _slots(self, index):
+        start = _HEADER.size + index * self.ways * self.stride
+        return range(start, start + self.ways * self.stride, self.stride)
+
+    def _index(self, key_digest):
+        return struct.unpack_from("<I", key_digest)[0] % self.sets
+
+    def get(self, key, default=None):
+        key_digest = digest(key, self.namespace)
+        index = self._index(key_digest)
+
+        with self._locked(index):
+            for offset in self._slots(index):
+                slot_digest, _, length, flags = _SLOT.unpack_from(
+                    self._map, offset)
+
+                if slot_digest != key_digest:
+                    continue
+
+                _SLOT.pack_into(self._map, offset, slot_digest, time.time(),
+                                length, flags)
+
+                start = offset + _SLOT.size
+                body = self._map[start:start + length]
+                self.hits += 1
+
+                if flags & _TEXT:
+                    return body.decode("utf-8")
+
+                return body
+
+        self.misses += 1
+        return default
+
+    def set(self, key, body):
+        flags = 0
+
+        if not isinstance(body, bytes):
+            body = body.encode("utf-8")
+            flags = _TEXT
+
+        if len(body) > self.slot_size:
+            self.oversized += 1
+            return
+
+        key_digest = digest(key, self.namespace)
+        index = self._index(key_digest)
+
+        with self._locked(index):
+            target = None
+            empty = None
+            oldest = None
+
+            for offset in self._slots(index):
+                slot_digest, used, _, _ = _SLOT.unpack_from(self._map, offset)
+
+                if slot_digest == key_digest:
+                    target = offset
+                    break
+
+                if slot_digest == _EMPTY:
+                    if empty is None:
+                        empty = offset
+                elif oldest is None or used < oldest[0]:
+                    oldest = (used, offset)
+
+            if target is None:
+                target = empty
+
+            if target is None:
+                target = oldest[1]
+                self.evictions += 1
+
+            # a process killed while writing the body leaves an empty slot,
+            # not the old key pointing at a mix of both bodies.
+            _SLOT.pack_into(self._map, target, _EMPTY, 0.0, 0, 0)
+
+            start = target + _SLOT.size
+            self._map[start:start + len(body)] = body
+            _SLOT.pack_into(self._map, target, key_digest, time.time(),
+                            len(body), flags)
+
+    def clear(self):
+        for index in range(self.sets):
+            with self._locked(index):
+                for offset in self._slots(index):
+                    _SLOT.pack_into(self._map, offset, _EMPTY, 0.0, 0, 0)
+
+    def __len__(self):
+        count = 0
+
+        for index in range(self.sets):
+            for offset in self._slots(index):
+                if self._map[offset:offset + 20] != _EMPTY:
+                    count += 1
+
+        return count
+
+    def __contains__(self, key):
+        key_digest = digest(key, self.namespace)
+        index = self._index(key_digest)
+
+        return any(self._map[offset:offset + 20] == key_digest
+                   for offset in self._slots(index))
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+    def stats(self):
+        return {
+            "size": len(self),
+            "max_size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "oversized": self.oversized,
+        }
+
+
+class _SetLock(object):
+    __slots__ = ("lock", "fd", "start")
+
+    def __init__(self, lock, fd, start):
+        self.lock = lock
+        self.fd = fd
+        self.start = start
+
+    def __enter__(self):
+        self.lock.acquire()
+
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, self.start)
+        except Exception:
+            self.lock.release()
+            raise
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, self.start)
+        finally:
+            self.lock.release()
@@ -0,0 +1,172 @@
+"""
+Validation policies, deciding which documents are validated.
+
+Inbound documents come from clients and are validated unless validation is
+off.  Outbound documents are built by the application itself, so they can
+be trusted, validated always, or validated for a sample of the responses.
+Failures of sampled validation are recorded and logged, but do not fail the
+response.
+"""
+import logging
+import random
+import threading
+
+from collections import deque
+
+from mimeprovider.exceptions import MimeValidationError
+
+log = logging.getLogger(__name__)
+
+ALWAYS = "always"
+INBOUND = "inbound"
+SAMPLED = "sampled"
+OFF = "off"
+
+MODES = (ALWAYS, INBOUND, SAMPLED, OFF)
+
+DEFAULT_SAMPLE_RATE = 0.01
+
+# number of recent sampled failures kept.
+DEFAULT_FAILURES = 100
+
+
+class SampledValidator(object):
+    """
+    Wraps a validator, recording failures with the policy instead of
+    raising them.
+    """
+
+    def __init__(self, policy, validator, document):
+        self.policy = policy
+        self.validator = validator
+        self.document = document
+
+    @property
+    def schema(self):
+        return getattr(self.validator, "schema", None)
+
+    def validate(self, data):
+        try:
+            self.validator.validate(data)
+        except MimeValidationError as e:
+            self.policy.record_failure(self.document, e)
+
+    def item_validator(self, partial=False):
+        if not hasattr(self.validator, "item_validator"):
+            return None
+
+        if partial:
+            validator = self.validator.item_validator(partial=True)
+        else:
+            validator = self.validator.item_validator()
+
+        if validator is None:
+            return None
+
+        return SampledValidator(self.policy, validator, self.document)
+
+
+class ValidationPolicy(object):
+    """
+    Decides per document whether to validate, keeping counters of validated
+    and skipped documents.
+
+    Documents can override the mode with a 'validation_policy' attribute.
+    """
+
+    def __init__(self, mode=ALWAYS, sample_rate=DEFAULT_SAMPLE_RATE,
+                 failures=DEFAULT_FAILURES):
+        self._check_mode(mode)
+
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(
+                "Sample rate must be between 0 and 1: {0!r}".format(
+                    sample_rate))
+
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.failures = deque(maxlen=failures)
+        self.counters = dict(
+            inbound_validated=0,
+            inbound_skipped=0,
+            outbound_validated=0,
+            outbound_skipped=0,
+            sampled_failures=0,
+        )
+        self._lock = threading.Lock()
+
+    def _check_mode(self, mode):
+        if mode not in MODES:
+            raise ValueError("Unknown validation policy: {0!r}".format(mode))
+
+    def mode_for(self, document):
+        mode = getattr(document, "validation_policy", None)
+
+        if mode is None:
+            return self.mode
+
+        self._check_mode(mode)
+        return mode
+
+    def _count(self, direction, validated):
+        key = "{0}_{1}".format(
+            direction, "validated" if validated else "skipped")
+
+        with self._lock:
+            self.counters[key] += 1
+
+    def inbound(self, validator, document):
+        """
+        The validator to use for a document parsed from a request, or None.
+        """
+        if validator is None:
+            return None
+
+        validated = self.mode_for(document) != OFF
+        self._count("inbound", validated)
+        return validator if validated else None
+
+    def outbound(self, validator, document):
+        """
+        The validator to use for a document being rendered, or None.
+        """
+        if validator is None:
+            return None
+
+        mode = self.mode_for(document)
+
+        if mode == ALWAYS:
+            self._count("outbound", True)
+            return validator
+
+        if mode == SAMPLED and random.random() < self.sample_rate:
+            self._count("outbound", True)
+            return SampledValidator(self, validator, document)
+
+        self._count("outbound", False)
+        return None
+
+    def record_failure(self, document, error):
+        name = getattr(document, "__name__", repr(document))
+
+        log.warning("Sampled validation failed for {0}: {1}".format(
+            name, error))
+
+        with self._lock:
+            self.counters["sampled_failures"] += 1
+            self.failures.append((name, str(error)))
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+def get_policy(policy, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    Get a policy from a mode name, or the policy itself if it already is a
+    ValidationPolicy.
+    """
+    if isinstance(policy, ValidationPolicy):
+        return policy
+
+    return ValidationPolicy(policy, sample_rate)
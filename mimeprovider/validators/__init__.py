@@ -1,4 +1,5 @@
 import importlib
+import json
 import logging
 import sys
 
@@ -22,3 +23,75 @@ def get_default_validator():
             continue
 
     raise ImportError("No validator found")
+
+
+class LazyValidator(object):
+    """
+    Compiles the validator for schema on first use, with the default
+    validator if factory is None.
+
+    The schema is checked right away by the check_schema of the factory,
+    so that invalid schemas are reported when they are registered rather
+    than on the first request using them.
+    """
+
+    def __init__(self, factory, schema):
+        check = factory if factory is not None else get_default_validator()
+
+        if hasattr(check, "check_schema"):
+            check.check_schema(schema)
+
+        self.factory = factory
+        self.schema = schema
+        self.validator = None
+
+    def load(self):
+        if self.validator is None:
+            factory = self.factory
+
+            if factory is None:
+                factory = get_default_validator()
+
+            self.validator = factory(self.schema)
+
+        return self.validator
+
+    def validate(self, data):
+        return self.load().validate(data)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        return getattr(self.load(), name)
+
+
+def schema_key(schema):
+    """
+    Build a hashable key for a schema, equal schemas give equal keys.
+    """
+    return json.dumps(schema, sort_keys=True)
+
+
+class ValidatorCache(object):
+    """
+    Compiles validators through the given factory and shares them between
+    all documents with equal schemas.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.validators = dict()
+
+    def get(self, schema):
+        key = schema_key(schema)
+        validator = self.validators.get(key)
+
+        if validator is None:
+            validator = self.factory(schema)
+            self.validators[key] = validator
+
+        return validator
+
+    def __len__(self):
+        return len(self.validators)
@@ -1,17 +1,208 @@
 from __future__ import absolute_import
 
-import jsonschema
+from jsonschema import Draft3Validator
+from jsonschema import Draft4Validator
+from jsonschema import SchemaError
+from jsonschema.validators import validator_for
 
 from mimeprovider.exceptions import MimeValidationError
 
+# array keywords that can be checked one element at a time.
+ITEM_KEYWORDS = frozenset([
+    "$schema", "type", "items", "title", "description",
+])
+
+# keywords understood by the fast path, anything else falls back to the full
+# validator.
+SIMPLE_KEYWORDS = frozenset([
+    "$schema", "type", "properties", "required", "title", "description",
+])
+
+
+class NotSimple(Exception):
+    pass
+
+
+def select_validator_class(schema):
+    """
+    Pick and check the validator class for the given schema.
+
+    An explicit $schema wins, otherwise draft 4 is tried before draft 3 so
+    that schemas using boolean 'required' properties keep working.
+    """
+    if u"$schema" in schema:
+        candidates = [validator_for(schema)]
+    else:
+        candidates = [Draft4Validator, Draft3Validator]
+
+    for cls in candidates:
+        try:
+            cls.check_schema(schema)
+        except SchemaError:
+            continue
+
+        return cls
+
+    try:
+        candidates[0].check_schema(schema)
+    except SchemaError as e:
+        raise ValueError("Invalid schema: {0}".format(e.message))
+
+
+def _compile_type(validator_cls, types):
+    if isinstance(types, basestring):
+        types = [types]
+
+    pytypes = tuple()
+    accepts_bool = False
+
+    for t in types:
+        # draft 3 unions may hold schemas, which only the full validator
+        # understands.
+        if not isinstance(t, basestring):
+            raise NotSimple(t)
+
+        if t == "any":
+            return None
+
+        if t not in validator_cls.DEFAULT_TYPES:
+            raise NotSimple(t)
+
+        value = validator_cls.DEFAULT_TYPES[t]
+
+        if not isinstance(value, tuple):
+            value = (value,)
+
+        pytypes += value
+
+        if t == "boolean":
+            accepts_bool = True
+
+    def check_type(instance):
+        # bool inherits from int, so it only matches an explicit boolean.
+        if isinstance(instance, bool):
+            return accepts_bool
+        return isinstance(instance, pytypes)
+
+    return check_type
+
+
+def compile_simple(validator_cls, schema):
+    """
+    Generate a specialized predicate for schemas only made up of 'type',
+    'properties' and 'required' keywords.
+
+    The predicate only answers if the instance is valid, errors are still
+    reported by the full validator.  Raises NotSimple if the schema uses
+    anything else.
+    """
+    if not isinstance(schema, dict) or set(schema) - SIMPLE_KEYWORDS:
+        raise NotSimple(schema)
+
+    draft3 = validator_cls is Draft3Validator
+
+    check_type = None
+
+    if "type" in schema:
+        check_type = _compile_type(validator_cls, schema["type"])
+
+    required = ()
+
+    if "required" in schema and not draft3:
+        required = tuple(schema["required"])
+
+    properties = list()
+
+    for name, subschema in schema.get("properties", {}).items():
+        check = compile_simple(validator_cls, subschema)
+        is_required = draft3 and subschema.get("required", False) is True
+        properties.append((name, check, is_required))
+
+    def check(instance):
+        if check_type is not None and not check_type(instance):
+            return False
+
+        if not isinstance(instance, dict):
+            return True
+
+        for name, check_property, is_required in properties:
+            if name in instance:
+                if not check_property(instance[name]):
+                    return False
+            elif is_required:
+                return False
+
+        for name in required:
+            if name not in instance:
+                return False
+
+        return True
+
+    return check
+
 
 class JsonSchemaValidator(object):
-    def __init__(self, schema):
+    """
+    Validator compiled once for a schema and reused for every document.
+
+    Validators for subschemas share the compiled validator of the root
+    schema, which is passed in as 'validator'.
+    """
+
+    def __init__(self, schema, fast=True, validator=None):
         self.schema = schema
+        self.fast = fast
+
+        if validator is None:
+            validator = select_validator_class(schema)(schema)
+
+        self.validator = validator
+        self.validator_cls = type(validator)
+        self.fast_check = None
+
+        if fast:
+            try:
+                self.fast_check = compile_simple(self.validator_cls, schema)
+            except NotSimple:
+                pass
+
+    @classmethod
+    def check_schema(cls, schema):
+        """
+        Check a schema completely, raises ValueError if it is invalid.
+        """
+        select_validator_class(schema)
+
+    def item_validator(self, partial=False):
+        """
+        Get a validator for the elements of an array schema, or None if the
+        schema cannot be checked one element at a time.
+
+        With partial, the validator is also returned for schemas with
+        keywords about the array as a whole, which it does not check.
+        """
+        schema = self.schema
+
+        if schema.get("type") != "array":
+            return None
+
+        if not partial and set(schema) - ITEM_KEYWORDS:
+            return None
+
+        items = schema.get("items", {})
+
+        if not isinstance(items, dict):
+            return None
+
+        return JsonSchemaValidator(items, self.fast, self.validator)
 
     def validate(self, obj):
+        if self.fast_check is not None and self.fast_check(obj):
+            return
+
         try:
-            jsonschema.validate(obj, self.schema)
+            for error in self.validator.iter_errors(obj, self.schema):
+                raise error
         except Exception as e:
             raise MimeValidationError(str(e))
 
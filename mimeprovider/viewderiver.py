@@ -0,0 +1,156 @@
+"""
+Early negotiation for views declaring what they consume and produce.
+
+    config.add_view(create_item, route_name="items", renderer="mime",
+                    consumes=[Item], produces=[Item, Error])
+
+Before such a view runs, the Accept header is negotiated against the
+mimetypes of the produced documents and the Content-Type header is checked
+against those of the consumed documents.  Requests that cannot be served are
+answered with 406 Not Acceptable or 415 Unsupported Media Type without
+running the view or reading the body.  Views without these options are left
+alone.
+
+The error bodies are rendered once per error with the provider's error
+handler and document type, and reused for every rejected request, so error
+handlers should only depend on the exception.
+"""
+import threading
+
+from collections import OrderedDict
+
+from pyramid.response import Response
+
+from mimeprovider.exceptions import MimeNotAcceptable
+from mimeprovider.exceptions import MimeUnsupportedMediaType
+from mimeprovider.negotiation import Negotiator
+from mimeprovider.registry import normalize_mimetype
+
+
+class ViewTables(object):
+    """
+    Negotiation tables for one view, built from a registry snapshot.
+
+    Mimetypes of document types that are not bound to a document, like
+    text/html, produce any document.
+    """
+
+    def __init__(self, snapshot, consumes, produces, cache_size):
+        self.snapshot = snapshot
+        self.negotiator = None
+        self.consumes = None
+
+        if produces is not None:
+            produces = set(produces)
+            self.negotiator = Negotiator(OrderedDict(
+                (m, handler) for m, handler in snapshot.mimetypes.items()
+                if handler[1] is None or handler[1] in produces), cache_size)
+
+        if consumes is not None:
+            consumes = set(consumes)
+            self.consumes = frozenset(
+                normalize_mimetype(m)
+                for m, (_, cls, _) in snapshot.mimetypes.items()
+                if cls in consumes and hasattr(cls, "from_data"))
+
+    def acceptable(self, request):
+        if self.negotiator is None:
+            return True
+
+        header = request.headers.get("Accept")
+        return self.negotiator.negotiate(header) is not None
+
+    def consumable(self, request):
+        if self.consumes is None:
+            return True
+
+        if not request.content_type or not request.is_body_readable:
+            return True
+
+        return normalize_mimetype(request.content_type) in self.consumes
+
+
+class NegotiationDeriver(object):
+    """
+    View deriver rejecting unservable requests before the view runs.
+    """
+    options = ("consumes", "produces")
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.errors = dict()
+        self._lock = threading.Lock()
+
+    def error_response(self, error, request):
+        """
+        A response for the error class, rendered the first time it is
+        needed.
+        """
+        cached = self.errors.get(error)
+
+        if cached is None:
+            cached = self._render_error(error, request)
+
+            with self._lock:
+                self.errors[error] = cached
+
+        status, content_type, body = cached
+
+        response = Response(body=body, status=status)
+        response.content_type = content_type
+        response.vary = ("Accept", "Content-Type")
+        return response
+
+    def _render_error(self, error, request):
+        provider = self.provider
+        document_type = provider.error_document_type
+        document = provider.error_handler(error(error.title), request)
+
+        body = document_type.render(None, document)
+
+        if isinstance(body, unicode):
+            body = body.encode("utf-8")
+
+        return (error.status_code, document_type.get_mimetype(document),
+                body)
+
+    def reject(self, error, request):
+        if self.provider.error_handler is None:
+            raise error(error.title)
+
+        return self.error_response(error, request)
+
+    def __call__(self, view, info):
+        consumes = info.options.get("consumes")
+        produces = info.options.get("produces")
+
+        if consumes is None and produces is None:
+            return view
+
+        registry = self.provider.registry
+        cache_size = registry.cache_size
+        state = [None]
+
+        def tables():
+            current = state[0]
+            snapshot = registry.snapshot
+
+            # later registrations publish a new snapshot.
+            if current is None or current.snapshot is not snapshot:
+                current = state[0] = ViewTables(snapshot, consumes, produces,
+                                                cache_size)
+
+            return current
+
+        def negotiated_view(context, request):
+            current = tables()
+
+            if not current.acceptable(request):
+                return self.reject(MimeNotAcceptable, request)
+
+            if not current.consumable(request):
+                return self.reject(MimeUnsupportedMediaType, request)
+
+            return view(context, request)
+
+        return negotiated_view
@@ -27,5 +27,6 @@ setup(
         'mimeprovider.packages',
         'mimeprovider.documenttype',
         'mimeprovider.client',
+        'mimeprovider.codec',
     ],
 )
@@ -0,0 +1,298 @@
+import json
+import socket
+import threading
+import time
+import unittest
+
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIRequestHandler
+
+try:
+    import asyncio
+except ImportError:
+    try:
+        import trollius as asyncio
+    except ImportError:
+        asyncio = None
+
+from mimeprovider import MimeProvider
+from mimeprovider.client import ClientException
+from mimeprovider.encoding import compress
+
+from test.test_requests_client import ThreadingServer
+
+
+class Thing(object):
+    object_type = "thing"
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_data(self):
+        return {"value": self.value}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["value"])
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class QuietServer(ThreadingServer):
+    # clients closing stalled connections break the pipe.
+    def handle_error(self, *args):
+        pass
+
+
+def application(environ, start_response):
+    length = int(environ.get("CONTENT_LENGTH") or 0)
+    body = environ["wsgi.input"].read(length)
+    path = environ["PATH_INFO"]
+    headers = []
+
+    if path == "/echo":
+        value = json.loads(body)["value"] if body else None
+        content_type = "application/thing+json"
+        body = json.dumps({"value": value})
+    elif path == "/large":
+        content_type = "application/thing+json"
+        body = json.dumps({"value": "x" * 100000})
+    elif path == "/stall":
+        time.sleep(0.5)
+        content_type = "application/thing+json"
+        body = json.dumps({"value": "late"})
+    elif path == "/gzip":
+        content_type = "application/thing+json"
+        body = compress(json.dumps({"value": "x" * 1000}), "gzip")
+        headers.append(("Content-Encoding", "gzip"))
+    else:
+        content_type = "application/unknown+json"
+        body = "{}"
+
+    headers.extend([("Content-Type", content_type),
+                    ("Content-Length", str(len(body)))])
+    start_response("200 OK", headers)
+    return [body]
+
+
+@unittest.skipIf(asyncio is None, "asyncio not available")
+class TestResponseParser(unittest.TestCase):
+    def parse(self, response, size):
+        from mimeprovider.client.asyncio import ResponseParser
+
+        parser = ResponseParser("GET")
+        chunks = [response[i:i + size]
+                  for i in range(0, len(response), size)]
+
+        self.assertEqual([False] * (len(chunks) - 1) + [True],
+                         [parser.feed(chunk) for chunk in chunks])
+        return parser.response()
+
+    def test_chunked(self):
+        body = "".join("{0:x}\r\n{1}\r\n".format(100, "x" * 100)
+                       for _ in range(100))
+        response = ("HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n"
+                    "\r\n" + body + "0\r\n\r\n")
+
+        for size in (1, 7, 4096, len(response)):
+            self.assertEqual("x" * 10000, self.parse(response, size).content)
+
+    def test_length(self):
+        response = "HTTP/1.1 200 OK\r\nContent-Length: 100000\r\n\r\n"
+        response += "y" * 100000
+
+        for size in (3, 1000, len(response)):
+            parsed = self.parse(response, size)
+            self.assertEqual("y" * 100000, parsed.content)
+            self.assertEqual("100000", parsed.headers["Content-Length"])
+
+    def test_repeated_headers(self):
+        response = self.parse("HTTP/1.1 204 No Content\r\n"
+                              "Vary: Accept\r\nvary: Accept-Encoding\r\n"
+                              "\r\n", 10)
+        self.assertEqual("Accept, Accept-Encoding", response.headers["Vary"])
+
+
+@unittest.skipIf(asyncio is None, "asyncio not available")
+class TestAsyncioClient(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server("127.0.0.1", 0, application,
+                                  server_class=QuietServer,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.loop = asyncio.new_event_loop()
+        self.provider = MimeProvider([Thing])
+        self.client = self.provider.get_async_client(
+            "http://127.0.0.1:{0}".format(self.server.server_port),
+            loop=self.loop, limit=2, parse_threshold=1024)
+
+    def tearDown(self):
+        self.client.close()
+        self.loop.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def run_future(self, future):
+        return self.loop.run_until_complete(future)
+
+    def test_post(self):
+        response, obj = self.run_future(
+            self.client.post("/echo", mime_body=Thing(42)))
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(42, obj.value)
+
+    def test_concurrent(self):
+        futures = [self.client.post("/echo", mime_body=Thing(i))
+                   for i in range(10)]
+        results = self.run_future(asyncio.gather(*futures, loop=self.loop))
+
+        self.assertEqual(range(10), [obj.value for _, obj in results])
+        self.assertTrue(self.client.pool.size <= 2)
+
+    def test_offloaded_parse(self):
+        _, obj = self.run_future(self.client.get("/large"))
+        self.assertEqual(100000, len(obj.value))
+
+    def test_decompressed(self):
+        response, obj = self.run_future(self.client.get("/gzip"))
+        self.assertEqual("x" * 1000, obj.value)
+
+    def test_expect(self):
+        future = self.client.get("/echo", expect=[object])
+        self.assertRaises(ClientException, self.run_future, future)
+
+    def test_unknown_type(self):
+        future = self.client.get("/unknown")
+        self.assertRaises(ClientException, self.run_future, future)
+
+    def test_request_line(self):
+        request = self.client._serialize(
+            "GET", u"/a b/\xe5?q=%20&r=x y", {"X-Value": "1"}, None)
+        self.assertTrue(request.startswith(
+            "GET /a%20b/%C3%A5?q=%20&r=x%20y HTTP/1.1\r\n"))
+
+        for headers in ({"X-Value": "a\r\nX-Injected: 1"},
+                        {"X Name": "a"}, {"X-Value\n": "a"}):
+            self.assertRaises(ValueError, self.client._serialize,
+                              "GET", "/", headers, None)
+
+        request = self.client._serialize(
+            "GET", "/\r\nX-Injected: 1", {}, None)
+        self.assertTrue(request.startswith(
+            "GET /%0D%0AX-Injected:%201 HTTP/1.1\r\n"))
+
+    def test_read_timeout(self):
+        self.client.read_timeout = 0.1
+
+        future = self.client.get("/stall")
+        self.assertRaises(ClientException, self.run_future, future)
+        self.assertEqual(0, self.client.pool.size)
+
+    def test_cancel_releases(self):
+        for _ in range(3):
+            future = asyncio.wait_for(self.client.get("/stall"), 0.1,
+                                      loop=self.loop)
+            self.assertRaises(asyncio.TimeoutError, self.run_future, future)
+
+        # let the cancellation reach the connection.
+        self.run_future(asyncio.sleep(0.01, loop=self.loop))
+        self.assertEqual(0, self.client.pool.size)
+
+        _, obj = self.run_future(self.client.post("/echo",
+                                                  mime_body=Thing(1)))
+        self.assertEqual(1, obj.value)
+
+
+class KeepAliveServer(threading.Thread):
+    """
+    Answers the first request on every connection and closes it on the
+    second, like a server dropping idle keep-alive connections.
+    """
+    body = b'{"value": 1}'
+
+    def __init__(self):
+        super(KeepAliveServer, self).__init__()
+        self.daemon = True
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.port = self.sock.getsockname()[1]
+        self.connections = 0
+
+    def run(self):
+        while True:
+            try:
+                connection, _ = self.sock.accept()
+            except socket.error:
+                return
+
+            self.connections += 1
+            self.serve(connection)
+
+    def serve(self, connection):
+        data = b""
+
+        while b"\r\n\r\n" not in data:
+            chunk = connection.recv(4096)
+
+            if not chunk:
+                break
+
+            data += chunk
+
+        connection.sendall(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/thing+json\r\n"
+            b"Content-Length: " + str(len(self.body)).encode("ascii") +
+            b"\r\n\r\n" + self.body)
+
+        connection.recv(4096)
+        connection.close()
+
+    def close(self):
+        self.sock.close()
+
+
+@unittest.skipIf(asyncio is None, "asyncio not available")
+class TestKeepAliveRetry(unittest.TestCase):
+    def setUp(self):
+        self.server = KeepAliveServer()
+        self.server.start()
+
+        self.loop = asyncio.new_event_loop()
+        self.client = MimeProvider([Thing]).get_async_client(
+            "http://127.0.0.1:{0}".format(self.server.port),
+            loop=self.loop, limit=1)
+
+    def tearDown(self):
+        self.client.close()
+        self.loop.close()
+        self.server.close()
+
+    def run_future(self, future):
+        return self.loop.run_until_complete(future)
+
+    def test_retried(self):
+        self.run_future(self.client.get("/"))
+        _, obj = self.run_future(self.client.get("/"))
+
+        self.assertEqual(1, obj.value)
+        self.assertEqual(2, self.server.connections)
+
+    def test_not_idempotent(self):
+        self.run_future(self.client.get("/"))
+
+        future = self.client.post("/", mime_body=Thing(1))
+        self.assertRaises(ClientException, self.run_future, future)
+        self.assertEqual(0, self.client.pool.size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from mimeprovider import MimeProvider
+from mimeprovider.codec import Codec
+from mimeprovider.codec import get_codec
+from mimeprovider.documenttype.json import JsonDocumentType
+
+
+class UpperCodec(Codec):
+    name = "upper"
+
+    def dumps(self, data):
+        return str(data).upper()
+
+    def loads(self, data):
+        return {"value": data.lower()}
+
+
+class A(object):
+    object_type = "a"
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_data(self):
+        return self.value
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["value"])
+
+
+class TestCodec(unittest.TestCase):
+    def test_default(self):
+        codec = get_codec()
+        self.assertEqual("stdlib", codec.name)
+        self.assertEqual({"a": [1]}, codec.loads(memoryview(b'{"a": [1]}')))
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, get_codec, "unknown")
+
+    def test_provider_codec(self):
+        provider = MimeProvider([A], codec=UpperCodec())
+        document_type, _, _ = provider.mimetypes["application/a+json"]
+
+        self.assertTrue(isinstance(document_type, JsonDocumentType))
+        self.assertEqual("FOO", document_type.render(None, A("foo")))
+        self.assertEqual("bar",
+                         document_type.parse(None, A, "BAR").value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import itertools
+import threading
+import unittest
+
+from pyramid.config import Configurator
+from pyramid.request import Request
+from wsgiref.simple_server import make_server
+
+from mimeprovider import MimeProvider
+from mimeprovider.collection import Collection
+from mimeprovider.collection import make_collection
+from mimeprovider.collection import paginate
+
+from test.test_requests_client import QuietHandler
+from test.test_requests_client import ThreadingServer
+
+
+class Item(object):
+    object_type = "item"
+    schema = {
+        "type": "object",
+        "properties": {"id": {"type": "integer"}},
+    }
+
+    def __init__(self, id):
+        self.id = id
+
+    def to_data(self):
+        return {"id": self.id}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["id"])
+
+
+class Error(object):
+    object_type = "error"
+
+    def __init__(self, message):
+        self.message = message
+
+    def to_data(self):
+        return {"message": self.message}
+
+
+ItemCollection = make_collection(Item, page_size=3)
+
+TOTAL = 8
+
+
+def error_handler(exc, request):
+    return Error(str(exc))
+
+
+def list_items(request):
+    return paginate(request, "items", (Item(i) for i in range(TOTAL)),
+                    ItemCollection)
+
+
+def list_cursor(request):
+    after = int(request.GET.get("cursor", -1))
+    items = (Item(i) for i in range(after + 1, TOTAL))
+    return paginate(request, "cursor", items, ItemCollection,
+                    cursor=lambda item: item.id)
+
+
+class Query(object):
+    """
+    Stands in for an ORM query, which can only be sliced.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.slices = []
+
+    def __getitem__(self, index):
+        self.slices.append((index.start, index.stop))
+        return (Item(i) for i in range(index.start,
+                                       min(index.stop, self.total)))
+
+
+class TestCollection(unittest.TestCase):
+    def test_lazy_page(self):
+        consumed = itertools.count()
+        items = (Item(next(consumed)) for _ in itertools.count())
+
+        data = Collection(items, page_size=4).to_data()
+
+        self.assertEqual([0, 1, 2, 3], [i["id"] for i in data["items"]])
+        self.assertEqual(5, next(consumed))
+        self.assertFalse("next" in data)
+
+    def test_sliced_query(self):
+        query = Query(TOTAL)
+        request = Request.blank("/items?cursor=3")
+
+        page = paginate(request, "items", query, ItemCollection)
+
+        self.assertEqual([3, 4, 5], [item.id for item in page])
+        self.assertEqual([(3, 7)], query.slices)
+
+    def test_make_collection(self):
+        self.assertEqual("item-collection", ItemCollection.object_type)
+        self.assertEqual(Item.schema,
+                         ItemCollection.schema["properties"]["items"]["items"])
+
+        page = ItemCollection.from_data(
+            {"items": [{"id": 1}], "next": {"$ref": "/items?cursor=1"}})
+
+        self.assertEqual([1], [item.id for item in page])
+        self.assertEqual("/items?cursor=1", page.next["$ref"])
+
+
+class TestPages(unittest.TestCase):
+    def setUp(self):
+        config = Configurator()
+        config.add_route("items", "/items")
+        config.add_route("cursor", "/cursor")
+        config.add_view(list_items, route_name="items", renderer="mime")
+        config.add_view(list_cursor, route_name="cursor", renderer="mime")
+
+        self.provider = MimeProvider([Item, ItemCollection, Error],
+                                     error_handler=error_handler)
+        config.include(self.provider.add_config)
+
+        self.server = make_server("127.0.0.1", 0, config.make_wsgi_app(),
+                                  server_class=ThreadingServer,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.client = self.provider.get_client(
+            "http://127.0.0.1:{0}".format(self.server.server_port),
+            headers={"Accept": "application/item-collection+json"})
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_next_links(self):
+        pages = list(self.client.pages("/items?filter=x", prefetch=False,
+                                       expect=[ItemCollection]))
+
+        self.assertEqual([3, 3, 2], [len(page) for _, page in pages])
+        self.assertEqual("/items?filter=x&cursor=3", pages[0][1].next["$ref"])
+        self.assertEqual("next", pages[0][1].next["rel"])
+        self.assertEqual(None, pages[-1][1].next)
+
+    def test_iterate(self):
+        for uri in ("/items", "/cursor"):
+            ids = [item.id for item in self.client.iterate(uri)]
+            self.assertEqual(range(TOTAL), ids)
+
+    def test_prefetch(self):
+        requested = []
+        request = self.client.request
+
+        def recording(method, uri, **kw):
+            requested.append(uri)
+            return request(method, uri, **kw)
+
+        self.client.request = recording
+        pages = self.client.pages("/items")
+
+        next(pages)
+
+        for _ in range(100):
+            if len(requested) == 2:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertEqual(["/items", "/items?cursor=3"], requested)
+        self.assertEqual(2, len(list(pages)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.document import Document
+from mimeprovider.document import make_document
+from mimeprovider.documenttype.json import JsonDocumentType
+
+
+class Item(Document):
+    object_type = "item"
+    schema = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "required": True},
+            "count": {"type": "integer"},
+            "tags": {"type": "array"},
+        },
+    }
+
+    def describe(self):
+        return "{0} x{1}".format(self.name, self.count)
+
+
+class TestDocument(unittest.TestCase):
+    def test_slots(self):
+        item = Item(name="a", count=1)
+        self.assertEqual(("count", "name", "tags"), Item.__slots__)
+        self.assertFalse(hasattr(item, "__dict__"))
+        self.assertRaises(AttributeError, setattr, item, "other", 1)
+        self.assertEqual("a x1", item.describe())
+
+    def test_data(self):
+        data = {"name": u"åäö", "count": 2, "tags": ["x", {"y": None}]}
+        item = Item.from_data(data)
+
+        self.assertEqual(data, item.to_data())
+        self.assertEqual(data, json.loads(item.to_json()))
+        self.assertEqual({"name": "a"},
+                         Item.from_data({"name": "a"}).to_data())
+        self.assertEqual({"name": None}, Item().to_data())
+        self.assertEqual('{"name": null}', Item().to_json())
+
+    def test_json_key_order(self):
+        Wide = make_document("Wide", "wide", {
+            "properties": dict(("f{0}".format(i), {}) for i in range(20)),
+            "required": ["f3", "f11"],
+        })
+
+        for present in (range(20), range(0, 20, 3), [7]):
+            obj = Wide(**dict(("f{0}".format(i), i) for i in present))
+            self.assertEqual(json.dumps(obj.to_data()), obj.to_json())
+
+    def test_draft4_required(self):
+        Thing = make_document("Thing", "thing", {
+            "properties": {"a": {}, "b": {}},
+            "required": ["a"],
+        })
+        self.assertEqual({"a": None}, Thing().to_data())
+
+    def test_make_document(self):
+        Empty = make_document("Empty", "empty", {"type": "object"})
+        self.assertEqual("empty", Empty.object_type)
+        self.assertEqual({}, Empty().to_data())
+        self.assertEqual("{}", Empty().to_json())
+
+    def test_invalid_property(self):
+        schema = {"properties": {"not valid": {}}}
+        self.assertRaises(ValueError, make_document, "Bad", "bad", schema)
+
+    def test_inherited(self):
+        class Tagged(Item):
+            schema = {"properties": {"name": {}, "label": {}}}
+
+        self.assertEqual(("label",), Tagged.__slots__)
+        self.assertEqual({"label": "l"}, Tagged(label="l").to_data())
+
+
+class TestRender(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def render(self, **kw):
+        provider = MimeProvider([Item], error_handler=lambda e, r: None, **kw)
+        request = Request.blank("/", headers={"Accept": "application/item+json"})
+        request.registry = self.config.registry
+        return provider.renderer(None)(Item(name="a", count=1),
+                                       {"request": request})
+
+    def test_render(self):
+        self.assertEqual(self.render(),
+                         self.render(validation_policy="inbound"))
+        self.assertEqual({"name": "a", "count": 1}, json.loads(self.render()))
+
+    def test_own_to_data(self):
+        class Upper(Item):
+            def to_data(self, fields=None):
+                return {"name": self.name.upper(), "extra": 1}
+
+        class Custom(Document):
+            object_type = "custom"
+            schema = {"properties": {"name": {"type": "string"}}}
+
+            def to_data(self):
+                return {"name": self.name.upper(), "extra": 1}
+
+        self.assertFalse(hasattr(Custom, "to_json"))
+
+        for obj in (Upper(name="abc"), Custom(name="abc")):
+            self.assertEqual({"name": "ABC", "extra": 1}, json.loads(
+                JsonDocumentType().render(None, obj)))
+
+    def test_unrelated_to_json(self):
+        class Exported(object):
+            object_type = "exported"
+
+            def to_data(self):
+                return {"a": 1}
+
+            def to_json(self):
+                return "exported"
+
+        self.assertEqual('{"a": 1}', JsonDocumentType().render(
+            None, Exported()))
+
+
+if __name__ == "__main__":
+    unittest.main()
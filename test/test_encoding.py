@@ -0,0 +1,185 @@
+import gzip
+import io
+import json
+import threading
+import unittest
+import zlib
+
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIRequestHandler
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.encoding import compress
+from mimeprovider.encoding import compress_stream
+from mimeprovider.encoding import decompress_stream
+from mimeprovider.encoding import negotiate_encoding
+from mimeprovider.exceptions import MimeBadRequest
+from mimeprovider.exceptions import MimeRequestEntityTooLarge
+
+
+class Thing(object):
+    object_type = "thing"
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_data(self):
+        return {"value": self.value}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["value"])
+
+
+def error_handler(exc, request):
+    return Thing(None)
+
+
+def gunzip(body):
+    return gzip.GzipFile(fileobj=io.BytesIO(body)).read()
+
+
+class TestEncoding(unittest.TestCase):
+    def test_negotiate(self):
+        self.assertEqual(None, negotiate_encoding(None))
+        self.assertEqual(None, negotiate_encoding("identity, br"))
+        self.assertEqual("gzip", negotiate_encoding("gzip, deflate"))
+        self.assertEqual("deflate", negotiate_encoding("gzip;q=0.5, deflate"))
+        self.assertEqual("deflate", negotiate_encoding("*, gzip;q=0"))
+        self.assertEqual("gzip", negotiate_encoding("x-gzip"))
+
+    def test_stream_roundtrip(self):
+        chunks = ["a" * 1000, "", "b" * 1000]
+
+        for encoding in ("gzip", "deflate"):
+            compressed = list(compress_stream(chunks, encoding))
+            self.assertEqual("".join(chunks), "".join(
+                decompress_stream(compressed, encoding)))
+
+        self.assertEqual("x" * 10, zlib.decompress(compress("x" * 10,
+                                                            "deflate")))
+
+    def test_decompress_limit(self):
+        body = compress("x" * 1000000, "gzip")
+
+        self.assertRaises(MimeRequestEntityTooLarge, list,
+                          decompress_stream([body], "gzip", 1000))
+        self.assertRaises(MimeBadRequest, list,
+                          decompress_stream(["garbage"], "gzip"))
+
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def render(self, obj, accept_encoding="gzip", **kw):
+        provider = MimeProvider([Thing], error_handler=error_handler,
+                                compress=True, compress_threshold=100, **kw)
+        request = Request.blank("/", headers={
+            "Accept": "application/thing+json",
+            "Accept-Encoding": accept_encoding,
+        })
+        request.registry = self.config.registry
+        body = provider.renderer(None)(obj, {"request": request})
+        return request.response, body
+
+    def test_compressed(self):
+        response, body = self.render(Thing("x" * 1000))
+
+        self.assertEqual("gzip", response.content_encoding)
+        self.assertEqual(("Accept-Encoding",), response.vary)
+        self.assertEqual({"value": "x" * 1000}, json.loads(gunzip(body)))
+
+    def test_threshold(self):
+        response, body = self.render(Thing("x"))
+
+        self.assertEqual(None, response.content_encoding)
+        self.assertEqual(("Accept-Encoding",), response.vary)
+        self.assertEqual('{"value": "x"}', body)
+
+    def test_not_accepted(self):
+        response, body = self.render(Thing("x" * 1000), "identity")
+        self.assertEqual(None, response.content_encoding)
+
+    def test_stream(self):
+        response, body = self.render(Thing("x"), "deflate", stream=True)
+
+        self.assertEqual(None, body)
+        self.assertEqual("deflate", response.content_encoding)
+        self.assertEqual('{"value": "x"}', zlib.decompress(response.body))
+
+
+class TestGetMimeBody(unittest.TestCase):
+    def request(self, body, encoding):
+        request = Request.blank("/", method="POST", body=body)
+        request.content_type = "application/thing+json"
+        request.headers["Content-Encoding"] = encoding
+        return request
+
+    def test_decompressed(self):
+        provider = MimeProvider([Thing])
+        request = self.request(compress('{"value": 1}', "gzip"), "gzip")
+        self.assertEqual(1, provider.get_mime_body(request).value)
+
+    def test_limit(self):
+        provider = MimeProvider([Thing], max_body_size=1000)
+        body = compress(json.dumps({"value": "x" * 10000}), "gzip")
+        self.assertRaises(MimeRequestEntityTooLarge, provider.get_mime_body,
+                          self.request(body, "gzip"))
+
+    def test_unsupported(self):
+        provider = MimeProvider([Thing])
+        self.assertRaises(MimeBadRequest, provider.get_mime_body,
+                          self.request("{}", "br"))
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def application(environ, start_response):
+    length = int(environ.get("CONTENT_LENGTH") or 0)
+    body = environ["wsgi.input"].read(length)
+
+    if environ.get("HTTP_CONTENT_ENCODING") == "gzip":
+        body = gunzip(body)
+
+    body = compress(body, "gzip")
+    start_response("200 OK", [("Content-Type", "application/thing+json"),
+                              ("Content-Encoding", "gzip"),
+                              ("Content-Length", str(len(body)))])
+    return [body]
+
+
+class TestClient(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server("127.0.0.1", 0, application,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.client = MimeProvider([Thing]).get_client(
+            "http://127.0.0.1:{0}".format(self.server.server_port),
+            content_encoding="gzip")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_roundtrip(self):
+        response, obj = self.client.post("/", mime_body=Thing("x" * 1000))
+
+        self.assertEqual("gzip", response.request.headers["Content-Encoding"])
+        self.assertEqual("x" * 1000, obj.value)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+import json
+import threading
+import unittest
+
+from pyramid import testing
+from pyramid.config import Configurator
+from pyramid.request import Request
+from wsgiref.simple_server import make_server
+
+from mimeprovider import MimeProvider
+from mimeprovider.document import make_document
+from mimeprovider.exceptions import MimeBadRequest
+from mimeprovider.fields import accepts_fields
+from mimeprovider.fields import project_schema
+from mimeprovider.fields import requested_fields
+
+from test.test_ndjson import get_types
+from test.test_requests_client import QuietHandler
+from test.test_requests_client import ThreadingServer
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "count": {"type": "integer"},
+        "expensive": {"type": "string"},
+    },
+    "required": ["name", "count", "expensive"],
+    "additionalProperties": False,
+}
+
+
+class Item(object):
+    object_type = "item"
+    schema = SCHEMA
+
+    def __init__(self, name="a", count=1):
+        self.name = name
+        self.count = count
+        self.requested = []
+
+    def to_data(self, fields=None):
+        self.requested.append(fields)
+        data = {"name": self.name, "count": self.count}
+
+        if fields is None or "expensive" in fields:
+            data["expensive"] = "computed"
+
+        return data
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data.get("name"), data.get("count"))
+
+
+class Plain(object):
+    object_type = "plain"
+
+    def to_data(self):
+        return {"a": 1, "b": 2}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls()
+
+
+def error_handler(exc, request):
+    return Plain()
+
+
+Slotted = make_document("Slotted", "slotted", SCHEMA)
+
+
+class TestFields(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+        self.provider = MimeProvider([Item, Plain, Slotted],
+                                     error_handler=error_handler,
+                                     types=get_types())
+        self.renderer = self.provider.renderer(None)
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def render(self, obj, path="/", accept=None, context=None):
+        request = Request.blank(path, headers={
+            "Accept": accept or "application/{0}+json".format(
+                obj.object_type)})
+        request.registry = self.config.registry
+        body = self.renderer(obj, {"request": request, "context": context})
+        return request.response, body
+
+    def test_requested_fields(self):
+        request = Request.blank("/?fields=name,%20count")
+        self.assertEqual(frozenset(["name", "count"]),
+                         requested_fields(request))
+
+        request = Request.blank("/", headers={
+            "Accept": 'application/item+json; fields="name count", */*'})
+        self.assertEqual(frozenset(["name", "count"]),
+                         requested_fields(request))
+
+        self.assertEqual(None, requested_fields(Request.blank("/")))
+        self.assertEqual(None, requested_fields(Request.blank("/?fields=")))
+
+    def test_project_schema(self):
+        schema = project_schema(SCHEMA, frozenset(["name"]))
+
+        self.assertEqual(["name"], schema["properties"].keys())
+        self.assertEqual(["name"], schema["required"])
+        self.assertEqual(SCHEMA["required"], ["name", "count", "expensive"])
+
+        schema = project_schema({"type": "array", "items": SCHEMA},
+                                frozenset(["count"]))
+        self.assertEqual(["count"], schema["items"]["required"])
+
+    def test_pushed_down(self):
+        item = Item()
+        response, body = self.render(item, "/?fields=name,count")
+
+        self.assertEqual(200, response.status_int)
+        self.assertEqual({"name": "a", "count": 1}, json.loads(body))
+        self.assertEqual([frozenset(["name", "count"])], item.requested)
+
+    def test_accept_parameter(self):
+        item = Item()
+        _, body = self.render(
+            item, accept='application/item+json; fields="count"')
+
+        self.assertEqual({"count": 1}, json.loads(body))
+
+    def test_projected_without_support(self):
+        self.assertFalse(accepts_fields(Plain))
+        _, body = self.render(Plain(), "/?fields=b")
+        self.assertEqual({"b": 2}, json.loads(body))
+
+    def test_document(self):
+        obj = Slotted(name="x", count=2, expensive="e")
+
+        self.assertEqual({"count": 2}, obj.to_data(fields=["count"]))
+        _, body = self.render(obj, "/?fields=name")
+        self.assertEqual({"name": "x"}, json.loads(body))
+
+    def test_stream(self):
+        class Stream(object):
+            object_type = "item"
+
+            def to_data(self):
+                return (Item(str(i), i).to_data() for i in range(3))
+
+        response, _ = self.render(Stream(), "/?fields=count",
+                                  accept="application/item+x-ndjson")
+
+        self.assertEqual([{"count": 0}, {"count": 1}, {"count": 2}],
+                         [json.loads(line) for line in
+                          "".join(response.app_iter).splitlines()])
+
+    def test_bounded_validators(self):
+        compiled = len(self.provider.validators)
+
+        for i in range(50):
+            self.render(Item(), "/?fields=name,x{0}".format(i))
+            self.render(Item(), "/?fields=count,name,x{0}".format(i))
+
+        self.assertEqual(compiled, len(self.provider.validators))
+        self.assertEqual(2, len(self.provider.projector.cache))
+
+    def test_error_not_projected(self):
+        _, body = self.render(Plain(), "/?fields=b",
+                              context=MimeBadRequest("bad"))
+        self.assertEqual({"a": 1, "b": 2}, json.loads(body))
+
+    def test_all_fields(self):
+        item = Item()
+        _, body = self.render(item)
+
+        self.assertEqual(3, len(json.loads(body)))
+        self.assertEqual([None], item.requested)
+
+
+class TestClientFields(unittest.TestCase):
+    def setUp(self):
+        config = Configurator()
+        config.add_route("item", "/item")
+        config.add_view(lambda request: Item("served", 7),
+                        route_name="item", renderer="mime")
+        config.add_route("bad", "/bad")
+        config.add_view(self.bad, route_name="bad", renderer="mime")
+
+        provider = MimeProvider([Item, Plain], error_handler=error_handler)
+        config.include(provider.add_config)
+
+        self.server = make_server("127.0.0.1", 0, config.make_wsgi_app(),
+                                  server_class=ThreadingServer,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.client = provider.get_client(
+            "http://127.0.0.1:{0}".format(self.server.server_port),
+            headers={"Accept": "application/item+json"})
+
+    def bad(self, request):
+        raise MimeBadRequest("bad")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fields(self):
+        response, obj = self.client.get("/item", fields=["name"],
+                                        params={"x": "1"})
+
+        self.assertTrue("fields=name" in response.url)
+        self.assertTrue("x=1" in response.url)
+        self.assertEqual("served", obj.name)
+        self.assertEqual(None, obj.count)
+
+        response, obj = self.client.get("/item", fields="name,count")
+        self.assertEqual(7, obj.count)
+
+    def test_error(self):
+        response, obj = self.client.get(
+            "/bad", fields=["b"], headers={"Accept": "application/plain+json"})
+
+        self.assertEqual({"a": 1, "b": 2}, response.json())
+
+
+if __name__ == "__main__":
+    unittest.main()
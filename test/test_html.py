@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from benchmarks.legacy_html import legacy_render
+
+from mimeprovider.documenttype.html import HtmlDocumentType
+
+
+class Document(object):
+    object_type = "document"
+
+    def __init__(self, data):
+        self.data = data
+
+    def to_data(self):
+        return self.data
+
+
+DATA = [
+    None,
+    "<script>&</script>",
+    u"åäö",
+    12.5,
+    [],
+    {},
+    [1, [2, [3, []]], {"a": "b"}],
+    {"z": 1, "a": [{"$ref": "/a?b&c", "rel": "<a>"}, {"$ref": "/b"}],
+     "m": {"nested": {"deeper": [True, False]}}},
+    (1, 2),
+]
+
+
+class TestHtmlDocumentType(unittest.TestCase):
+    def test_same_as_legacy(self):
+        document_type = HtmlDocumentType()
+
+        for data in DATA:
+            obj = Document(data)
+            self.assertEqual(legacy_render(obj),
+                             document_type.render(None, obj))
+
+    def test_stream(self):
+        document_type = HtmlDocumentType()
+        document_type.chunk_size = 32
+        obj = Document([{"value": i, "name": u"åäö"} for i in range(100)])
+
+        chunks = list(document_type.render_stream(None, obj))
+
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(legacy_render(obj), "".join(chunks))
+
+    def test_deeply_nested(self):
+        data = []
+
+        for _ in range(5000):
+            data = [data]
+
+        result = HtmlDocumentType().render(None, Document(data))
+        self.assertEqual(5001, result.count("<table"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import json
+import unittest
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.documenttype import DocumentType
+from mimeprovider.exceptions import MimeBadRequest
+from mimeprovider.instrumentation import CallbackInstrumentation
+from mimeprovider.instrumentation import HistogramInstrumentation
+
+
+class Thing(object):
+    object_type = "thing"
+    schema = {"type": "object"}
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_data(self):
+        return {"value": self.value}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["value"])
+
+
+class LegacyDocumentType(DocumentType):
+    """
+    A third-party document type implementing only render and parse.
+    """
+    custom_mime = True
+    mime = "application/{o.object_type}+legacy"
+
+    def render(self, validator, obj):
+        return "L" + json.dumps(obj.to_data())
+
+    def parse(self, validator, cls, string):
+        return cls.from_data(json.loads(string[1:]))
+
+
+def error_handler(exc, request):
+    return Thing(str(exc))
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+        self.instrumentation = HistogramInstrumentation()
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def provider(self, **kw):
+        return MimeProvider([Thing], error_handler=error_handler,
+                            instrumentation=self.instrumentation, **kw)
+
+    def request(self, *args, **kw):
+        request = Request.blank(*args, **kw)
+        request.registry = self.config.registry
+        return request
+
+    def phases(self):
+        return dict((entry["phase"], entry)
+                    for entry in self.instrumentation.snapshot())
+
+    def test_render(self):
+        renderer = self.provider().renderer(None)
+        request = self.request(
+            "/", headers={"Accept": "application/thing+json"})
+
+        body = renderer(Thing(1), {"request": request})
+
+        phases = self.phases()
+        self.assertEqual(
+            set(["negotiate", "to_data", "validate", "serialize"]),
+            set(phases))
+        self.assertEqual(len(body), phases["serialize"]["size"])
+        self.assertEqual("Thing", phases["serialize"]["document"])
+        self.assertEqual("application/thing+json",
+                         phases["serialize"]["mimetype"])
+
+    def test_render_stream(self):
+        renderer = self.provider(stream=True).renderer(None)
+        request = self.request(
+            "/", headers={"Accept": "application/thing+json"})
+
+        renderer(Thing(1), {"request": request})
+        self.assertFalse("serialize" in self.phases())
+
+        body = request.response.body
+        self.assertEqual(len(body), self.phases()["serialize"]["size"])
+
+    def test_render_error(self):
+        renderer = self.provider().renderer(None)
+        request = self.request("/")
+        renderer._render_error(MimeBadRequest("failed"), request)
+
+        phases = self.phases()
+        self.assertTrue("error_handler" in phases)
+        self.assertTrue("serialize" in phases)
+
+    def test_get_mime_body(self):
+        provider = self.provider()
+        request = self.request("/", method="POST",
+                               body=json.dumps({"value": 2}))
+        request.content_type = "application/thing+json"
+
+        self.assertEqual(2, provider.get_mime_body(request).value)
+        self.assertEqual(
+            set(["read", "decode", "validate", "from_data"]),
+            set(self.phases()))
+
+    def test_render_and_parse_only(self):
+        provider = self.provider(types=[LegacyDocumentType])
+        request = self.request(
+            "/?fields=value", headers={"Accept": "application/thing+legacy"})
+
+        body = provider.renderer(None)(Thing(1), {"request": request})
+        self.assertEqual('L{"value": 1}', body)
+
+        request = self.request("/", method="POST", body='L{"value": 2}')
+        request.content_type = "application/thing+legacy"
+        self.assertEqual(2, provider.get_mime_body(request).value)
+
+        self.assertTrue("serialize" in self.phases())
+        self.assertTrue("decode" in self.phases())
+
+    def test_callback_errors(self):
+        calls = list()
+
+        def callback(phase, duration, **labels):
+            calls.append(phase)
+            raise Exception("broken pipeline")
+
+        instrumentation = CallbackInstrumentation(callback)
+        instrumentation.record("negotiate", 0.1)
+        self.assertEqual(["negotiate"], calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.documenttype.json import JsonDocumentType
+from mimeprovider.documenttype.json import iterdecode
+from mimeprovider.documenttype.json import iterencode
+from mimeprovider.exceptions import MimeBadRequest
+from mimeprovider.exceptions import MimeRequestEntityTooLarge
+from mimeprovider.exceptions import MimeValidationError
+from mimeprovider.validators.jsonschema import JsonSchemaValidator
+
+ITEM_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer", "required": True},
+        },
+    },
+}
+
+
+class Items(object):
+    object_type = "items"
+    schema = ITEM_SCHEMA
+
+    def __init__(self, items):
+        self.items = items
+
+    def to_data(self):
+        return (item for item in self.items)
+
+
+class TestIterencode(unittest.TestCase):
+    def test_same_as_dumps(self):
+        values = [
+            None, True, 1, 1.5, "string", u"åäö",
+            [], {}, [1, [2, [3]]], {"a": {"b": [1, 2, {"c": None}]}},
+            {1: "int key", None: "null key"}, (1, 2),
+        ]
+
+        for value in values:
+            self.assertEqual(json.dumps(value), "".join(iterencode(value)))
+
+    def test_generators(self):
+        data = {"items": (i for i in range(3)), "nested": iter([iter([1])])}
+        expected = json.dumps({"items": [0, 1, 2], "nested": [[1]]})
+        self.assertEqual(expected, "".join(iterencode(data)))
+
+    def test_deeply_nested(self):
+        data = []
+
+        for _ in range(5000):
+            data = [data]
+
+        self.assertEqual("[" * 5001 + "]" * 5001, "".join(iterencode(data)))
+
+
+class TestRenderStream(unittest.TestCase):
+    def setUp(self):
+        self.document_type = JsonDocumentType()
+        self.validator = JsonSchemaValidator(ITEM_SCHEMA)
+
+    def render(self, items):
+        chunks = self.document_type.render_stream(self.validator, Items(items))
+        return "".join(chunks)
+
+    def test_validates_per_element(self):
+        items = [{"id": i} for i in range(10)]
+        self.assertEqual(json.dumps(items), self.render(items))
+
+    def test_invalid_element(self):
+        items = [{"id": 1}, {"id": "two"}]
+        self.assertRaises(MimeValidationError, self.render, items)
+
+    def test_chunk_size(self):
+        self.document_type.chunk_size = 64
+        chunks = list(self.document_type.render_stream(
+            self.validator, Items([{"id": i} for i in range(100)])))
+        self.assertTrue(len(chunks) > 1)
+
+
+class TestStreamingRenderer(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def test_app_iter(self):
+        provider = MimeProvider([Items], error_handler=lambda e, r: None,
+                                stream=True)
+        renderer = provider.renderer(None)
+
+        request = Request.blank(
+            "/", headers={"Accept": "application/items+json"})
+        request.registry = self.config.registry
+
+        result = renderer(Items([{"id": 1}]), {"request": request})
+
+        self.assertEqual(None, result)
+        self.assertEqual('[{"id": 1}]', request.response.body)
+        self.assertEqual("application/items+json",
+                         request.response.content_type)
+
+
+def split(string, size):
+    return [string[i:i + size] for i in range(0, len(string), size)]
+
+
+class TestIterdecode(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        data = [1, 12345, -1.5e10, u"åäö", {"a": [True, False, None]}, [], {}]
+        encoded = json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+        for size in (1, 2, 3, 7, len(encoded)):
+            result = list(iterdecode(split(encoded, size)))
+            self.assertEqual(data, result)
+
+    def test_empty(self):
+        self.assertEqual([], list(iterdecode([" [ ", " ] "])))
+
+    def test_invalid(self):
+        for string in ('{"a": 1}', "[1 2]", "[1,", "[1] 2", ""):
+            self.assertRaises(ValueError, list, iterdecode(split(string, 2)))
+
+
+class Item(object):
+    object_type = "item"
+
+    def __init__(self, id):
+        self.id = id
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["id"])
+
+
+class ItemList(object):
+    object_type = "itemlist"
+    schema = ITEM_SCHEMA
+
+    def __init__(self, items):
+        self.items = items
+
+    @classmethod
+    def from_data(cls, data):
+        return cls.from_data_iter(data)
+
+    @classmethod
+    def from_data_iter(cls, items):
+        return cls([Item.from_data(item) for item in items])
+
+
+class Unreadable(object):
+    def read(self, size=-1):
+        raise AssertionError("body should not be read")
+
+
+class TestGetMimeBody(unittest.TestCase):
+    def setUp(self):
+        self.provider = MimeProvider([ItemList], max_body_size=1024)
+
+    def request(self, body, content_type="application/itemlist+json"):
+        request = Request.blank("/", method="POST", body=body)
+        request.content_type = content_type
+        return request
+
+    def test_parse_stream(self):
+        body = json.dumps([{"id": i} for i in range(50)])
+        result = self.provider.get_mime_body(self.request(body))
+        self.assertEqual(range(50), [item.id for item in result.items])
+
+    def test_invalid_element(self):
+        request = self.request('[{"id": 1}, {"id": "two"}]')
+        self.assertRaises(MimeValidationError,
+                          self.provider.get_mime_body, request)
+
+    def test_empty_body(self):
+        request = self.request("")
+        request.content_length = None
+        request.is_body_readable = True
+        self.assertEqual(None, self.provider.get_mime_body(request))
+
+    def test_invalid_body(self):
+        for body in ('{"id": 1}', "[{", "not json"):
+            self.assertRaises(MimeBadRequest,
+                              self.provider.get_mime_body, self.request(body))
+
+    def test_too_large(self):
+        request = self.request("[]")
+        request.content_length = 2048
+        request.body_file_raw = Unreadable()
+        self.assertRaises(MimeRequestEntityTooLarge,
+                          self.provider.get_mime_body, request)
+
+    def test_too_large_without_length(self):
+        request = self.request(json.dumps([{"id": i} for i in range(1000)]))
+        request.content_length = None
+        request.is_body_readable = True
+        self.assertRaises(MimeRequestEntityTooLarge,
+                          self.provider.get_mime_body, request)
+
+    def test_unsupported_content_type(self):
+        request = self.request("[]", content_type="application/other+json")
+        request.body_file_raw = Unreadable()
+        self.assertRaises(MimeBadRequest,
+                          self.provider.get_mime_body, request)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import importlib
+import os
+import subprocess
+import sys
+import unittest
+
+from mimeprovider.documenttype import DOCUMENT_TYPES
+from mimeprovider.documenttype import DocumentType
+from mimeprovider.documenttype import get_document_type
+from mimeprovider.negotiation import parse_content_type
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import sys
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+
+class Thing(object):
+    object_type = "thing"
+    schema = {"type": "object"}
+
+    def to_data(self):
+        return {}
+
+provider = MimeProvider([Thing], error_handler=lambda e, r: None)
+loaded = [sys.modules.get(name) is not None for name in sys.argv[1:]]
+
+request = Request.blank("/", headers={"Accept": "application/thing+json"})
+request.registry = testing.setUp().registry
+provider.renderer(None)(Thing(), {"request": request})
+rendered = [sys.modules.get(name) is not None for name in sys.argv[1:]]
+
+sys.stdout.write(repr((loaded, rendered)))
+"""
+
+MODULES = [
+    "requests",
+    "werkzeug",
+    "jsonschema",
+    "mimeprovider.documenttype.json",
+    "mimeprovider.documenttype.html",
+]
+
+
+class TestLazyLoading(unittest.TestCase):
+    def test_modules(self):
+        output = subprocess.check_output(
+            [sys.executable, "-c", SCRIPT] + MODULES, cwd=ROOT)
+        loaded, rendered = eval(output)
+
+        # schemas are checked by jsonschema when they are registered, and
+        # jsonschema itself imports requests when available.
+        self.assertEqual([True, False, True, False, False], loaded)
+        self.assertEqual([True, False, True, True, False], rendered)
+
+    def test_import(self):
+        output = subprocess.check_output(
+            [sys.executable, "-c",
+             "import sys, mimeprovider; "
+             "sys.stdout.write(repr('pyramid' in sys.modules))"],
+            cwd=ROOT)
+
+        self.assertEqual("False", output)
+
+    def test_registry(self):
+        for module, info in DOCUMENT_TYPES.items():
+            real = importlib.import_module(module).__document_type__
+            lazy = get_document_type(module)
+
+            for key in ("mime", "custom_mime", "streaming", "options"):
+                self.assertEqual(getattr(real, key), getattr(lazy, key))
+
+            self.assertTrue(isinstance(lazy, DocumentType))
+
+    def test_parse_content_type(self):
+        self.assertEqual(("application/a+json", {"charset": "UTF-8"}),
+                         parse_content_type(
+                             'application/a+json; Charset="UTF-8"'))
+        self.assertEqual(("text/plain", {}), parse_content_type("text/plain"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider.links import JsonRef
+
+
+class Item(object):
+    object_type = "item"
+
+
+class Named(object):
+    pass
+
+
+class Typed(object):
+    def __init__(self, object_type):
+        self._object_type = object_type
+
+    @property
+    def object_type(self):
+        return self._object_type
+
+
+VALUES = [
+    1, 0, 3.5, "plain", "with space", "a/b", "100%", "~!$&'()*+,;=:@",
+    u"\xe5ngstr\xf6m", u"☃", "?#",
+]
+
+
+def pregenerator(request, elements, kw):
+    kw["id"] = "pre-" + str(kw["id"])
+    return elements, kw
+
+
+class TestJsonRef(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+        self.config.add_route("item", "/items/{id}")
+        self.config.add_route("nested", "items/{id:\\d+}/x y/{name}.json")
+        self.config.add_route("static", "/static path")
+        self.config.add_route("remainder", "/files/*path")
+        self.config.add_route("old", "/old/:id")
+        self.config.add_route("pre", "/pre/{id}", pregenerator=pregenerator)
+
+        self.request = Request.blank("/")
+        self.request.registry = self.config.registry
+        self.json_ref = JsonRef(self.request)
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def assertSame(self, route, **kw):
+        expected = self.request.route_path(route, **dict(kw))
+        self.assertEqual(expected, self.json_ref(route, **kw)["$ref"])
+
+    def test_identical(self):
+        for value in VALUES:
+            self.assertSame("item", id=value)
+            self.assertSame("nested", id=value, name=value)
+
+        self.assertSame("static")
+        self.assertSame("item", id=1, extra="ignored")
+        self.assertSame("item", id=1, _query={"a": u"\xe5", "b": [1, 2]})
+        self.assertSame("item", id=1, _query="x y", _anchor="top of")
+        self.assertSame("item", id=1, _query=None)
+
+    def test_script_name(self):
+        self.request.script_name = "/app root"
+        self.assertSame("item", id="a b")
+
+    def test_fallback(self):
+        self.assertSame("remainder", path=("a", "b c"))
+        self.assertSame("old", id="a b")
+        self.assertSame("pre", id=1)
+        self.assertEqual("/pre/pre-1", self.json_ref("pre", id=1)["$ref"])
+
+    def test_errors(self):
+        self.assertRaises(KeyError, self.json_ref, "item")
+        self.assertRaises(KeyError, self.json_ref, "missing")
+
+    def test_rel(self):
+        self.assertEqual("item", self.json_ref("item", Item(), id=1)["rel"])
+        self.assertEqual("item", self.json_ref("item", Item, id=1)["rel"])
+        self.assertEqual("Named", self.json_ref("item", Named(), id=1)["rel"])
+        self.assertEqual("item", self.json_ref("item", id=1)["rel"])
+        self.assertEqual("x", self.json_ref("item", Item(), id=1,
+                                            rel_="x")["rel"])
+
+        item = Item()
+        item.object_type = "special"
+        self.assertEqual("special", self.json_ref("item", item, id=1)["rel"])
+
+    def test_rel_property(self):
+        for object_type in ("a", "b"):
+            self.assertEqual(object_type, self.json_ref(
+                "item", Typed(object_type), id=1)["rel"])
+
+    def test_many(self):
+        items = [{"id": value} for value in VALUES]
+        items.append({"id": 1, "_query": {"page": 2}})
+
+        refs = self.json_ref.many("item", items, Item())
+
+        self.assertEqual(
+            [self.request.route_path("item", **dict(kw)) for kw in items],
+            [ref["$ref"] for ref in refs])
+        self.assertEqual(set(["item"]), set(ref["rel"] for ref in refs))
+
+        refs = self.json_ref.many("pre", [{"id": 1}], rel_="p")
+        self.assertEqual([{"$ref": "/pre/pre-1", "rel": "p"}], refs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+import copy
+import json
+import threading
+import unittest
+
+from pyramid.config import Configurator
+from pyramid.request import Request
+from wsgiref.simple_server import make_server
+
+from mimeprovider import MimeProvider
+from mimeprovider.exceptions import MimeBadRequest
+from mimeprovider.exceptions import MimeValidationError
+from mimeprovider.fields import Projector
+from mimeprovider.mergepatch import MergePatch
+from mimeprovider.mergepatch import apply_patch
+from mimeprovider.mergepatch import make_patch
+
+from test.test_requests_client import QuietHandler
+from test.test_requests_client import ThreadingServer
+
+# examples from RFC 7396, appendix A.
+EXAMPLES = [
+    ({"a": "b"}, {"a": "c"}, {"a": "c"}),
+    ({"a": "b"}, {"b": "c"}, {"a": "b", "b": "c"}),
+    ({"a": "b"}, {"a": None}, {}),
+    ({"a": "b", "b": "c"}, {"a": None}, {"b": "c"}),
+    ({"a": ["b"]}, {"a": "c"}, {"a": "c"}),
+    ({"a": "c"}, {"a": ["b"]}, {"a": ["b"]}),
+    ({"a": {"b": "c"}}, {"a": {"b": "d", "c": None}}, {"a": {"b": "d"}}),
+    ({"a": [{"b": "c"}]}, {"a": [1]}, {"a": [1]}),
+    (["a", "b"], ["c", "d"], ["c", "d"]),
+    ({"a": "b"}, ["c"], ["c"]),
+    ({"a": "foo"}, None, None),
+    ({"a": "foo"}, "bar", "bar"),
+    ({"e": None}, {"a": 1}, {"e": None, "a": 1}),
+    ([1, 2], {"a": "b", "c": None}, {"a": "b"}),
+    ({}, {"a": {"bb": {"ccc": None}}}, {"a": {"bb": {}}}),
+]
+
+
+class Item(object):
+    object_type = "item"
+    schema = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+            "meta": {"type": "object"},
+        },
+        "required": ["name"],
+        "additionalProperties": False,
+    }
+
+    def __init__(self, name, tags=None, meta=None):
+        self.name = name
+        self.tags = tags or []
+        self.meta = meta or {}
+
+    def to_data(self):
+        return {"name": self.name, "tags": self.tags, "meta": self.meta}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data.get("name"), data.get("tags"), data.get("meta"))
+
+
+class Error(object):
+    object_type = "error"
+
+    def __init__(self, message):
+        self.message = message
+
+    def to_data(self):
+        return {"message": self.message}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["message"])
+
+
+def error_handler(exc, request):
+    request.response.status_code = exc.status_code
+    return Error(str(exc))
+
+
+class TestMergePatch(unittest.TestCase):
+    def test_apply(self):
+        for target, patch, result in EXAMPLES:
+            self.assertEqual(result, apply_patch(target, patch))
+
+    def test_apply_does_not_modify(self):
+        target = {"a": {"b": 1}}
+        apply_patch(target, {"a": {"b": None}})
+        self.assertEqual({"a": {"b": 1}}, target)
+
+    def test_make_patch(self):
+        original = {"name": "a", "tags": ["x"], "meta": {"k": 1, "l": 2}}
+        modified = {"name": "a", "tags": ["x", "y"], "meta": {"k": 1}}
+
+        patch = make_patch(original, modified)
+
+        self.assertEqual({"tags": ["x", "y"], "meta": {"l": None}}, patch)
+        self.assertEqual(modified, apply_patch(original, patch))
+        self.assertEqual({}, make_patch(original, original))
+
+    def test_not_an_object(self):
+        self.assertRaises(MimeBadRequest, MergePatch, Item, ["a"])
+
+    def test_diff(self):
+        patch = MergePatch.diff(Item("a"), Item("b"))
+        self.assertTrue(patch.cls is Item)
+        self.assertEqual({"name": "b"}, patch.to_data())
+
+        patch = MergePatch.diff({"name": "a"}, {"name": "b"}, Item)
+        self.assertTrue(patch.cls is Item)
+
+        self.assertRaises(ValueError, MergePatch.diff, {"name": "a"},
+                          {"name": "b"})
+
+    def test_validation(self):
+        target = Item("a")
+        projector = Projector()
+
+        patch = MergePatch(Item, {"tags": ["b"]}, projector)
+        self.assertEqual(["b"], patch.apply(target).tags)
+
+        for data in ({"name": None}, {"tags": [1]}, {"unknown": 1}):
+            patch = MergePatch(Item, data, projector)
+            self.assertRaises(MimeValidationError, patch.apply, target)
+
+        # without a projector nothing is checked.
+        self.assertEqual(None, MergePatch(Item, {"name": None}).apply(
+            target).name)
+
+
+class TestPatchRequests(unittest.TestCase):
+    def setUp(self):
+        self.stored = Item("first", ["a"], {"size": 1})
+        self.bodies = []
+
+        def get_item(request):
+            return self.stored
+
+        def patch_item(request):
+            self.bodies.append((request.content_type, request.body))
+            self.stored = request.mime_body.apply(self.stored)
+            return self.stored
+
+        config = Configurator()
+        config.add_route("item", "/item")
+        config.add_view(get_item, route_name="item", request_method="GET",
+                        renderer="mime")
+        config.add_view(patch_item, route_name="item",
+                        request_method="PATCH", renderer="mime")
+
+        provider = MimeProvider([Item, Error], error_handler=error_handler)
+        config.include(provider.add_config)
+        self.provider = provider
+
+        self.server = make_server("127.0.0.1", 0, config.make_wsgi_app(),
+                                  server_class=ThreadingServer,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.client = provider.get_client(
+            "http://127.0.0.1:{0}".format(self.server.server_port),
+            headers={"Accept": "application/item+json, "
+                               "application/error+json"})
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_patch(self):
+        _, obj = self.client.get("/item")
+        original = copy.deepcopy(obj.to_data())
+
+        obj.tags.append("b")
+        del obj.meta["size"]
+
+        response, updated = self.client.patch("/item", original, obj)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(["a", "b"], updated.tags)
+        self.assertEqual({}, self.stored.meta)
+        self.assertEqual("first", self.stored.name)
+
+        content_type, body = self.bodies[0]
+        self.assertEqual("application/item+merge-patch+json", content_type)
+        self.assertEqual({"tags": ["a", "b"], "meta": {"size": None}},
+                         json.loads(body))
+
+    def test_patch_snapshots(self):
+        response, updated = self.client.patch(
+            "/item", {"name": "first"}, {"name": "renamed"}, document=Item)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("renamed", self.stored.name)
+        self.assertEqual(["a"], self.stored.tags)
+
+    def test_provider_validators(self):
+        request = Request.blank("/", method="PATCH", body='{"tags": [1]}')
+        request.content_type = "application/item+merge-patch+json"
+
+        patch = self.provider.get_mime_body(request)
+
+        self.assertTrue(patch.projector is self.provider.projector)
+        self.assertRaises(MimeValidationError, patch.apply, self.stored)
+        self.assertEqual(1, len(self.provider.validators))
+        self.assertEqual(1, len(self.provider.projector.cache))
+
+    def test_invalid_patch(self):
+        _, obj = self.client.get("/item")
+        original = copy.deepcopy(obj.to_data())
+        obj.name = None
+
+        response, error = self.client.patch(
+            "/item", original, obj,
+            headers={"Accept": "application/error+json"})
+
+        self.assertEqual(400, response.status_code)
+        self.assertTrue(isinstance(error, Error))
+        self.assertEqual("first", self.stored.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
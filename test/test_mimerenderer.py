@@ -0,0 +1,101 @@
+import unittest
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+
+
+class Versioned(object):
+    object_type = "versioned"
+
+    def __init__(self, id, version):
+        self.id = id
+        self.version = version
+        self.rendered = 0
+
+    def cache_key(self):
+        return (self.id, self.version)
+
+    def to_data(self):
+        self.rendered += 1
+        return {"id": self.id, "version": self.version}
+
+
+class Other(Versioned):
+    object_type = "other"
+
+    def to_data(self):
+        self.rendered += 1
+        return {"other": self.id}
+
+
+def error_handler(exc, request):
+    return Versioned(0, 0)
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+        self.provider = MimeProvider([Versioned, Other], error_handler=error_handler,
+                                     render_cache_size=2)
+        self.renderer = self.provider.renderer(None)
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def render(self, obj, **headers):
+        headers.setdefault("Accept", "application/versioned+json")
+        request = Request.blank("/", headers=headers)
+        request.registry = self.config.registry
+        body = self.renderer(obj, {"request": request})
+        return request.response, body
+
+    def test_cached(self):
+        obj = Versioned(1, 1)
+        _, first = self.render(obj)
+        response, second = self.render(obj)
+
+        self.assertEqual(first, second)
+        self.assertEqual(1, obj.rendered)
+        self.assertTrue(response.etag)
+        self.assertEqual(1, self.provider.render_cache.stats()["hits"])
+
+    def test_version_changes_etag(self):
+        first, _ = self.render(Versioned(1, 1))
+        second, _ = self.render(Versioned(1, 2))
+        html, _ = self.render(Versioned(1, 2), Accept="text/html")
+
+        self.assertNotEqual(first.etag, second.etag)
+        self.assertNotEqual(second.etag, html.etag)
+
+    def test_classes_do_not_collide(self):
+        first, versioned = self.render(Versioned(1, 1), Accept="text/html")
+        second, other = self.render(Other(1, 1), Accept="text/html")
+
+        self.assertNotEqual(versioned, other)
+        self.assertNotEqual(first.etag, second.etag)
+
+    def test_not_modified(self):
+        response, _ = self.render(Versioned(1, 1))
+
+        obj = Versioned(1, 1)
+        etag = '"{0}"'.format(response.etag)
+        response, body = self.render(obj, **{"If-None-Match": etag})
+
+        self.assertEqual(304, response.status_int)
+        self.assertEqual("", body)
+        self.assertEqual(0, obj.rendered)
+
+    def test_eviction(self):
+        for i in range(3):
+            self.render(Versioned(i, 1))
+
+        stats = self.provider.render_cache.stats()
+        self.assertEqual(1, stats["evictions"])
+        self.assertEqual(2, stats["size"])
+        self.assertEqual(0.0, stats["hit_rate"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIRequestHandler
+
+from mimeprovider import MimeProvider
+from mimeprovider.packages import msgpack
+
+
+class TestMsgpack(unittest.TestCase):
+    def test_encoding(self):
+        self.assertEqual(b"\x81\xa1a\x01", msgpack.packb({"a": 1}))
+        self.assertEqual(b"\x93\x01\x02\xff", msgpack.packb([1, 2, -1]))
+        self.assertEqual(b"\xcd\x01\x2c", msgpack.packb(300))
+        self.assertEqual(b"\xcb?\xf8\x00\x00\x00\x00\x00\x00",
+                         msgpack.packb(1.5))
+        self.assertEqual(b"\xc0", msgpack.packb(None))
+        self.assertEqual(b"\x92\xc3\xc2", msgpack.packb((True, False)))
+
+    def test_roundtrip(self):
+        values = [
+            0, 127, 128, -32, -33, -129, 65536, 2 ** 64 - 1, -2 ** 63,
+            u"", u"a" * 32, u"åäö" * 100, u"x" * 70000,
+            [], [1] * 16, [1] * 70000, {}, dict((str(i), i) for i in range(20)),
+            {u"a": [{u"b": None}, 1.25]},
+        ]
+
+        for value in values:
+            self.assertEqual(value, msgpack.unpackb(msgpack.packb(value)))
+
+    def test_binary(self):
+        encoded = msgpack.packb(bytearray(b"\x00\x01"))
+        self.assertEqual(b"\xc4\x02\x00\x01", encoded)
+        self.assertEqual(b"\x00\x01", msgpack.unpackb(encoded))
+
+    def test_deeply_nested(self):
+        data = []
+
+        for _ in range(5000):
+            data = [data]
+
+        self.assertEqual(b"\x91" * 5000 + b"\x90",
+                         msgpack.packb(msgpack.unpackb(msgpack.packb(data))))
+
+    def test_invalid(self):
+        for data in (b"", b"\x92\x01", b"\x01\x02", b"\xc1", b"\xd9\x05ab",
+                     b"\x81\x91\x01\x01"):
+            self.assertRaises(ValueError, msgpack.unpackb, data)
+
+        self.assertRaises(ValueError, msgpack.packb, 2 ** 64)
+        self.assertRaises(TypeError, msgpack.packb, object())
+
+
+class Thing(object):
+    object_type = "thing"
+    schema = {
+        "type": "object",
+        "properties": {
+            "value": {"type": "integer", "required": True},
+        },
+    }
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_data(self):
+        return {"value": self.value}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["value"])
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def application(environ, start_response):
+    length = int(environ.get("CONTENT_LENGTH") or 0)
+    body = environ["wsgi.input"].read(length)
+
+    data = msgpack.unpackb(body)
+    data["value"] += 1
+    body = msgpack.packb(data)
+
+    start_response("200 OK", [("Content-Type", "application/thing+msgpack"),
+                              ("Content-Length", str(len(body)))])
+    return [body]
+
+
+class TestMsgpackClient(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server("127.0.0.1", 0, application,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.provider = MimeProvider([Thing])
+        self.client = self.provider.get_client(
+            "http://127.0.0.1:{0}".format(self.server.server_port))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_post(self):
+        response, obj = self.client.post(
+            "/", mime_body=Thing(41),
+            content_type="application/thing+msgpack")
+
+        self.assertEqual("application/thing+msgpack",
+                         response.request.headers["Content-Type"])
+        self.assertEqual(42, obj.value)
+
+    def test_negotiation(self):
+        match = self.provider.negotiator.negotiate(
+            "application/thing+json;q=0.5, application/thing+msgpack")
+        self.assertEqual("application/thing+msgpack", match[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
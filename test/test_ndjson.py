@@ -0,0 +1,232 @@
+import json
+import threading
+import unittest
+
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIRequestHandler
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.client import ClientException
+from mimeprovider.documenttype import get_default_document_types
+from mimeprovider.documenttype import get_document_type
+from mimeprovider.documenttype.ndjson import NdjsonDocumentType
+from mimeprovider.documenttype.ndjson import Stream
+from mimeprovider.documenttype.ndjson import iterlines
+from mimeprovider.exceptions import MimeBadRequest
+from mimeprovider.exceptions import MimeValidationError
+
+
+class Item(object):
+    object_type = "item"
+    schema = {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer", "required": True},
+        },
+    }
+
+    def __init__(self, id):
+        self.id = id
+
+    def to_data(self):
+        return {"id": self.id}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["id"])
+
+
+class Items(object):
+    object_type = "items"
+    schema = {
+        "type": "array",
+        "items": Item.schema,
+    }
+
+    def __init__(self, items):
+        self.items = items
+
+    def to_data(self):
+        return [item.to_data() for item in self.items]
+
+    @classmethod
+    def from_data(cls, data):
+        return Item.from_data(data)
+
+
+class Bounded(Items):
+    object_type = "bounded"
+    schema = dict(Items.schema, maxItems=10)
+
+
+def error_handler(exc, request):
+    return Item(0)
+
+
+def get_types():
+    return get_default_document_types() + [
+        get_document_type("mimeprovider.documenttype.ndjson")]
+
+
+class TestIterlines(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        body = b'{"id": 1}\n\n{"id": 22}\n{"id": 333}'
+        expected = ['{"id": 1}', '', '{"id": 22}', '{"id": 333}']
+
+        for size in (1, 2, 5, len(body)):
+            chunks = [body[i:i + size] for i in range(0, len(body), size)]
+            self.assertEqual(expected, list(iterlines(chunks)))
+
+
+class TestNdjson(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+        self.provider = MimeProvider([Item, Items, Bounded],
+                                     error_handler=error_handler,
+                                     types=get_types())
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def render(self, obj):
+        request = Request.blank("/", headers={
+            "Accept": "application/{0}+x-ndjson".format(obj.object_type)})
+        request.registry = self.config.registry
+        result = self.provider.renderer(None)(obj, {"request": request})
+        self.assertEqual(None, result)
+        return request.response
+
+    def test_render_lazily(self):
+        pulled = []
+
+        def items():
+            for i in range(3):
+                pulled.append(i)
+                yield Item(i)
+
+        response = self.render(Stream(Item, items()))
+
+        self.assertEqual("application/item+x-ndjson", response.content_type)
+        self.assertEqual([], pulled)
+        self.assertEqual('{"id": 0}\n{"id": 1}\n{"id": 2}\n', response.body)
+
+    def test_render_single(self):
+        self.assertEqual('{"id": 1}\n', self.render(Item(1)).body)
+
+    def test_render_invalid(self):
+        response = self.render(Stream(Item, [Item(1), Item("two")]))
+        self.assertRaises(MimeValidationError, list, response.app_iter)
+
+    def test_render_array_schema(self):
+        response = self.render(Items([Item(1), Item(2)]))
+        self.assertEqual('{"id": 1}\n{"id": 2}\n', response.body)
+
+        response = self.render(Items([Item(1), Item("two")]))
+        self.assertRaises(MimeValidationError, list, response.app_iter)
+
+    def test_get_mime_body_array_schema(self):
+        request = Request.blank("/", method="POST",
+                                body='{"id": 1}\n{"id": 2}\n')
+        request.content_type = "application/items+x-ndjson"
+
+        result = self.provider.get_mime_body(request)
+        self.assertEqual([1, 2], [item.id for item in result])
+
+    def test_array_keywords(self):
+        response = self.render(Bounded([Item(1), Item("notint")]))
+        self.assertRaises(MimeValidationError, list, response.app_iter)
+
+        request = Request.blank("/", method="POST",
+                                body='{"id": 1}\n{"id": "notint"}\n')
+        request.content_type = "application/bounded+x-ndjson"
+
+        result = self.provider.get_mime_body(request)
+
+        self.assertEqual(1, next(result).id)
+        self.assertRaises(MimeValidationError, next, result)
+
+    def test_not_default(self):
+        provider = MimeProvider([Item])
+        self.assertFalse("application/item+x-ndjson" in provider.mimetypes)
+
+    def test_get_mime_body(self):
+        request = Request.blank("/", method="POST",
+                                body='{"id": 1}\n\n{"id": 2}\n')
+        request.content_type = "application/item+x-ndjson"
+
+        result = self.provider.get_mime_body(request)
+
+        self.assertFalse(isinstance(result, list))
+        self.assertEqual([1, 2], [item.id for item in result])
+
+    def test_get_mime_body_invalid(self):
+        request = Request.blank("/", method="POST",
+                                body='{"id": 1}\n{"id": "two"}\n')
+        request.content_type = "application/item+x-ndjson"
+
+        result = self.provider.get_mime_body(request)
+
+        self.assertEqual(1, next(result).id)
+        self.assertRaises(MimeValidationError, next, result)
+
+    def test_get_mime_body_malformed(self):
+        request = Request.blank("/", method="POST",
+                                body='{"id": 1}\n{"id":\n')
+        request.content_type = "application/item+x-ndjson"
+
+        result = self.provider.get_mime_body(request)
+
+        self.assertEqual(1, next(result).id)
+        self.assertRaises(MimeBadRequest, next, result)
+
+    def test_roundtrip(self):
+        document_type = NdjsonDocumentType()
+        body = document_type.render(None, Stream(Item, [Item(1), Item(2)]))
+        items = document_type.parse(None, Item, body)
+        self.assertEqual([1, 2], [item.id for item in items])
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def application(environ, start_response):
+    start_response("200 OK", [("Content-Type", "application/item+x-ndjson")])
+
+    if environ["PATH_INFO"] == "/invalid":
+        return ['{"id": 1}\n', '{"id": "two"}\n']
+
+    return ['{{"id": {0}}}\n'.format(i) for i in range(1000)]
+
+
+class TestClientStream(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server("127.0.0.1", 0, application,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.client = MimeProvider([Item], types=get_types()).get_client(
+            "http://127.0.0.1:{0}".format(self.server.server_port))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_stream(self):
+        _, items = self.client.get("/", stream=True)
+        self.assertEqual(range(1000), [item.id for item in items])
+
+    def test_stream_invalid(self):
+        _, items = self.client.get("/invalid", stream=True)
+        self.assertEqual(1, next(items).id)
+        self.assertRaises(ClientException, next, items)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import warnings
+
+from webob.acceptparse import create_accept_header
+
+from mimeprovider import MimeProvider
+from mimeprovider.negotiation import Negotiator
+
+
+class A(object):
+    object_type = "foo"
+
+
+class B(object):
+    object_type = "bar"
+
+
+HEADERS = [
+    "*/*",
+    "text/html",
+    "text/*",
+    "application/*",
+    "*/html",
+    "application/bar+json",
+    "application/bar+json;q=0.5, text/plain;q=0.9",
+    "text/html;q=0.5, */*",
+    "text/plain, text/*",
+    "text/plain;q=0, application/foo+json;q=0.1",
+    "image/png",
+    "Application/FOO+JSON",
+]
+
+
+class TestNegotiator(unittest.TestCase):
+    def setUp(self):
+        self.provider = MimeProvider([A, B])
+
+    def test_matches_webob(self):
+        negotiator = Negotiator(self.provider.mimetypes)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+
+            for header in HEADERS:
+                accept = create_accept_header(header)
+                expected = accept.best_match(self.provider.mimetypes)
+                result = negotiator.negotiate(header)
+
+                if expected is None:
+                    self.assertEqual(None, result, header)
+                    continue
+
+                self.assertEqual(expected, result[0], header)
+
+    def test_missing_header(self):
+        negotiator = Negotiator(self.provider.mimetypes)
+        mime, _ = negotiator.negotiate(None)
+        self.assertEqual(list(self.provider.mimetypes)[0], mime)
+
+    def test_cache_counters(self):
+        negotiator = Negotiator(self.provider.mimetypes)
+        negotiator.negotiate("text/html")
+        negotiator.negotiate("text/html")
+        negotiator.negotiate("image/png")
+        self.assertEqual(1, negotiator.hits)
+        self.assertEqual(2, negotiator.misses)
+
+    def test_register_invalidates(self):
+        class C(object):
+            object_type = "baz"
+
+        negotiator = self.provider.negotiator
+        self.assertEqual(None, negotiator.negotiate("application/baz+json"))
+
+        self.provider.register(C)
+
+        mime, (_, cls, _) = negotiator.negotiate("application/baz+json")
+        self.assertEqual("application/baz+json", mime)
+        self.assertTrue(cls is C)
+
+
+if __name__ == "__main__":
+    unittest.main()
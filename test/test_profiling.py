@@ -0,0 +1,108 @@
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from pyramid.config import Configurator
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.profiling import Profiler
+
+
+class Thing(object):
+    object_type = "thing"
+
+    def __init__(self, delay=0):
+        self.delay = delay
+
+    def to_data(self):
+        for _ in range(self.delay):
+            sum(range(10000))
+
+        return {"delay": self.delay}
+
+
+def error_handler(exc, request):
+    return Thing()
+
+
+def view(request):
+    return Thing(int(request.GET.get("delay", 0)))
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_app(self, **kw):
+        self.profiler = Profiler(self.directory, **kw)
+
+        config = Configurator()
+        config.add_route("thing", "/thing")
+        config.add_view(view, route_name="thing", renderer="mime")
+
+        provider = MimeProvider([Thing], error_handler=error_handler,
+                                profiler=self.profiler)
+        config.include(provider.add_config)
+        return config.make_wsgi_app()
+
+    def get(self, app, path):
+        request = Request.blank(
+            path, headers={"Accept": "application/thing+json"})
+        return request.get_response(app)
+
+    def test_sampled(self):
+        app = self.make_app(sample_rate=1.0)
+        self.assertEqual(200, self.get(app, "/thing?delay=1").status_int)
+
+        dumps = self.profiler.dumps()
+        self.assertEqual(1, len(dumps))
+
+        with open(dumps[0] + ".json") as f:
+            info = json.load(f)
+
+        self.assertEqual("Thing", info["document"])
+        self.assertEqual("application/thing+json", info["mimetype"])
+        self.assertEqual("/thing?delay=1", info["path"])
+        self.assertEqual(200, info["status"])
+
+        stats = pstats.Stats(dumps[0] + ".prof")
+        self.assertTrue(any(name == "to_data"
+                            for _, _, name in stats.stats))
+
+    def test_threshold(self):
+        app = self.make_app(threshold=0.05)
+        self.get(app, "/thing")
+        self.assertEqual([], self.profiler.dumps())
+
+        self.get(app, "/thing?delay=2000")
+        self.assertEqual(1, len(self.profiler.dumps()))
+
+    def test_rotation(self):
+        app = self.make_app(sample_rate=1.0, max_files=2)
+
+        for _ in range(4):
+            self.get(app, "/thing")
+
+        self.assertEqual(4, self.profiler.written)
+        self.assertEqual(4, len(os.listdir(self.directory)))
+
+    def test_disabled(self):
+        app = self.make_app()
+        self.get(app, "/thing?delay=1")
+        self.assertEqual([], self.profiler.dumps())
+
+    def test_options(self):
+        self.assertRaises(ValueError, Profiler, self.directory,
+                          sample_rate=2.0)
+        self.assertRaises(ValueError, Profiler, self.directory, max_files=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import threading
+import unittest
+
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.registry import normalize_mimetype
+
+
+def document(name):
+    return type(name, (object,), {
+        "object_type": name.lower(),
+        "to_data": lambda self: {},
+        "from_data": classmethod(lambda cls, data: cls()),
+    })
+
+
+class TestRegistry(unittest.TestCase):
+    def setUp(self):
+        self.A = document("A")
+        self.provider = MimeProvider([self.A])
+
+    def test_normalize(self):
+        self.assertEqual("application/a+json",
+                         normalize_mimetype("Application/A+JSON; charset=x"))
+        self.assertEqual("application/a+x-ndjson",
+                         normalize_mimetype("application/a+ndjson"))
+        self.assertEqual("text/plain", normalize_mimetype(" text/plain "))
+
+    def test_lookup(self):
+        registry = self.provider.registry
+
+        for content_type in ("application/a+json",
+                             "APPLICATION/A+Json;charset=utf-8",
+                             "application/a+x-msgpack"):
+            self.assertTrue(registry.lookup(content_type)[1] is self.A,
+                            content_type)
+
+        self.assertEqual(None, registry.lookup("application/b+json"))
+
+    def test_get_mime_body(self):
+        request = Request.blank("/", method="POST", body="{}")
+        request.headers["Content-Type"] = "Application/A+JSON; charset=utf-8"
+        self.assertTrue(isinstance(self.provider.get_mime_body(request),
+                                   self.A))
+
+    def test_snapshots(self):
+        before = self.provider.registry.snapshot
+        B = document("B")
+        self.provider.register(B)
+
+        self.assertFalse("application/b+json" in before.mimetypes)
+        self.assertTrue("application/b+json" in self.provider.mimetypes)
+        self.assertFalse(B in before.mimeobjects)
+        self.assertTrue(isinstance(self.provider.mimeobjects[B], tuple))
+
+    def test_conflict_registers_nothing(self):
+        B = document("B")
+        snapshot = self.provider.registry.snapshot
+
+        self.assertRaises(ValueError, self.provider.register, B, document("A"))
+        self.assertTrue(snapshot is self.provider.registry.snapshot)
+
+    def test_client_sees_registrations(self):
+        client = self.provider.get_client("http://localhost")
+        B = document("B")
+        self.provider.register(B)
+        self.assertTrue(client._lookup("application/b+json")[1] is B)
+
+    def test_concurrent(self):
+        errors = []
+        done = threading.Event()
+
+        def negotiate():
+            while not done.is_set():
+                try:
+                    mime, _ = self.provider.negotiator.negotiate(
+                        "application/a+json")
+                    assert mime == "application/a+json"
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        thread = threading.Thread(target=negotiate)
+        thread.start()
+
+        for i in range(200):
+            self.provider.register(document("D{0}".format(i)))
+
+        done.set()
+        thread.join()
+
+        self.assertEqual([], errors)
+        self.assertEqual(201, len(self.provider.mimeobjects))
+
+
+if __name__ == "__main__":
+    unittest.main()
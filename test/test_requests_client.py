@@ -0,0 +1,112 @@
+import json
+import threading
+import unittest
+
+from SocketServer import ThreadingMixIn
+from wsgiref.simple_server import make_server
+from wsgiref.simple_server import WSGIServer
+from wsgiref.simple_server import WSGIRequestHandler
+
+from mimeprovider import MimeProvider
+from mimeprovider.client import ClientException
+
+
+class Node(object):
+    object_type = "node"
+
+    def __init__(self, name, links):
+        self.name = name
+        self.links = links
+
+    def to_data(self):
+        return {"name": self.name, "links": self.links}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["name"], data["links"])
+
+
+GRAPH = {
+    "a": ["b", "c"],
+    "b": ["c", "d"],
+    "c": ["a"],
+    "d": ["e"],
+    "e": [],
+}
+
+
+class ThreadingServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def application(environ, start_response):
+    name = environ["PATH_INFO"].strip("/")
+
+    if name not in GRAPH:
+        start_response("404 Not Found", [("Content-Type", "text/plain")])
+        return ["not found"]
+
+    links = [{"$ref": "/" + link, "rel": "child" if i == 0 else "other"}
+             for i, link in enumerate(GRAPH[name])]
+
+    body = json.dumps({"name": name, "links": links})
+    start_response("200 OK", [("Content-Type", "application/node+json"),
+                              ("Content-Length", str(len(body)))])
+    return [body]
+
+
+class TestRequestsClient(unittest.TestCase):
+    def setUp(self):
+        self.server = make_server("127.0.0.1", 0, application,
+                                  server_class=ThreadingServer,
+                                  handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.provider = MimeProvider([Node])
+        self.client = self.provider.get_client(
+            "http://127.0.0.1:{0}".format(self.server.server_port))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_request_many(self):
+        calls = [("GET", "/" + name) for name in "abcde"] * 4
+        results = list(self.client.request_many(calls, workers=16))
+
+        self.assertEqual(list("abcde") * 4, [r.obj.name for r in results])
+        self.assertEqual(range(20), [r.index for r in results])
+        self.assertEqual(16, self.client.pool_size)
+
+    def test_unordered_errors(self):
+        calls = [("GET", "/a"), ("GET", "/missing"), ("GET", "/b")]
+        results = list(self.client.request_many(calls, ordered=False))
+
+        self.assertEqual([0, 1, 2], sorted(r.index for r in results))
+
+        failed = [r for r in results if not r.ok]
+        self.assertEqual(1, len(failed))
+        self.assertEqual("/missing", failed[0].uri)
+        self.assertTrue(isinstance(failed[0].error, ClientException))
+
+    def test_follow(self):
+        names = [r.obj.name for r in self.client.follow("/a", depth=2)]
+        self.assertEqual(["a", "b", "c", "d"], names)
+
+        names = [r.obj.name for r in self.client.follow("/a", depth=5)]
+        self.assertEqual(["a", "b", "c", "d", "e"], names)
+
+    def test_follow_rels(self):
+        results = self.client.follow("/a", depth=5, rels=["child"])
+        self.assertEqual(["a", "b", "c"], [r.obj.name for r in results])
+
+
+if __name__ == "__main__":
+    unittest.main()
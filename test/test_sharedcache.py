@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.sharedcache import SharedCache
+
+from test.test_mimerenderer import Versioned
+from test.test_mimerenderer import error_handler
+
+
+class TestSharedCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "render.cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_set(self):
+        cache = SharedCache(self.path, 16)
+        cache.set(("a", 1), b"body")
+        cache.set(("b", 1), u"\xe5")
+
+        self.assertEqual(b"body", cache.get(("a", 1)))
+        self.assertEqual(u"\xe5", cache.get(("b", 1)))
+        self.assertEqual(None, cache.get(("a", 2)))
+        self.assertTrue(("a", 1) in cache)
+
+        stats = cache.stats()
+        self.assertEqual(2, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(2, stats["size"])
+
+    def test_lru(self):
+        cache = SharedCache(self.path, 2, ways=2)
+        cache.set("a", b"a")
+        time.sleep(0.01)
+        cache.set("b", b"b")
+        time.sleep(0.01)
+        cache.get("a")
+        cache.set("c", b"c")
+
+        self.assertEqual(b"a", cache.get("a"))
+        self.assertEqual(None, cache.get("b"))
+        self.assertEqual(1, cache.stats()["evictions"])
+
+    def test_oversized(self):
+        cache = SharedCache(self.path, 2, slot_size=4)
+        cache.set("a", b"12345")
+
+        self.assertEqual(None, cache.get("a"))
+        self.assertEqual(1, cache.stats()["oversized"])
+
+    def test_shared_between_processes(self):
+        cache = SharedCache(self.path, 16)
+        pid = os.fork()
+
+        if pid == 0:
+            try:
+                SharedCache(self.path, 16).set("key", b"from child")
+            finally:
+                os._exit(0)
+
+        os.waitpid(pid, 0)
+        self.assertEqual(b"from child", cache.get("key"))
+
+    def test_namespace(self):
+        SharedCache(self.path, 16, namespace="1.0").set("key", b"old")
+
+        self.assertEqual(None, SharedCache(self.path, 16,
+                                           namespace="1.1").get("key"))
+        self.assertEqual(b"old", SharedCache(self.path, 16,
+                                             namespace="1.0").get("key"))
+
+    def test_geometry_mismatch(self):
+        SharedCache(self.path, 16)
+        self.assertRaises(ValueError, SharedCache, self.path, 32)
+
+    def test_provider(self):
+        config = testing.setUp()
+
+        try:
+            renderers = [
+                MimeProvider([Versioned], error_handler=error_handler,
+                             render_cache=SharedCache(self.path, 16))
+                .renderer(None)
+                for _ in range(2)]
+
+            bodies = []
+
+            for renderer, obj in zip(renderers, [Versioned(1, 1)] * 2):
+                request = Request.blank(
+                    "/", headers={"Accept": "application/versioned+json"})
+                request.registry = config.registry
+                bodies.append(renderer(obj, {"request": request}))
+
+            self.assertEqual(bodies[0], bodies[1])
+            self.assertEqual(1, obj.rendered)
+        finally:
+            testing.tearDown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+
+from pyramid import testing
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.exceptions import MimeValidationError
+from mimeprovider.validation import ValidationPolicy
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "value": {"type": "integer", "required": True},
+    },
+}
+
+
+class Thing(object):
+    object_type = "thing"
+    schema = SCHEMA
+
+    def __init__(self, value):
+        self.value = value
+
+    def to_data(self):
+        return {"value": self.value}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["value"])
+
+
+class Trusted(Thing):
+    object_type = "trusted"
+    validation_policy = "off"
+
+
+def error_handler(exc, request):
+    return Thing(0)
+
+
+class TestValidationPolicy(unittest.TestCase):
+    def setUp(self):
+        self.config = testing.setUp()
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def render(self, provider, obj):
+        request = Request.blank("/", headers={
+            "Accept": "application/{0}+json".format(obj.object_type)})
+        request.registry = self.config.registry
+        return provider.renderer(None)(obj, {"request": request})
+
+    def parse(self, provider, body, object_type="thing"):
+        request = Request.blank("/", method="POST", body=body)
+        request.content_type = "application/{0}+json".format(object_type)
+        return provider.get_mime_body(request)
+
+    def test_always(self):
+        provider = MimeProvider([Thing], error_handler=error_handler)
+
+        self.assertRaises(MimeValidationError, self.render, provider,
+                          Thing("one"))
+        self.assertRaises(MimeValidationError, self.parse, provider,
+                          '{"value": "one"}')
+
+        stats = provider.validation_policy.stats()
+        self.assertEqual(1, stats["outbound_validated"])
+        self.assertEqual(1, stats["inbound_validated"])
+
+    def test_inbound(self):
+        provider = MimeProvider([Thing], error_handler=error_handler,
+                                validation_policy="inbound")
+
+        self.assertEqual('{"value": "one"}',
+                         self.render(provider, Thing("one")))
+        self.assertRaises(MimeValidationError, self.parse, provider,
+                          '{"value": "one"}')
+
+        stats = provider.validation_policy.stats()
+        self.assertEqual(1, stats["outbound_skipped"])
+        self.assertEqual(1, stats["inbound_validated"])
+
+    def test_sampled(self):
+        policy = ValidationPolicy("sampled", sample_rate=1.0)
+        provider = MimeProvider([Thing], error_handler=error_handler,
+                                validation_policy=policy)
+
+        self.assertEqual('{"value": "one"}',
+                         self.render(provider, Thing("one")))
+        self.render(provider, Thing(1))
+
+        stats = policy.stats()
+        self.assertEqual(2, stats["outbound_validated"])
+        self.assertEqual(1, stats["sampled_failures"])
+        self.assertEqual("Thing", policy.failures[0][0])
+
+        policy.sample_rate = 0.0
+        self.render(provider, Thing("one"))
+        self.assertEqual(1, policy.stats()["outbound_skipped"])
+
+    def test_off(self):
+        provider = MimeProvider([Thing], error_handler=error_handler,
+                                validation_policy="off")
+        self.assertEqual("one", self.parse(provider, '{"value": "one"}').value)
+        self.assertEqual(1, provider.validation_policy.stats()[
+            "inbound_skipped"])
+
+    def test_per_document(self):
+        provider = MimeProvider([Thing, Trusted], error_handler=error_handler)
+
+        self.assertEqual('{"value": "one"}',
+                         self.render(provider, Trusted("one")))
+        self.assertEqual("one", self.parse(provider, '{"value": "one"}',
+                                           "trusted").value)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, ValidationPolicy, "sometimes")
+        self.assertRaises(ValueError, ValidationPolicy, "sampled", 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
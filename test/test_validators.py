@@ -0,0 +1,136 @@
+import unittest
+
+from mimeprovider import MimeProvider
+from mimeprovider.exceptions import MimeValidationError
+from mimeprovider.validators import LazyValidator
+from mimeprovider.validators import ValidatorCache
+from mimeprovider.validators.jsonschema import JsonSchemaValidator
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "string": {
+            "type": "string",
+            "required": True,
+        },
+        "integer": {
+            "type": "number",
+            "required": True,
+        },
+        "somelist": {
+            "type": "array",
+        },
+    }
+}
+
+DRAFT4_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "flag": {"type": ["boolean", "null"]},
+        "count": {"type": "integer"},
+    },
+    "required": ["count"],
+}
+
+INSTANCES = [
+    {"string": "a", "integer": 1},
+    {"string": "a", "integer": 1.5, "somelist": [1, 2]},
+    {"string": "a", "integer": True},
+    {"string": 1, "integer": 1},
+    {"integer": 1},
+    {"string": "a", "integer": 1, "somelist": {}},
+    {"flag": True, "count": 1},
+    {"flag": None, "count": 1},
+    {"flag": 0, "count": 1},
+    {"flag": False},
+    {"count": 1.0},
+    [],
+    "string",
+]
+
+
+class TestJsonSchemaValidator(unittest.TestCase):
+    def assertSameResult(self, schema):
+        fast = JsonSchemaValidator(schema)
+        slow = JsonSchemaValidator(schema, fast=False)
+
+        self.assertTrue(fast.fast_check is not None)
+
+        for instance in INSTANCES:
+            try:
+                slow.validate(instance)
+            except MimeValidationError:
+                self.assertRaises(MimeValidationError, fast.validate, instance)
+            else:
+                fast.validate(instance)
+
+    def test_fast_path_draft3(self):
+        self.assertSameResult(SCHEMA)
+
+    def test_fast_path_draft4(self):
+        self.assertSameResult(DRAFT4_SCHEMA)
+
+    def test_not_simple(self):
+        validator = JsonSchemaValidator({"type": "string", "maxLength": 2})
+        self.assertEqual(None, validator.fast_check)
+        validator.validate("ab")
+        self.assertRaises(MimeValidationError, validator.validate, "abc")
+
+    def test_schema_union(self):
+        validator = JsonSchemaValidator(
+            {"type": [{"type": "string"}, "null"]})
+        self.assertEqual(None, validator.fast_check)
+        validator.validate("a")
+        validator.validate(None)
+        self.assertRaises(MimeValidationError, validator.validate, 1)
+
+    def test_invalid_schema(self):
+        self.assertRaises(ValueError, JsonSchemaValidator, {"type": 12})
+
+
+class TestValidatorCache(unittest.TestCase):
+    def test_shared(self):
+        cache = ValidatorCache(JsonSchemaValidator)
+        a = cache.get(SCHEMA)
+        b = cache.get(dict(SCHEMA))
+        self.assertTrue(a is b)
+        self.assertEqual(1, len(cache))
+
+    def test_provider_shares_validators(self):
+        class A(object):
+            object_type = "a"
+            schema = SCHEMA
+
+        class B(object):
+            object_type = "b"
+            schema = dict(SCHEMA)
+
+        provider = MimeProvider([A, B])
+        _, _, a = provider.mimetypes["application/a+json"]
+        _, _, b = provider.mimetypes["application/b+json"]
+        self.assertTrue(a is b)
+
+    def test_invalid_schema_on_register(self):
+        class Bad(object):
+            object_type = "bad"
+            schema = {"properties": {"a": {"type": 12}}}
+
+        provider = MimeProvider([])
+        self.assertRaises(ValueError, provider.register, Bad)
+        self.assertFalse(Bad in provider.mimeobjects)
+
+    def test_checked_on_register(self):
+        class Unknown(object):
+            object_type = "unknown"
+            schema = {"$schema": "http://json-schema.org/draft-04/schema#",
+                      "properties": {"a": {"type": "strin"}}}
+
+        provider = MimeProvider([])
+        self.assertRaises(ValueError, provider.register, Unknown)
+
+        for schema in (SCHEMA, DRAFT4_SCHEMA):
+            LazyValidator(None, schema)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import json
+import unittest
+
+from pyramid.config import Configurator
+from pyramid.request import Request
+
+from mimeprovider import MimeProvider
+from mimeprovider.documenttype.json import JsonDocumentType
+
+
+class Item(object):
+    object_type = "item"
+
+    def __init__(self, name):
+        self.name = name
+
+    def to_data(self):
+        return {"name": self.name}
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["name"])
+
+
+class Other(Item):
+    object_type = "other"
+
+
+class Late(Item):
+    object_type = "late"
+
+
+class Error(object):
+    object_type = "error"
+
+    def __init__(self, message):
+        self.message = message
+
+    def to_data(self):
+        return {"message": self.message}
+
+
+def error_handler(exc, request):
+    request.response.status_code = exc.status_code
+    return Error(exc.title)
+
+
+class TestNegotiationDeriver(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def create(request):
+            self.calls.append(request)
+            return request.mime_body
+
+        config = Configurator()
+        config.add_route("items", "/items")
+        config.add_view(create, route_name="items", renderer="mime",
+                        consumes=[Item], produces=[Item])
+        config.add_route("late", "/late")
+        config.add_view(create, route_name="late", renderer="mime",
+                        produces=[Late])
+        config.add_route("plain", "/plain")
+        config.add_view(create, route_name="plain", renderer="mime")
+
+        self.provider = MimeProvider(
+            [Item, Other, Error], error_handler=error_handler,
+            types=[JsonDocumentType])
+        config.include(self.provider.add_config)
+        self.app = config.make_wsgi_app()
+
+    def post(self, path, accept, content_type, body='{"name": "a"}'):
+        request = Request.blank(path, method="POST", body=body, headers={
+            "Accept": accept, "Content-Type": content_type})
+        return request.get_response(self.app)
+
+    def test_served(self):
+        response = self.post("/items", "application/item+json",
+                             "Application/Item+JSON; charset=utf-8")
+
+        self.assertEqual(200, response.status_int)
+        self.assertEqual({"name": "a"}, json.loads(response.body))
+        self.assertEqual(1, len(self.calls))
+
+    def test_not_acceptable(self):
+        for _ in range(2):
+            response = self.post("/items", "application/other+json",
+                                 "application/item+json")
+
+            self.assertEqual(406, response.status_int)
+            self.assertEqual("application/error+json",
+                             response.content_type)
+            self.assertEqual({"message": "Not Acceptable"},
+                             json.loads(response.body))
+
+        self.assertEqual([], self.calls)
+
+    def test_unsupported_media_type(self):
+        response = self.post("/items", "application/item+json",
+                             "application/other+json", body="not read")
+
+        self.assertEqual(415, response.status_int)
+        self.assertEqual({"message": "Unsupported Media Type"},
+                         json.loads(response.body))
+        self.assertEqual([], self.calls)
+
+    def test_later_registration(self):
+        response = self.post("/late", "application/late+json",
+                             "application/item+json")
+        self.assertEqual(406, response.status_int)
+
+        self.provider.register(Late)
+
+        response = self.post("/late", "application/late+json",
+                             "application/item+json")
+        self.assertEqual(200, response.status_int)
+
+    def test_undeclared_view(self):
+        response = self.post("/plain", "application/other+json",
+                             "application/item+json")
+
+        self.assertEqual(200, response.status_int)
+        self.assertEqual(1, len(self.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()